@@ -0,0 +1,7 @@
+"""Offline benchmark suite for the poller's hot paths.
+
+Run ``python -m backend.benchmarks`` from the repository root. Every case
+works on synthetic data in a temp directory (hosts files, fake ``/proc``
+trees, block configs) and talks to a local Firebase stub, so nothing on the
+machine is modified and no network access is needed.
+"""
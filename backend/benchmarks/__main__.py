@@ -0,0 +1,86 @@
+import sys
+import json
+import argparse
+import platform
+import tempfile
+from pathlib import Path
+from .cases import CASES, run_case, run_isolated
+from .harness import check_budgets, compare, format_table, peak_rss_kb
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks",
+                                     description="Offline benchmarks for the poller's hot paths.")
+    parser.add_argument("cases", nargs="*", metavar="CASE",
+                        help=f"cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer samples")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON to PATH")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help=f"overwrite {BASELINE_PATH.name} with these results")
+    parser.add_argument("--baseline", metavar="PATH", default=str(BASELINE_PATH),
+                        help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="allowed p50 slowdown against the baseline (default: 0.3 = 30%%)")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.cases) - set(CASES))
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    if args.run_case:
+        # Child mode: one case in this interpreter, so ru_maxrss is the case's own peak.
+        with tempfile.TemporaryDirectory(prefix="npng-bench-") as tmp:
+            results = run_case(args.run_case, Path(tmp), args.quick)
+        peak = peak_rss_kb()
+        payload = [dict(result.to_dict(), peak_rss_kb=peak) for result in results]
+        Path(args.output).write_text(json.dumps(payload))
+        return 0
+
+    results = []
+    for name in args.cases or list(CASES):
+        print(f"running {name}...", file=sys.stderr, flush=True)
+        results.extend(run_isolated(name, args.quick))
+
+    print(format_table(results))
+    # Budgets are absolute limits, checked even when the baseline is rewritten.
+    failures = check_budgets(results)
+    if failures:
+        print(f"\n{len(failures)} budget failure(s):")
+        for line in failures:
+            print(f"  {line}")
+    document = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results,
+    }
+    if args.json:
+        Path(args.json).write_text(json.dumps(document, indent=2) + "\n")
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"baseline written to {BASELINE_PATH}")
+        return 1 if failures else 0
+
+    baseline_path = Path(args.baseline)
+    if not baseline_path.exists():
+        return 1 if failures else 0
+    baseline = json.loads(baseline_path.read_text())
+    if baseline.get("quick") != args.quick:
+        print(f"\nbaseline {baseline_path} was recorded with quick={baseline.get('quick')}; "
+              "skipping comparison")
+        return 1 if failures else 0
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {baseline_path}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nno regressions against {baseline_path} (tolerance {args.tolerance:.0%})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
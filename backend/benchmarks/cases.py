@@ -0,0 +1,1218 @@
+import os
+import sys
+import json
+import time
+import shutil
+import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+from unittest import mock
+from .fixtures import (
+    APP_NAMES,
+    FakeResolver,
+    FirebaseStub,
+    add_proc,
+    make_blocklist,
+    make_config,
+    make_dns_query,
+    make_hosts_file,
+    make_proc_tree,
+    site_names,
+)
+from .harness import Result, measure, peak_rss_kb, throughput
+from ..utils.logger import Logger
+
+BENCH_LATENCY = 0.02
+GOAL_DB = {
+    "goalReachedToday": False,
+    "workoutMinutesToday": 12,
+    "restrictionsEnabled": True,
+    "lastSyncedAt": "2024-01-01T00:00:00Z",
+    "history": {"2024-01-01": 30},
+}
+
+Case = Callable[[Path, bool], List[Result]]
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str) -> Callable[[Case], Case]:
+    """Register a benchmark case under ``name``."""
+    def register(fn: Case) -> Case:
+        CASES[name] = fn
+        return fn
+    return register
+
+
+def quiet_logger(workdir: Path) -> Logger:
+    """Logger that writes to the work directory without echoing to stdout."""
+    return Logger(workdir / "bench.log", echo=False)
+
+
+@case("hosts")
+def bench_hosts(workdir: Path, quick: bool) -> List[Result]:
+    """Block and unblock 500 sites in hosts files of growing size."""
+    from ..services.hosts_manager import HostsManager
+
+    logger = quiet_logger(workdir)
+    sites = site_names(500, seed=7)
+    results = []
+    for lines in ((1_000, 10_000) if quick else (1_000, 10_000, 50_000, 200_000)):
+        path = workdir / f"hosts-{lines}"
+        make_hosts_file(path, lines)
+        manager = HostsManager(logger, hosts_path=str(path))
+        params = {"lines": lines, "sites": len(sites)}
+
+        def block_unblock() -> None:
+            manager.block_websites(sites)
+            manager.unblock_websites(sites)
+
+        results.append(measure("hosts_block_unblock", block_unblock, params,
+                               repeat=5 if lines >= 50_000 else 20))
+        manager.block_websites(sites)
+        results.append(measure("hosts_block_noop", lambda: manager.block_websites(sites), params,
+                               repeat=5 if lines >= 50_000 else 20))
+    return results
+
+
+@case("process_scan")
+def bench_process_scan(workdir: Path, quick: bool) -> List[Result]:
+    """Cold and warm scans, and a block_apps sweep, over fake /proc trees."""
+    from ..services.notifications import NullBackend
+    from ..services.process_manager import ProcessManager
+    from ..services.process_scanner import AppMatcher, ProcessScanner, iter_proc, proc_exe
+
+    logger = quiet_logger(workdir)
+    matcher = AppMatcher(APP_NAMES)
+    results = []
+    for entries in ((100, 1_000) if quick else (100, 1_000, 5_000, 20_000)):
+        root = workdir / f"proc-{entries}"
+        make_proc_tree(root, entries, blocked=("steam", "Discord Helper"))
+        proc_root = str(root)
+
+        def new_scanner() -> ProcessScanner:
+            return ProcessScanner(source=lambda: iter_proc(proc_root),
+                                  exe_resolver=lambda pid: proc_exe(pid, proc_root))
+
+        params = {"entries": entries}
+        state = {"scanner": new_scanner()}
+        results.append(measure(
+            "process_scan_cold", lambda: state["scanner"].scan(matcher), params,
+            repeat=5 if entries >= 5_000 else 20,
+            setup=lambda: state.update(scanner=new_scanner()),
+        ))
+        warm = new_scanner()
+        results.append(measure("process_scan_warm", lambda: warm.scan(matcher), params,
+                               repeat=10 if entries >= 5_000 else 50))
+
+        manager = ProcessManager(logger, scanner=new_scanner())
+        manager.exec_watcher = None
+        manager.notifier.backend = NullBackend()
+        results.append(measure("block_apps_sweep", lambda: manager.block_apps(list(APP_NAMES)),
+                               params, repeat=10 if entries >= 5_000 else 50))
+    return results
+
+
+@case("exec_watch")
+def bench_exec_watch(workdir: Path, quick: bool) -> List[Result]:
+    """Cost of one /proc diff tick, and launch-to-kill latency of the exec watcher."""
+    from ..services.exec_watcher import ExecWatcher, ProcDiffSource
+    from ..services.notifications import NullBackend
+    from ..services.process_manager import ProcessManager
+    from ..services.process_scanner import AppMatcher
+
+    results = []
+    for entries in ((1_000,) if quick else (1_000, 20_000)):
+        root = workdir / f"proc-{entries}"
+        make_proc_tree(root, entries)
+        source = ProcDiffSource(interval=0, root=str(root))
+        pid = iter(range(20_000_000, 30_000_000))
+        results.append(measure(
+            "proc_diff_tick", source.poll, {"entries": entries}, repeat=50,
+            setup=lambda: add_proc(root, next(pid), "newproc"),
+        ))
+
+    if not ExecWatcher.supported():
+        return results
+
+    name = "npngbenchblocked"
+    binary = workdir / name
+    shutil.copy("/bin/sleep", binary)
+    manager = ProcessManager(quiet_logger(workdir))
+    manager.notifier.backend = NullBackend()
+    manager._watch(AppMatcher([name]))
+    time.sleep(0.2)
+    state: Dict[str, subprocess.Popen] = {}
+    try:
+        results.append(measure(
+            "exec_kill_latency",
+            lambda: state["proc"].wait(timeout=5),
+            {"source": type(manager.exec_watcher._source).__name__},
+            repeat=5 if quick else 20, warmup=0,
+            setup=lambda: state.update(proc=subprocess.Popen([str(binary), "30"])),
+        ))
+    finally:
+        manager.unblock_apps([name])
+        if "proc" in state and state["proc"].poll() is None:
+            state["proc"].kill()
+    return results
+
+
+@case("config_load")
+def bench_config_load(workdir: Path, quick: bool) -> List[Result]:
+    """Config snapshots after an edit (re-parse) and when unchanged (cached)."""
+    from ..services.config_manager import ConfigManager
+
+    logger = quiet_logger(workdir)
+    results = []
+    for sites in ((1_000, 5_000) if quick else (1_000, 5_000, 20_000)):
+        path = workdir / f"config-{sites}.json"
+        make_config(path, sites)
+        manager = ConfigManager(path, logger)
+        params = {"sites": sites}
+        mtime = [os.stat(path).st_mtime_ns]
+
+        def touch() -> None:
+            mtime[0] += 1_000_000
+            os.utime(path, ns=(mtime[0], mtime[0]))
+
+        results.append(measure("config_snapshot_changed", manager.snapshot, params, setup=touch))
+        results.append(measure("config_snapshot_unchanged", manager.snapshot, params, repeat=200))
+        results.append(measure("config_load_config", manager.load_config, params, repeat=200))
+    return results
+
+
+@case("policy")
+def bench_policy(workdir: Path, quick: bool) -> List[Result]:
+    """Compiling rule sets and deciding against them, checked against a naive evaluator.
+
+    Decisions and next-change times at random moments of a week must match
+    evaluating every rule at every minute (mismatches go to ``violations``).
+    """
+    import random
+    from datetime import datetime, timedelta
+    from ..services.hosts_manager import expand_site_list
+    from ..services.policy import MINUTES_PER_WEEK, Policy
+
+    rng = random.Random(3)
+    monday = datetime(2024, 1, 1)
+
+    def make_rules(count: int) -> List[dict]:
+        rules = []
+        for i in range(count):
+            windows = []
+            for _ in range(rng.randint(0, 2)):
+                start, end = rng.randrange(0, 1440, 15), rng.randrange(0, 1441, 15)
+                windows.append({"days": rng.choice(["mon-fri", "daily", "weekends", ["tue", "sat"]]),
+                                "start": f"{start // 60:02d}:{start % 60:02d}",
+                                "end": f"{end // 60:02d}:{end % 60:02d}"})
+            rules.append({"apps": [f"app{i}"], "sites": site_names(5, seed=i),
+                          "until": rng.choice(["goal", "never", 10, 30]), "windows": windows})
+        return rules
+
+    results, violations = [], []
+    for count in ((10, 100) if quick else (10, 100, 1_000)):
+        config = {"rules": make_rules(count)}
+        params = {"rules": count}
+        results.append(measure("policy_compile", lambda: Policy.from_config(config), params,
+                               repeat=5 if count >= 1_000 else 20))
+        policy = Policy.from_config(config)
+        start = monday.timestamp()
+
+        def cycles(ops: int) -> None:
+            # Cycles ten seconds apart through the week, with the workout counter creeping up.
+            for i in range(ops):
+                policy.decide(start + i * 10 % (MINUTES_PER_WEEK * 60), False, i // 2_000 % 40)
+
+        results.append(throughput("policy_decide", cycles, 100_000, params))
+
+        if count > 100:
+            continue  # the naive evaluator below is too slow for the largest rule set
+        rules = policy.rules
+
+        def open_at(minute: int) -> tuple:
+            return tuple(i for i, rule in enumerate(rules)
+                         if not rule.windows or any(s <= minute < e for s, e in rule.windows))
+
+        for _ in range(50 if quick else 200):
+            minute = rng.randrange(MINUTES_PER_WEEK)
+            now = (monday + timedelta(minutes=minute, seconds=rng.randrange(60))).timestamp()
+            goal, minutes = rng.random() < 0.5, rng.choice([0, 10, 20, 30, 40])
+            blocking = [rules[i] for i in open_at(minute) if rules[i].blocks(goal, minutes)]
+            decision = policy.decide(now, goal, minutes)
+            if (decision.apps != frozenset(app for rule in blocking for app in rule.apps)
+                    or decision.sites != frozenset(expand_site_list(
+                        site for rule in blocking for site in rule.sites))):
+                violations.append(f"{count} rules: wrong decision at minute {minute}")
+            current, ahead = open_at(minute), 1
+            while ahead <= MINUTES_PER_WEEK and open_at((minute + ahead) % MINUTES_PER_WEEK) == current:
+                ahead += 1
+            expected = None if ahead > MINUTES_PER_WEEK else \
+                (monday + timedelta(minutes=minute + ahead)).timestamp()
+            if policy.next_change(now) != expected:
+                violations.append(f"{count} rules: wrong next change at minute {minute}")
+    results[-1].extra = {"violations": violations[:5]}
+    return results
+
+
+@case("domain_set")
+def bench_domain_set(workdir: Path, quick: bool) -> List[Result]:
+    """Build, query and emit blocklists of 100k and 1M domains."""
+    from ..services.domain_set import DomainSet
+    from ..services.hosts_manager import BLOCK_IPS
+
+    results = []
+    for domains in ((100_000,) if quick else (100_000, 1_000_000)):
+        path = workdir / f"blocklist-{domains}.txt"
+        make_blocklist(path, domains)
+        params = {"domains": domains}
+        rss_before = peak_rss_kb()
+        built = []
+        result = measure("domain_set_build", lambda: built.append(DomainSet.from_files([path])),
+                         params, repeat=3, warmup=0)
+        domain_set = built[-1]
+        built.clear()
+        result.peak_rss_kb = peak_rss_kb()
+        result.extra.update(entries=len(domain_set), nbytes=domain_set.nbytes,
+                            bytes_per_entry=round(domain_set.nbytes / len(domain_set), 1),
+                            rss_growth_kb=result.peak_rss_kb - rss_before)
+        results.append(result)
+
+        names = site_names(domains)[::max(1, domains // 1000)]
+        probes = [f"www.{name}" if i % 2 else name for i, name in enumerate(names)]
+        probes += [f"miss{i}.example" for i in range(len(probes))]
+
+        def lookup(ops: int) -> None:
+            for i in range(ops):
+                probes[i % len(probes)] in domain_set
+
+        results.append(throughput("domain_set_lookup", lookup, 20_000, params))
+
+        def emit() -> None:
+            for _ in domain_set.iter_hosts_lines(BLOCK_IPS):
+                pass
+
+        results.append(measure("domain_set_emit_hosts", emit, params, repeat=3))
+    return results
+
+
+@case("dns_stub")
+def bench_dns_stub(workdir: Path, quick: bool) -> List[Result]:
+    """Queries per second through the DNS stub: blocked, cached and forwarded names."""
+    import socket
+    from ..services.dns_stub import DnsStub
+    from ..services.domain_set import DomainSet
+
+    logger = quiet_logger(workdir)
+    sites = site_names(2_000, seed=3)
+    window = 64
+    ops = 5_000 if quick else 20_000
+    results = []
+    with FakeResolver() as upstream:
+        stub = DnsStub(logger, port=0, upstream=upstream.address)
+        stub.start()
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Longer than the upstream timeout: a datagram lost upstream comes back as SERVFAIL.
+        client.settimeout(stub.upstream_timeout * 2)
+        client.connect(("127.0.0.1", stub.port))
+        try:
+            stub.block_websites(sites)
+            stub.set_blocklist(DomainSet.from_domains(site_names(100_000, seed=4)))
+            cached = [make_dns_query(f"cached{i}.example", qid=i) for i in range(100)]
+            for query in cached:
+                client.send(query)
+                client.recv(512)
+            fresh = iter(range(10 ** 9))
+
+            def run(make_query: Callable[[int], bytes]) -> Callable[[int], None]:
+                def burst(count: int) -> None:
+                    sent = 0
+                    while sent < count:
+                        batch = min(window, count - sent)
+                        for i in range(batch):
+                            client.send(make_query(sent + i))
+                        for _ in range(batch):
+                            client.recv(512)
+                        sent += batch
+                return burst
+
+            blocked = [make_dns_query(f"www.{site}", qid=i) for i, site in enumerate(sites)]
+            params = {"window": window}
+            results.append(throughput("dns_blocked", run(lambda i: blocked[i % len(blocked)]),
+                                      ops, params))
+            results.append(throughput("dns_cached", run(lambda i: cached[i % len(cached)]),
+                                      ops, params))
+            results.append(throughput(
+                "dns_forwarded", run(lambda i: make_dns_query(f"n{next(fresh)}.example", qid=i & 0xFFFF)),
+                ops, params))
+            results[-1].extra.update(upstream_queries=upstream.queries)
+
+            def toggle(count: int) -> None:
+                for _ in range(count):
+                    stub.unblock_websites(sites[:1])
+                    stub.block_websites(sites[:1])
+
+            results.append(throughput("dns_toggle_site", toggle, 10_000))
+        finally:
+            client.close()
+            stub.stop()
+    return results
+
+
+@case("logger")
+def bench_logger(workdir: Path, quick: bool) -> List[Result]:
+    """Queue-backed logging throughput, including the final flush."""
+    ops = 20_000 if quick else 100_000
+    results = []
+    for fmt in ("text", "json"):
+        logger = Logger(workdir / f"throughput-{fmt}.log", fmt=fmt, echo=False)
+
+        def log_many(count: int) -> None:
+            for i in range(count):
+                logger.info("cycle %d: no blocked apps were running", i)
+            logger.flush(timeout=60)
+
+        results.append(throughput("logger_info", log_many, ops, {"format": fmt}))
+        filtered = Logger(workdir / f"filtered-{fmt}.log", level="WARNING", fmt=fmt, echo=False)
+        results.append(throughput(
+            "logger_filtered_debug",
+            lambda count: [filtered.debug("skipped %d", i) for i in range(count)],
+            ops, {"format": fmt},
+        ))
+    return results
+
+
+@case("firebase")
+def bench_firebase(workdir: Path, quick: bool) -> List[Result]:
+    """Client reads against the stub, and stream change-propagation latency."""
+    from ..services.firebase_stream import FirebaseStream
+    from ..services.http_client import FirebaseClient
+    from ..config.constants import WATCHED_KEYS
+
+    results = []
+    with FirebaseStub(GOAL_DB, latency=BENCH_LATENCY) as stub:
+        params = {"latency_ms": int(BENCH_LATENCY * 1000)}
+        client = FirebaseClient(stub.url)
+        counter = iter(range(1_000_000))
+
+        results.append(measure("firebase_get_unchanged", lambda: client.get_keys(WATCHED_KEYS),
+                               params, repeat=10 if quick else 50))
+        results.append(measure(
+            "firebase_get_changed", lambda: client.get_keys(WATCHED_KEYS), params,
+            repeat=10 if quick else 50,
+            setup=lambda: stub.update({"workoutMinutesToday": next(counter)}),
+        ))
+        results[-1].extra = dict(client.stats())
+
+        stream = FirebaseStream(quiet_logger(workdir), FirebaseClient(stub.url))
+        stream.start()
+        deadline = time.monotonic() + 5
+        while not stream.connected and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stream.wait_for_change(0)
+
+        def push_and_wait() -> None:
+            stub.update({"workoutMinutesToday": next(counter)})
+            if not stream.wait_for_change(5):
+                raise RuntimeError("stream did not deliver the change")
+
+        try:
+            results.append(measure("firebase_stream_propagation", push_and_wait, params,
+                                   repeat=10 if quick else 50))
+        finally:
+            stream.stop()
+    return results
+
+
+@case("firebase_outage")
+def bench_firebase_outage(workdir: Path, quick: bool) -> List[Result]:
+    """Goal-status reads while the stub returns 5xx or times out.
+
+    With the circuit breaker open a read should cost microseconds and serve
+    the cached status; ``attempts`` counts requests that reached the stub.
+    """
+    from ..services.firebase_service import FirebaseService
+    from ..services.http_client import FirebaseClient
+    from ..services.resilience import CircuitBreaker, LastKnownStatus, ResilientGoalStatus
+    from ..config.constants import WATCHED_KEYS
+
+    logger = quiet_logger(workdir)
+    expected = {key: GOAL_DB[key] for key in WATCHED_KEYS}
+    results = []
+    with FirebaseStub(GOAL_DB, latency=0.005) as stub:
+        client = FirebaseClient(stub.url, timeout=(0.5, 0.1))
+        goal_status = ResilientGoalStatus(
+            logger, FirebaseService(logger, client),
+            cache=LastKnownStatus(workdir / "last_goal_status.json"),
+            breaker=CircuitBreaker(failure_threshold=2, base_delay=0.05, max_delay=0.5),
+        )
+
+        def read() -> None:
+            if goal_status.get_goal_status() != expected:
+                raise RuntimeError(f"expected cached status, got {goal_status.source}")
+            time.sleep(0.005)  # a (much shortened) poll interval
+
+        results.append(measure("goal_status_healthy", read, repeat=20))
+        for mode in ("http_503", "timeout", "flapping"):
+            before = sum(stub.requests.values())
+            stub.fail_status = 503 if mode in ("http_503", "flapping") else 0
+            stub.latency = 0.3 if mode == "timeout" else 0.005
+            cycles = 40 if quick else 200
+
+            def flap(state={"n": 0}) -> None:
+                state["n"] += 1
+                if mode == "flapping" and state["n"] % 10 == 0:
+                    stub.fail_status = 0 if stub.fail_status else 503
+
+            result = measure(f"goal_status_{mode}", read, repeat=cycles, warmup=0, setup=flap)
+            result.extra = {"cycles": cycles, "attempts": sum(stub.requests.values()) - before,
+                            "breaker": goal_status.breaker.state}
+            results.append(result)
+            stub.fail_status, stub.latency = 0, 0.005
+            goal_status.breaker.record_success()
+    return results
+
+
+@case("write_queue")
+def bench_write_queue(workdir: Path, quick: bool) -> List[Result]:
+    """Midnight resets for many profiles: queued writes against one PATCH per flush.
+
+    Also checks the reset's contract: only ``goalReachedToday`` changes and
+    the other keys survive (reported under ``violations``).
+    """
+    from ..services.http_client import FirebaseClient
+    from ..services.write_queue import FirebaseWriteQueue
+
+    logger = quiet_logger(workdir)
+    count = 1_000
+    results = []
+    with FirebaseStub({"users": {}}, latency=BENCH_LATENCY) as stub:
+        client = FirebaseClient(stub.url)
+        queue = FirebaseWriteQueue(logger, client, workdir / "pending-writes.json")
+
+        def populate() -> None:
+            stub.replace({"users": {f"p{i}": dict(GOAL_DB, goalReachedToday=True)
+                                    for i in range(count)}})
+
+        def reset_all() -> None:
+            for i in range(count):
+                queue.set(f"users/p{i}/goalReachedToday", False)
+            queue.flush()
+
+        patches = stub.requests.get("PATCH", 0)
+        result = measure("write_queue_reset", reset_all, {"profiles": count,
+                         "latency_ms": int(BENCH_LATENCY * 1000)},
+                         repeat=3 if quick else 10, setup=populate)
+        with stub.lock:
+            users = stub.lookup("users")
+        violations = [f"p{i} not reset as expected" for i in range(count)
+                      if users[f"p{i}"] != dict(GOAL_DB, goalReachedToday=False)][:5]
+        result.extra = {"requests_per_flush": round((stub.requests.get("PATCH", 0) - patches)
+                                                    / (result.samples + 1), 1),
+                        "violations": violations}
+        results.append(result)
+
+        results.append(throughput("write_queue_set",
+                                  lambda ops: [queue.set(f"users/p{i % count}/lastSyncedAt", i)
+                                               for i in range(ops)], 100_000))
+        queue.flush()
+        client.close()
+    return results
+
+
+@case("config_sync")
+def bench_config_sync(workdir: Path, quick: bool) -> List[Result]:
+    """Block config shared by many devices: one edit's push and pull against the full document.
+
+    Every device then edits at once (each adds its own site and removes one
+    seeded site); afterwards all of them must hold the same lists with
+    every edit applied (reported under ``violations``).
+    """
+    import threading
+    from ..services.config_manager import ConfigManager
+    from ..services.config_sync import ConfigSync
+    from ..services.http_client import FirebaseClient
+    from ..utils.exceptions import ConfigSyncError
+
+    logger = quiet_logger(workdir)
+    sites = site_names(5_000, seed=11)
+    count = 8 if quick else 32
+    results = []
+    with FirebaseStub(latency=BENCH_LATENCY) as stub:
+        devices = []
+        for i in range(count):
+            path = workdir / f"sync-{i}" / "blocked_config.json"
+            path.parent.mkdir()
+            path.write_text(json.dumps({"apps": list(APP_NAMES) if i == 0 else [],
+                                        "sites": sites if i == 0 else []}))
+            manager = ConfigManager(path, logger)
+            devices.append((manager, ConfigSync(logger, manager, FirebaseClient(stub.url),
+                                                state_path=path.parent / "sync.json")))
+        for _, sync in devices:
+            sync.sync()
+
+        editor, reader = devices[0], devices[1]
+        edits = {"n": 0}
+
+        def edit() -> None:
+            manager = editor[0]
+            snapshot = manager.snapshot()
+            edits["n"] += 1
+            manager.update_config(list(snapshot.apps), list(snapshot.sites[1:]) + [f"edit{edits['n']}.com"])
+
+        def edit_and_push() -> None:
+            edit()
+            editor[1].sync()
+
+        params = {"sites": len(sites), "latency_ms": int(BENCH_LATENCY * 1000)}
+        result = measure("config_sync_push", editor[1].sync, params,
+                         repeat=5 if quick else 20, setup=edit)
+        with stub.lock:
+            entry = stub.lookup(f"configSync/log/{editor[1].version:010d}")
+        document = {"apps": list(editor[0].snapshot().apps), "sites": list(editor[0].snapshot().sites)}
+        result.extra = {"delta_bytes": len(json.dumps(entry)), "document_bytes": len(json.dumps(document))}
+        results.append(result)
+        results.append(measure("config_sync_pull", reader[1].sync, params,
+                               repeat=5 if quick else 20, setup=edit_and_push))
+        gets = stub.requests.get("GET", 0)
+        result = measure("config_sync_idle", reader[1].sync, params, repeat=5 if quick else 20)
+        result.extra = {"requests_per_sync": round((stub.requests.get("GET", 0) - gets)
+                                                   / (result.samples + 1), 1)}
+        results.append(result)
+
+        removed = set(editor[0].snapshot().sites[:count])
+        conflicts = {"n": 0}
+
+        def device_edit(i: int) -> None:
+            manager, sync = devices[i]
+            snapshot = manager.snapshot()
+            manager.update_config(list(snapshot.apps), [site for site in snapshot.sites
+                                                        if site != sorted(removed)[i]] + [f"dev{i}.com"])
+            while True:
+                try:
+                    sync.sync()
+                    return
+                except ConfigSyncError:
+                    conflicts["n"] += 1
+
+        def concurrent_round() -> None:
+            threads = [threading.Thread(target=device_edit, args=(i,)) for i in range(count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            for _, sync in devices:
+                sync.sync()
+
+        result = measure("config_sync_concurrent", concurrent_round, {"devices": count, **params},
+                         repeat=1, warmup=0)
+        lists = [(frozenset(manager.snapshot().apps), frozenset(manager.snapshot().sites))
+                 for manager, _ in devices]
+        violations = []
+        if len(set(lists)) != 1:
+            violations.append(f"{len(set(lists))} different configs across {count} devices")
+        missing = {f"dev{i}.com" for i in range(count)} - lists[0][1]
+        if missing or removed & lists[0][1]:
+            violations.append(f"edits lost: {len(missing)} additions, {len(removed & lists[0][1])} removals")
+        result.extra = {"versions": devices[0][1].version, "exhausted_retries": conflicts["n"],
+                        "violations": violations}
+        results.append(result)
+    return results
+
+
+@case("notifications")
+def bench_notifications(workdir: Path, quick: bool) -> List[Result]:
+    """Cost of notify() with a slow backend, and a burst of kills coalescing into one toast.
+
+    The burst must produce exactly one notification naming every app
+    (reported under ``violations``).
+    """
+    from ..services.notifications import NotificationDispatcher, NullBackend
+
+    class SlowBackend(NullBackend):
+        def send(self, notification) -> None:
+            time.sleep(0.05)  # roughly what spawning osascript costs
+            super().send(notification)
+
+    logger = quiet_logger(workdir)
+    results = []
+    dispatcher = NotificationDispatcher(logger, backend=SlowBackend(), window=0.01, min_interval=0)
+    results.append(throughput("notify_call",
+                              lambda ops: [dispatcher.notify("Blocked", "App closed", key="bench",
+                                                             item=APP_NAMES[i % len(APP_NAMES)])
+                                           for i in range(ops)], 10_000 if quick else 100_000))
+    dispatcher.stop()
+
+    burst = 50
+    backend = NullBackend()
+    dispatcher = NotificationDispatcher(logger, backend=backend, window=0.2)
+    state = {"sent": 0}
+
+    def kill_burst() -> None:
+        for i in range(burst):
+            dispatcher.notify("Blocked", "App closed", key="burst", item=APP_NAMES[i % len(APP_NAMES)])
+
+    def settle() -> None:
+        deadline = time.monotonic() + 2
+        while dispatcher.next_due() is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.3)
+        state["sent"] = len(backend.sent)
+
+    result = measure("notify_burst", kill_burst, {"events": burst}, repeat=1, warmup=0)
+    settle()
+    dispatcher.stop()
+    violations = []
+    if state["sent"] != 1:
+        violations.append(f"{burst} kills produced {state['sent']} notifications, expected 1")
+    elif not all(app in backend.sent[0].subtitle for app in set(APP_NAMES[:burst])):
+        violations.append("coalesced notification does not name every app")
+    result.extra = {"notifications": state["sent"], "violations": violations}
+    results.append(result)
+    return results
+
+
+@case("scheduler")
+def bench_scheduler(workdir: Path, quick: bool) -> List[Result]:
+    """Simulated day on a fake clock: wakeups and midnight resets versus a fixed tick.
+
+    The goal flips a few times a day; a suspend in the evening jumps the
+    wall clock past midnight, which must still fire exactly one reset.
+    """
+    from ..services.scheduler import AdaptiveInterval, FakeClock, Scheduler, next_midnight
+    from ..config.constants import POLL_INTERVAL, POLL_INTERVAL_MAX, SWEEP_INTERVAL_MAX
+
+    day = 24 * 60 * 60
+    changes = {7 * 3600, 7 * 3600 + 1800, 12 * 3600, 18 * 3600}
+
+    def simulate() -> Dict[str, int]:
+        start = next_midnight(1_700_000_000.0) + 60
+        clock = FakeClock(wall=start)
+        scheduler = Scheduler(clock)
+        fetch = AdaptiveInterval(POLL_INTERVAL, POLL_INTERVAL_MAX)
+        sweep = AdaptiveInterval(POLL_INTERVAL, SWEEP_INTERVAL_MAX)
+        for job in ("fetch", "enforce"):
+            scheduler.schedule(job, 0)
+        scheduler.schedule_at("reset", next_midnight(clock.time()))
+        counts = {"wakeups": 0, "resets": 0}
+        state, suspended = 0, False
+        while clock.monotonic() < day:
+            clock.advance(scheduler.time_until_next())
+            if not suspended and clock.monotonic() >= 22 * 3600:
+                clock.jump_wall(3 * 3600)  # lid closed for three hours
+                suspended = True
+            counts["wakeups"] += 1
+            elapsed = int(clock.monotonic())
+            changed = any(state < t <= elapsed for t in changes)
+            state = elapsed
+            for job in scheduler.pop_due():
+                if job == "reset":
+                    counts["resets"] += 1
+                    scheduler.schedule_at("reset", next_midnight(clock.time()))
+                elif job == "fetch":
+                    scheduler.schedule("fetch", fetch.reset() if changed else fetch.backoff())
+                else:
+                    scheduler.schedule("enforce", sweep.reset() if changed else sweep.backoff())
+        return counts
+
+    result = measure("scheduler_simulated_day", simulate, repeat=3 if quick else 10)
+    counts = simulate()
+    if counts["resets"] != 1:
+        raise RuntimeError(f"expected one midnight reset, got {counts['resets']}")
+    fixed_tick = 2 * day // POLL_INTERVAL  # fetch and enforce loops each woke every tick
+    result.extra = dict(counts, fixed_tick_wakeups=fixed_tick)
+    return [result]
+
+
+@case("tracing")
+def bench_tracing(workdir: Path, quick: bool) -> List[Result]:
+    """Cost of a traced call with tracing off and on, against an undecorated call."""
+    from ..utils.tracing import Tracer, TRACER, traced
+
+    def plain() -> None:
+        pass
+
+    wrapped = traced("bench")(plain)
+    ops = 200_000 if quick else 1_000_000
+
+    def calls(fn: Callable[[], None]) -> Callable[[int], None]:
+        def run(count: int) -> None:
+            for _ in range(count):
+                fn()
+        return run
+
+    results = [throughput("trace_call_plain", calls(plain), ops)]
+    results.append(throughput("trace_call_disabled", calls(wrapped), ops))
+    TRACER.start()
+    try:
+        results.append(throughput("trace_call_enabled", calls(wrapped), ops))
+    finally:
+        TRACER.stop()
+
+    tracer = Tracer()
+    tracer.start()
+    for i in range(100_000):
+        tracer.record("span", i * 1000, i * 1000 + 500, {"i": i} if i % 10 == 0 else None)
+    results.append(measure("trace_export", lambda: tracer.export(workdir / "trace.json"),
+                           {"spans": 100_000}, repeat=3 if quick else 10))
+    return results
+
+
+@case("history")
+def bench_history(workdir: Path, quick: bool) -> List[Result]:
+    """Workout history: appending 10-second samples and rolling up a year of them.
+
+    Each simulated day has one workout of ``day % 61`` minutes starting at
+    18:00, sampled every 10 seconds around the clock. Rollups must match
+    the simulated totals (reported under ``violations``).
+    """
+    from datetime import date, datetime, timedelta, timezone
+    from ..services.timeseries import TimeSeriesStore
+
+    logger = quiet_logger(workdir)
+    days = 30 if quick else 365
+    step = 10
+    start_day = date(2025, 1, 1)
+    origin = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+
+    def minutes_at(offset: int) -> float:
+        length = (offset // 86_400) % 61
+        return float(min(length, max(0, (offset % 86_400 - 18 * 3600) // 60)))
+
+    store = TimeSeriesStore(logger, workdir / "history", tz=timezone.utc)
+
+    def build() -> None:
+        for offset in range(0, days * 86_400, step):
+            store.append(origin + offset, minutes_at(offset))
+
+    result = measure("history_build", build, {"days": days, "interval_s": step},
+                     repeat=1, warmup=0)
+    samples = days * 86_400 // step
+    on_disk = sum(path.stat().st_size for path in (workdir / "history").iterdir())
+    result.extra = {"samples": samples, "bytes_on_disk": on_disk,
+                    "us_per_sample": round(result.p50_ms * 1000 / samples, 2)}
+    results = [result]
+
+    end_day = start_day + timedelta(days=days - 1)
+    expected = sum(float(day % 61) for day in range(days))
+    violations = []
+    total, active = store.total(start_day, end_day)
+    if abs(total - expected) > 1e-6 or active != sum(1 for day in range(days) if day % 61):
+        violations.append(f"range total {total}/{active} != {expected}")
+    for unit in ("day", "week", "month"):
+        buckets = store.rollup(unit, start_day, end_day)
+        if abs(sum(bucket["minutes"] for bucket in buckets) - expected) > 0.01 * len(buckets):
+            violations.append(f"{unit} buckets do not add up to {expected}")
+        results.append(measure(f"history_rollup_{unit}", lambda unit=unit: store.rollup(unit, start_day, end_day),
+                               {"days": days, "buckets": len(buckets)}, repeat=20 if quick else 100))
+    results[-1].extra = {"violations": violations}
+
+    for label, span in (("month", 30), ("all", days)):
+        results.append(measure(f"history_total_{label}",
+                               lambda span=span: store.total(end_day - timedelta(days=span - 1), end_day),
+                               {"days": span}, repeat=100 if quick else 1_000))
+    results.append(measure("history_day_samples", lambda: store.samples(end_day, 288),
+                           {"samples": 86_400 // step, "points": 288}, repeat=10 if quick else 50))
+
+    clock = [origin + days * 86_400]
+
+    def append(ops: int) -> None:
+        for _ in range(ops):
+            clock[0] += step
+            store.append(clock[0], 30.0)
+
+    results.append(throughput("history_append", append, 50_000 if quick else 200_000))
+    store.close()
+    return results
+
+
+@case("replay")
+def bench_replay(workdir: Path, quick: bool) -> List[Result]:
+    """Replay a synthetic week against the poller on a fake clock.
+
+    Reports enforcement latency, CPU per simulated hour and write counts
+    for polling only and with the stream and exec watcher. A write that
+    left a file unchanged, or a violation still open at the end, is
+    reported under ``violations``.
+    """
+    from .replay import Replayer, synthetic_timeline
+
+    days = 2 if quick else 7
+    timeline = synthetic_timeline(days)
+    results = []
+    for push in (False, True):
+        mode = "push" if push else "poll"
+        reports = []
+        rundir = workdir / f"replay-{mode}"
+
+        def run() -> None:
+            shutil.rmtree(rundir, ignore_errors=True)
+            rundir.mkdir()
+            reports.append(Replayer(timeline, rundir, push).run())
+
+        result = measure(f"replay_{mode}", run, {"days": days, "events": len(timeline.events)},
+                         repeat=1, warmup=0)
+        report = reports[-1]
+        violations = [f"{count} unchanged rewrite(s) of {name}"
+                      for name, count in report.redundant_writes.items()]
+        if report.unresolved:
+            violations.append("enforcement still wrong when the timeline ended")
+        result.extra = dict(report.to_dict(), violations=violations)
+        results.append(result)
+    return results
+
+
+@contextmanager
+def bench_poller(workdir: Path, base_url: str, proc_root: str) -> Iterator["object"]:
+    """Build a FirebasePoller whose files, hosts, /proc and Firebase are all local."""
+    from .. import firebase_poller
+    from ..services.http_client import FirebaseClient
+    from ..services.notifications import NullBackend
+    from ..services.process_scanner import ProcessScanner, iter_proc, proc_exe
+    from ..services.resilience import LastKnownStatus
+    from ..services.timeseries import TimeSeriesStore
+
+    paths = {
+        "HEARTBEAT_FILE": workdir / "heartbeat.json",
+        "LOG_FILE": workdir / "bench.log",
+        "CURRENT_WORKOUT_PATH": workdir / "current_workout.json",
+        "GOAL_STATUS_PATH": workdir / "goal_status.json",
+        "BLOCKED_CONFIG_PATH": workdir / "poller-config.json",
+    }
+    quiet_logger(workdir)  # the poller's Logger shares this non-echoing writer
+    with mock.patch.multiple(firebase_poller, STREAM_ENABLED=False, **paths):
+        poller = firebase_poller.FirebasePoller()
+        poller.firebase_client = FirebaseClient(base_url)
+        poller.firebase_service.client = poller.firebase_client
+        poller.write_queue.client = poller.firebase_client
+        poller.write_queue.path = workdir / "pending-writes.json"
+        poller.hosts_manager.hosts_path = str(workdir / "poller-hosts")
+        poller.process_manager.exec_watcher = None
+        poller.process_manager.notifier.backend = NullBackend()
+        poller.process_manager.scanner = ProcessScanner(
+            source=lambda: iter_proc(proc_root),
+            exe_resolver=lambda pid: proc_exe(pid, proc_root),
+        )
+        poller.goal_status.cache = LastKnownStatus(workdir / "goal-cache.json")
+        poller.history = poller.status_server.history = TimeSeriesStore(
+            poller.logger, workdir / "history", poller.reset_tz)
+        try:
+            yield poller
+        finally:
+            poller.history.close()
+            poller.firebase_client.close()
+
+
+@case("poller_cycle")
+def bench_poller_cycle(workdir: Path, quick: bool) -> List[Result]:
+    """Full fetch/prepare/enforce cycles against the stub, steady and toggling."""
+    sites = 500 if quick else 2_000
+    make_config(workdir / "poller-config.json", sites)
+    make_hosts_file(workdir / "poller-hosts", 10_000)
+    proc_root = workdir / "poller-proc"
+    make_proc_tree(proc_root, 1_000)
+
+    results = []
+    with FirebaseStub(GOAL_DB, latency=BENCH_LATENCY) as stub:
+        with bench_poller(workdir, stub.url, str(proc_root)) as poller:
+            def cycle() -> None:
+                desired = poller.prepare_cycle(poller.fetch_cycle())
+                if desired is not None:
+                    poller.enforce_sites(desired)
+                    poller.enforce_apps(desired)
+
+            params = {"sites": sites, "hosts_lines": 10_000, "processes": 1_000,
+                      "latency_ms": int(BENCH_LATENCY * 1000)}
+            results.append(measure("poller_cycle_steady", cycle, params, repeat=10 if quick else 50))
+            results[-1].extra = {"requests": stub.requests.get("GET", 0)}
+
+            flip = {"goal": False}
+
+            def toggle() -> None:
+                flip["goal"] = not flip["goal"]
+                stub.update({"goalReachedToday": flip["goal"]})
+
+            results.append(measure("poller_cycle_toggle", cycle, params,
+                                   repeat=10 if quick else 40, setup=toggle))
+    return results
+
+
+@case("hosts_guard")
+def bench_hosts_guard(workdir: Path, quick: bool) -> List[Result]:
+    """Hosts I/O while idle, and how fast the watcher undoes an external edit.
+
+    Steady cycles must not read or write the hosts file, an edit outside
+    the managed block must be left alone, and an edit inside it must be
+    reverted (reported under ``violations``).
+    """
+    import asyncio
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from ..config.constants import HOSTS_GUARD_DEBOUNCE
+    from ..utils.metrics import HOSTS_TAMPER
+
+    sites = 200 if quick else 2_000
+    make_config(workdir / "poller-config.json", sites)
+    hosts_path = workdir / "poller-hosts"
+    make_hosts_file(hosts_path, 10_000)
+    proc_root = workdir / "poller-proc"
+    make_proc_tree(proc_root, 100)
+
+    results, violations = [], []
+    with FirebaseStub(GOAL_DB, latency=0) as stub, \
+            bench_poller(workdir, stub.url, str(proc_root)) as poller:
+        desired = poller.prepare_cycle(poller.fetch_cycle())
+        poller.enforce_sites(desired)
+        poller._last_desired = desired
+        manager = poller.hosts_manager
+        applied = hosts_path.read_text()
+
+        reads = {"count": 0}
+        read = manager._read
+
+        def counting_read():
+            reads["count"] += 1
+            return read()
+
+        manager._read = counting_read
+        for _ in range(20):
+            poller.enforce_sites(poller.prepare_cycle(poller.fetch_cycle()))
+        steady_reads = reads["count"]
+        if steady_reads:
+            violations.append(f"{steady_reads} hosts reads in 20 unchanged cycles")
+        results.append(measure("hosts_verify", manager.verify, {"sites": sites, "hosts_lines": 10_000},
+                               repeat=20 if quick else 100))
+
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        poller._loop = loop
+        poller._events = {"enforce": asyncio.Event()}
+        poller._executors = {"hosts": ThreadPoolExecutor(1, thread_name_prefix="poller-hosts")}
+        poller._start_config_watcher()
+        try:
+            def settle(timeout: float) -> None:
+                deadline = time.perf_counter() + timeout
+                while hosts_path.read_text() != applied and time.perf_counter() < deadline:
+                    time.sleep(0.01)
+
+            def tamper() -> None:
+                text = hosts_path.read_text()
+                tmp = workdir / "poller-hosts.edit"
+                tmp.write_text(text.replace(text[text.index("\n", text.index("# >>> nopainnogame")) + 1:
+                                                 text.index("# <<< nopainnogame")], ""))
+                os.replace(tmp, hosts_path)
+
+            tampers = HOSTS_TAMPER.value()
+            result = measure("hosts_tamper_restore", lambda: settle(HOSTS_GUARD_DEBOUNCE + 5),
+                             {"sites": sites, "debounce_s": HOSTS_GUARD_DEBOUNCE},
+                             repeat=2 if quick else 5, warmup=0, setup=tamper)
+            if hosts_path.read_text() != applied:
+                violations.append("managed block was not restored")
+            time.sleep(HOSTS_GUARD_DEBOUNCE + 0.5)
+            restored = HOSTS_TAMPER.value() - tampers
+            if restored != result.samples:
+                violations.append(f"{result.samples} edits but {restored:g} re-applies")
+
+            with open(hosts_path, "a") as f:
+                f.write("10.0.0.1 intranet.example\n")
+            time.sleep(HOSTS_GUARD_DEBOUNCE + 0.5)
+            if HOSTS_TAMPER.value() - tampers != restored or "intranet.example" not in hosts_path.read_text():
+                violations.append("an edit outside the managed block was reverted")
+        finally:
+            poller._observer.stop()
+            poller._observer.join()
+            poller._executors["hosts"].shutdown(wait=True)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+        result.extra = {"steady_reads": steady_reads, "violations": violations}
+        results.append(result)
+    return results
+
+
+@case("profiles")
+def bench_profiles(workdir: Path, quick: bool) -> List[Result]:
+    """Multi-profile rounds against the stub at growing profile counts.
+
+    Memory is what tracemalloc sees allocated while building the poller;
+    dividing by the profile count shows how much of it is shared. CPU per
+    round includes the in-process stub serving the requests.
+    """
+    import asyncio
+    import tracemalloc
+    from .. import multi_poller
+    from ..config.constants import PROFILE_WORKERS
+    from ..services.http_client import FirebaseClient
+    from ..services.notifications import NullBackend
+    from ..services.process_scanner import ProcessScanner, iter_proc, proc_exe
+
+    make_config(workdir / "profiles-config.json", 50)
+    proc_root = workdir / "profiles-proc"
+    make_proc_tree(proc_root, 1_000)
+    quiet_logger(workdir)
+
+    results = []
+    for count in (10, 1_000) if quick else (10, 100, 1_000):
+        base = workdir / f"profiles-{count}"
+        base.mkdir()
+        entries = []
+        for i in range(count):
+            make_hosts_file(base / f"hosts-{i}", 20, seed=i)
+            entries.append({"name": f"p{i}", "firebase_path": f"users/p{i}",
+                            "config": "../profiles-config.json", "hosts": str(base / f"hosts-{i}")})
+        (base / "profiles.json").write_text(json.dumps({"profiles": entries}))
+        db = {"users": {f"p{i}": dict(GOAL_DB) for i in range(count)}}
+
+        with FirebaseStub(db, latency=BENCH_LATENCY) as stub, \
+                mock.patch.multiple(multi_poller, LOG_FILE=workdir / "bench.log",
+                                    HEARTBEAT_FILE=base / "heartbeat.json"):
+            tracemalloc.start()
+            poller = multi_poller.MultiProfilePoller(
+                base / "profiles.json", FirebaseClient(stub.url, pool_size=PROFILE_WORKERS))
+            built = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            poller.process_manager.exec_watcher = None
+            poller.process_manager.notifier.backend = NullBackend()
+            poller.process_manager.scanner = ProcessScanner(
+                source=lambda: iter_proc(str(proc_root)),
+                exe_resolver=lambda pid: proc_exe(pid, str(proc_root)),
+            )
+            loop = asyncio.new_event_loop()
+            try:
+                def poll() -> None:
+                    loop.run_until_complete(poller.poll_once())
+
+                params = {"profiles": count, "latency_ms": int(BENCH_LATENCY * 1000)}
+                repeat = 20 if count <= 10 else 5 if count <= 100 else 3
+                for name, setup in (("profiles_round_steady", None), ("profiles_round_toggle", "toggle")):
+                    flip = {"goal": False}
+
+                    def toggle() -> None:
+                        flip["goal"] = not flip["goal"]
+                        for i in range(count):
+                            stub.write(f"users/p{i}", {"goalReachedToday": flip["goal"]}, replace=False)
+
+                    requests = stub.requests.get("GET", 0)
+                    cpu = time.process_time()
+                    result = measure(name, poll, params, repeat=repeat,
+                                     setup=toggle if setup else None)
+                    rounds = result.samples + 1  # plus the warmup round
+                    result.extra = {
+                        "bytes_per_profile": built // count,
+                        "cpu_ms_per_round": round((time.process_time() - cpu) * 1000 / rounds, 2),
+                        "requests_per_round": round((stub.requests.get("GET", 0) - requests) / rounds, 1),
+                    }
+                    results.append(result)
+            finally:
+                loop.close()
+                poller._executor.shutdown(wait=True)
+                poller.firebase_client.close()
+    return results
+
+
+STARTUP_IMPORT_BUDGET_MS = 250
+FIRST_ENFORCEMENT_BUDGET_MS = 2_000
+# Modules the daemon must not import before they are needed.
+LAZY_IMPORTS = ("requests", "psutil", "watchdog")
+
+
+def _import_profile() -> tuple:
+    """Return (cumulative ms for backend.firebase_poller, top-level modules loaded)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import backend.firebase_poller"],
+                          cwd=Path(__file__).resolve().parents[2], capture_output=True, text=True,
+                          check=True)
+    cumulative, loaded = 0.0, set()
+    for line in proc.stderr.splitlines():
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        module = fields[2].strip()
+        loaded.add(module.split(".")[0])
+        if module == "backend.firebase_poller":
+            cumulative = int(fields[1]) / 1000
+    return cumulative, loaded
+
+
+def _first_enforcement(workdir: Path, url: str, proc_root: Path) -> float:
+    """Start the poller in a child process; return ms until the hosts file is enforced."""
+    from ..services.hosts_manager import MANAGED_BEGIN
+
+    hosts = workdir / "startup-hosts"
+    make_hosts_file(hosts, 20)
+    start = time.perf_counter()
+    child = subprocess.Popen([sys.executable, "-m", "backend.benchmarks.startup",
+                              str(workdir), url, str(proc_root)],
+                             cwd=Path(__file__).resolve().parents[2],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while MANAGED_BEGIN not in hosts.read_text():
+            if child.poll() is not None or time.perf_counter() - start > 30:
+                raise RuntimeError("poller exited or never enforced")
+            time.sleep(0.001)
+        return (time.perf_counter() - start) * 1000
+    finally:
+        child.kill()
+        child.wait()
+
+
+@case("startup")
+def bench_startup(workdir: Path, quick: bool) -> List[Result]:
+    """Daemon startup: import cost of the poller and time to first enforcement.
+
+    Both have absolute budgets (see ``check_budgets``). Time to first
+    enforcement is measured cold and with a fresh goal cache, where the
+    poller enforces before its first fetch completes.
+    """
+    from .harness import summarize
+
+    repeat = 3 if quick else 10
+    timings, loaded = [], set()
+    for _ in range(repeat):
+        cumulative, modules = _import_profile()
+        timings.append(cumulative)
+        loaded |= modules
+    result = summarize("startup_import", timings, {"module": "backend.firebase_poller"})
+    eager = sorted(set(LAZY_IMPORTS) & loaded)
+    result.extra = {"budget_ms": STARTUP_IMPORT_BUDGET_MS,
+                    "violations": [f"imports {name} at startup" for name in eager]}
+    results = [result]
+
+    make_config(workdir / "startup-config.json", 50)
+    proc_root = workdir / "startup-proc"
+    make_proc_tree(proc_root, 200)
+    cache = workdir / "goal-cache.json"
+    # The stub's latency stands in for a slow first fetch, which a fresh cache hides.
+    with FirebaseStub(GOAL_DB, latency=0.5) as stub:
+        for name, cached in (("startup_first_enforcement_cold", False),
+                             ("startup_first_enforcement_cached", True)):
+            timings = []
+            for _ in range(repeat):
+                cache.unlink(missing_ok=True)
+                if cached:
+                    cache.write_text(json.dumps({"data": GOAL_DB, "fetched_at": time.time()}))
+                timings.append(_first_enforcement(workdir, stub.url, proc_root))
+            result = summarize(name, timings, {"fetch_latency_ms": 500})
+            result.extra = {"budget_ms": FIRST_ENFORCEMENT_BUDGET_MS}
+            results.append(result)
+    return results
+
+
+def run_case(name: str, workdir: Path, quick: bool) -> List[Result]:
+    """Run one registered case in ``workdir``."""
+    workdir.mkdir(parents=True, exist_ok=True)
+    return CASES[name](workdir, quick)
+
+
+def run_isolated(name: str, quick: bool) -> List[dict]:
+    """Run a case in a fresh interpreter so its peak RSS is measured on its own."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory(prefix=f"npng-bench-{name}-") as tmp:
+        output = Path(tmp) / "results.json"
+        command = [sys.executable, "-m", "backend.benchmarks", "--run-case", name,
+                   "--output", str(output)]
+        if quick:
+            command.append("--quick")
+        subprocess.run(command, check=True, cwd=Path(__file__).resolve().parents[2])
+        return json.loads(output.read_text())
@@ -0,0 +1,462 @@
+import os
+import json
+import time
+import queue
+import random
+import socket
+import struct
+import hashlib
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+APP_NAMES = ("steam", "discord", "league", "minecraft", "roblox", "battle.net", "epicgames")
+
+
+def site_names(count: int, seed: int = 0) -> List[str]:
+    """Return ``count`` distinct synthetic domain names."""
+    rng = random.Random(seed)
+    tlds = ("com", "net", "org", "io", "gg", "tv")
+    return [f"site{i}-{rng.randrange(1 << 20):05x}.{tlds[i % len(tlds)]}" for i in range(count)]
+
+
+def make_hosts_file(path: Path, lines: int, seed: int = 0) -> str:
+    """Write a hosts file of roughly ``lines`` lines and return its content.
+
+    The mix resembles a real machine with an ad-block list installed:
+    comments, blank lines, IPv4/IPv6 entries and multi-alias lines.
+    """
+    rng = random.Random(seed)
+    out = ["127.0.0.1 localhost\n", "::1 localhost ip6-localhost ip6-loopback\n"]
+    names = site_names(lines, seed)
+    for i in range(len(out), lines):
+        roll = rng.random()
+        if roll < 0.05:
+            out.append(f"# section {i}\n")
+        elif roll < 0.08:
+            out.append("\n")
+        elif roll < 0.12:
+            out.append(f"10.0.{i % 256}.{rng.randrange(256)} {names[i]} alias{i}.{names[i]}\n")
+        else:
+            out.append(f"0.0.0.0 {names[i]}\n")
+    content = "".join(out)
+    path.write_text(content)
+    return content
+
+
+def make_blocklist(path: Path, domains: int, seed: int = 0) -> None:
+    """Write a blocklist of ``domains`` names the way public lists mix formats.
+
+    Lines are hosts-format and plain names with comments, a few adblock
+    ``||name^`` wildcards and about 5% duplicates.
+    """
+    rng = random.Random(seed)
+    names = site_names(domains, seed)
+    with open(path, "w") as f:
+        f.write("# Synthetic blocklist\n! adblock-style comment\n")
+        for i, name in enumerate(names):
+            roll = rng.random()
+            if roll < 0.45:
+                f.write(f"0.0.0.0 {name}\n")
+            elif roll < 0.48:
+                f.write(f"||{name}^\n")
+            elif roll < 0.50:
+                f.write(f"# {name}\n")
+            else:
+                f.write(f"{name}\n")
+            if rng.random() < 0.05:
+                f.write(f"127.0.0.1 {names[rng.randrange(i + 1)].upper()}.\n")
+
+
+def make_proc_tree(root: Path, entries: int, blocked: Sequence[str] = (), seed: int = 0) -> None:
+    """Create a fake ``/proc`` with ``entries`` processes under ``root``.
+
+    Each process gets a ``stat`` file in the kernel's format and an ``exe``
+    symlink. Names in ``blocked`` are appended to the table so scans find
+    them; their pids are far above any real pid so nothing is ever killed.
+    """
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    filler = " ".join(["0"] * 18)
+    tail = " ".join(["0"] * 30)
+    names = [f"worker-{i % 97}" if rng.random() < 0.7 else f"daemon{i}" for i in range(entries)]
+    names += list(blocked)
+    for offset, name in enumerate(names):
+        pid = 10_000_000 + offset
+        proc = root / str(pid)
+        proc.mkdir(exist_ok=True)
+        (proc / "stat").write_text(f"{pid} ({name}) S {filler} {1000 + offset} {tail}\n")
+        exe = proc / "exe"
+        if not exe.is_symlink():
+            os.symlink(f"/usr/bin/{name}", exe)
+
+
+def add_proc(root: Path, pid: int, name: str) -> None:
+    """Add one process to a fake ``/proc`` tree."""
+    proc = root / str(pid)
+    proc.mkdir(exist_ok=True)
+    filler = " ".join(["0"] * 18)
+    (proc / "stat").write_text(f"{pid} ({name}) S {filler} {pid} 0\n")
+
+
+def make_config(path: Path, sites: int, apps: int = len(APP_NAMES), seed: int = 0) -> Dict[str, Any]:
+    """Write a block config with ``sites`` sites and return it."""
+    config = {
+        "apps": list(APP_NAMES[:apps]),
+        "sites": site_names(sites, seed + 1),
+        "availableSites": site_names(sites, seed + 2),
+    }
+    path.write_text(json.dumps(config))
+    return config
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: "_StubHTTPServer"
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment; split writes stall on delayed ACKs.
+    wbufsize = 64 * 1024
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        stub = self.server.stub
+        stub.delay()
+        if stub.fail_status:
+            stub.count("failed")
+            self._send(stub.fail_status, b'{"error": "unavailable"}')
+            return
+        if "text/event-stream" in self.headers.get("Accept", ""):
+            self._stream(stub)
+            return
+
+        query = {key: json.loads(values[0])
+                 for key, values in parse_qs(urlsplit(self.path).query).items()}
+        with stub.lock:
+            data = stub.lookup(_db_path(self.path))
+            if query.get("shallow") and isinstance(data, dict):
+                data = {k: (True if isinstance(v, dict) else v) for k, v in data.items()}
+            if query.get("orderBy") == "$key" and isinstance(data, dict):
+                start = query.get("startAt")
+                data = {k: v for k, v in sorted(data.items()) if start is None or k >= start}
+            body = json.dumps(data).encode("utf-8")
+        etag = _etag(body)
+        stub.count("GET")
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send(200, body, etag)
+
+    def do_PUT(self) -> None:
+        self._write(replace=True)
+
+    def do_PATCH(self) -> None:
+        self._write(replace=False)
+
+    def _write(self, replace: bool) -> None:
+        stub = self.server.stub
+        stub.delay()
+        value = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+        if stub.fail_status:
+            stub.count("failed")
+            self._send(stub.fail_status, b'{"error": "unavailable"}')
+            return
+        stub.count(self.command)
+        expected = self.headers.get("if-match")
+        if expected is not None:
+            current = stub.write_if(_db_path(self.path), value, expected)
+            if current is not None:
+                self._send(412, current, _etag(current))
+                return
+        else:
+            stub.write(_db_path(self.path), value, replace)
+        body = json.dumps(value).encode("utf-8")
+        self._send(200, body, _etag(body))
+
+    def _send(self, status: int, body: bytes, etag: Optional[str] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, stub: "FirebaseStub") -> None:
+        events = stub.subscribe()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        stub.count("STREAM")
+        base = _db_path(self.path)
+        try:
+            with stub.lock:
+                first = ("put", "/", stub.lookup(base) if base else dict(stub.db))
+            last_sent = time.monotonic()
+            while first is not None or not stub.stopping.is_set():
+                if first is not None:
+                    item, first = first, None
+                else:
+                    try:
+                        item = events.get(timeout=min(0.2, stub.keepalive or 0.2))
+                    except queue.Empty:
+                        if stub.keepalive and time.monotonic() - last_sent >= stub.keepalive:
+                            self._send_event("keep-alive", "null")
+                            last_sent = time.monotonic()
+                        continue
+                if item is None:
+                    return  # dropped by drop_streams()
+                event, path, data = item
+                if base:
+                    item = _rebase_event(stub, base, event, path, data)
+                    if item is None:
+                        continue
+                    event, path, data = item
+                self._send_event(event, json.dumps({"path": path, "data": data}))
+                last_sent = time.monotonic()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            stub.unsubscribe(events)
+
+    def _send_event(self, event: str, data: str) -> None:
+        chunk = f"event: {event}\ndata: {data}\n\n".encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.flush()
+
+
+def _rebase_event(stub: "FirebaseStub", base: str, event: str, path: str,
+                  data: Any) -> Optional[Tuple[str, str, Any]]:
+    """Express a database event relative to a stream opened at ``base``, or None if unrelated.
+
+    A write above ``base`` is sent as a put of the node's current value.
+    """
+    path = "/" + path.strip("/")
+    prefix = "/" + base
+    if path == prefix or path.startswith(prefix + "/"):
+        return event, path[len(prefix):] or "/", data
+    if prefix.startswith(path.rstrip("/") + "/"):
+        with stub.lock:
+            return "put", "/", stub.lookup(base)
+    return None
+
+
+def _etag(body: bytes) -> str:
+    return hashlib.md5(body).hexdigest()
+
+
+def _db_path(request_path: str) -> str:
+    """Return the database path of a REST URL path such as ``/users/a.json?shallow=true``."""
+    return request_path.split("?", 1)[0].strip("/")[:-len(".json")].strip("/")
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, stub: "FirebaseStub"):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.stub = stub
+
+
+class FirebaseStub:
+    """Local stand-in for the Realtime Database REST API.
+
+    Supports shallow reads, ``orderBy="$key"``/``startAt`` queries,
+    ETag/If-None-Match, conditional PUT (If-Match), PUT/PATCH and
+    ``text/event-stream`` listeners. Every request is delayed by
+    ``latency`` seconds to model the round trip to Firebase. Outages are
+    modelled by setting ``fail_status`` (e.g. 503) or by raising
+    ``latency`` past the client's read timeout. Streams send Firebase's
+    ``keep-alive`` event after ``keepalive`` seconds of silence, if set,
+    and :meth:`drop_streams` cuts them off.
+    """
+
+    def __init__(self, db: Optional[Dict[str, Any]] = None, latency: float = 0.0):
+        self.db: Dict[str, Any] = dict(db or {})
+        self.latency = latency
+        self.fail_status = 0
+        self.keepalive: Optional[float] = None  # seconds of stream silence before a keep-alive event
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.stopping = threading.Event()
+        self._subscribers: List["queue.SimpleQueue[Any]"] = []
+        self._server = _StubHTTPServer(self)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="firebase-stub",
+                                        daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self) -> "FirebaseStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stopping.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def delay(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def count(self, method: str) -> None:
+        with self.lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+
+    def update(self, fields: Dict[str, Any], event: str = "patch", path: str = "/") -> None:
+        """Change database values and push the change to stream listeners."""
+        with self.lock:
+            self.db.update(fields)
+            data = fields if path == "/" else next(iter(fields.values()))
+            for subscriber in self._subscribers:
+                subscriber.put((event, path, data))
+
+    def lookup(self, path: str) -> Any:
+        """Return the value at a slash-separated database path, or None (call with lock held)."""
+        node: Any = self.db
+        for part in filter(None, path.split("/")):
+            if not isinstance(node, dict):
+                return None
+            node = node.get(part)
+        return node
+
+    def _set(self, path: str, value: Any) -> None:
+        parts = [part for part in path.split("/") if part]
+        if not parts:
+            self.db = value if isinstance(value, dict) else {}
+            return
+        node = self.db
+        for part in parts[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = node[part] = {}
+            node = child
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = value
+
+    def write(self, path: str, value: Any, replace: bool) -> None:
+        """Apply a REST PUT (``replace``) or PATCH at ``path`` and notify listeners.
+
+        PATCH children may themselves be paths (``{"a/b": 1}``), as in
+        Firebase multi-path updates.
+        """
+        with self.lock:
+            self._write(path, value, replace)
+
+    def write_if(self, path: str, value: Any, etag: str) -> Optional[bytes]:
+        """Apply a conditional PUT; return the current body instead if its ETag differs."""
+        with self.lock:
+            current = json.dumps(self.lookup(path)).encode("utf-8")
+            if _etag(current) != etag:
+                return current
+            self._write(path, value, True)
+            return None
+
+    def _write(self, path: str, value: Any, replace: bool) -> None:
+        if replace:
+            self._set(path, value)
+        else:
+            for child, child_value in (value or {}).items():
+                self._set(f"{path}/{child}", child_value)
+        for subscriber in self._subscribers:
+            subscriber.put(("put" if replace else "patch", f"/{path}", value))
+
+    def replace(self, db: Dict[str, Any]) -> None:
+        with self.lock:
+            self.db = dict(db)
+            for subscriber in self._subscribers:
+                subscriber.put(("put", "/", dict(db)))
+
+    def drop_streams(self) -> None:
+        """Close every open event stream, as a network drop or server restart would."""
+        with self.lock:
+            for subscriber in self._subscribers:
+                subscriber.put(None)
+
+    def subscribe(self) -> "queue.SimpleQueue[Any]":
+        events: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        with self.lock:
+            self._subscribers.append(events)
+        return events
+
+    def unsubscribe(self, events: "queue.SimpleQueue[Any]") -> None:
+        with self.lock:
+            if events in self._subscribers:
+                self._subscribers.remove(events)
+
+
+def make_dns_query(name: str, qtype: int = 1, qid: int = 0) -> bytes:
+    """Encode a recursive DNS query for ``name``."""
+    labels = b"".join(bytes([len(label)]) + label.encode("ascii") for label in name.split("."))
+    return struct.pack("!HHHHHH", qid, 0x0100, 1, 0, 0, 0) + labels + b"\0" + struct.pack("!HH", qtype, 1)
+
+
+class FakeResolver:
+    """Upstream DNS server on localhost that answers every A query with one record.
+
+    Answers carry ``ttl`` and arrive after ``latency`` seconds; names under
+    ``nxdomain`` get NXDOMAIN. Queries are counted in ``queries``.
+    """
+
+    def __init__(self, latency: float = 0.0, ttl: int = 300, nxdomain: str = "invalid"):
+        self.latency = latency
+        self.ttl = ttl
+        self.nxdomain = nxdomain
+        self.queries = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.settimeout(0.2)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="fake-resolver", daemon=True)
+
+    @property
+    def address(self) -> tuple:
+        return self._sock.getsockname()
+
+    def __enter__(self) -> "FakeResolver":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stopping.set()
+        self._thread.join()
+        self._sock.close()
+
+    def answer(self, query: bytes) -> bytes:
+        qid, flags = struct.unpack_from("!HH", query)
+        end = query.index(b"\0", 12) + 5
+        name = query[12:end - 4]
+        if name.endswith(bytes([len(self.nxdomain)]) + self.nxdomain.encode() + b"\0"):
+            return struct.pack("!HHHHHH", qid, 0x8183 | (flags & 0x0100), 1, 0, 0, 0) + query[12:end]
+        record = struct.pack("!HHHIH", 0xC00C, 1, 1, self.ttl, 4) + socket.inet_aton("93.184.216.34")
+        return struct.pack("!HHHHHH", qid, 0x8180 | (flags & 0x0100), 1, 1, 0, 0) + query[12:end] + record
+
+    def _serve(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                query, addr = self._sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            self.queries += 1
+            if self.latency:
+                threading.Timer(self.latency, self._send, (self.answer(query), addr)).start()
+            else:
+                self._send(self.answer(query), addr)
+
+    def _send(self, response: bytes, addr: tuple) -> None:
+        try:
+            self._sock.sendto(response, addr)
+        except OSError:
+            pass  # A delayed answer due after the resolver was closed.
@@ -0,0 +1,161 @@
+import sys
+import time
+import resource
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class Result:
+    """Timing summary of one benchmark case at one size."""
+
+    name: str
+    params: Dict[str, Any]
+    samples: int
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    peak_rss_kb: int = 0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used to match results against a baseline."""
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.name}[{params}]" if params else self.name
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), key=self.key)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_kb() -> int:
+    """Return the process's peak resident set size in KiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and KiB on Linux.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def measure(name: str, fn: Callable[[], Any], params: Optional[Dict[str, Any]] = None,
+            repeat: int = 20, warmup: int = 1, setup: Optional[Callable[[], Any]] = None,
+            min_time: float = 0.0) -> Result:
+    """Time ``fn`` repeatedly and summarise the per-call latency.
+
+    ``setup`` runs untimed before every call. Sampling continues past
+    ``repeat`` until ``min_time`` seconds have been spent in ``fn``.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    timings: List[float] = []
+    total = 0.0
+    while len(timings) < repeat or total < min_time:
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        total += elapsed
+
+    return Result(
+        name=name,
+        params=params or {},
+        samples=len(timings),
+        ops_per_sec=len(timings) / total if total else float("inf"),
+        p50_ms=percentile(timings, 0.50) * 1000,
+        p99_ms=percentile(timings, 0.99) * 1000,
+    )
+
+
+def throughput(name: str, fn: Callable[[int], Any], ops: int,
+               params: Optional[Dict[str, Any]] = None, repeat: int = 5) -> Result:
+    """Time ``fn(ops)`` as a batch and report per-operation latency and ops/s."""
+    fn(min(ops, 1000))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(ops)
+        timings.append((time.perf_counter() - start) / ops)
+
+    return Result(
+        name=name,
+        params=dict(params or {}, ops=ops),
+        samples=repeat,
+        ops_per_sec=1 / percentile(timings, 0.50),
+        p50_ms=percentile(timings, 0.50) * 1000,
+        p99_ms=percentile(timings, 0.99) * 1000,
+    )
+
+
+def summarize(name: str, timings_ms: List[float], params: Optional[Dict[str, Any]] = None) -> Result:
+    """Summarise latencies measured outside :func:`measure`, e.g. in a child process."""
+    total = sum(timings_ms) / 1000
+    return Result(
+        name=name,
+        params=params or {},
+        samples=len(timings_ms),
+        ops_per_sec=len(timings_ms) / total if total else float("inf"),
+        p50_ms=percentile(timings_ms, 0.50),
+        p99_ms=percentile(timings_ms, 0.99),
+    )
+
+
+def check_budgets(results: List[Dict[str, Any]]) -> List[str]:
+    """Return a line per result over its absolute budget.
+
+    A case sets ``extra["budget_ms"]`` to cap its p50, and lists anything
+    else that broke its contract in ``extra["violations"]``.
+    """
+    failures = []
+    for result in results:
+        extra = result.get("extra") or {}
+        budget = extra.get("budget_ms")
+        if budget is not None and result["p50_ms"] > budget:
+            failures.append(f"{result['key']}: p50 {result['p50_ms']:.1f} ms exceeds "
+                            f"the {budget} ms budget")
+        for violation in extra.get("violations", ()):
+            failures.append(f"{result['key']}: {violation}")
+    return failures
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            tolerance: float, min_delta_ms: float = 0.001) -> List[str]:
+    """Return a line per result whose p50 is slower than baseline by more than tolerance.
+
+    Differences below ``min_delta_ms`` are timer noise and never count.
+    """
+    previous = {entry["key"]: entry for entry in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get(result["key"])
+        if not base or not base["p50_ms"] or result["p50_ms"] - base["p50_ms"] < min_delta_ms:
+            continue
+        ratio = result["p50_ms"] / base["p50_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{result['key']}: p50 {result['p50_ms']:.3f} ms vs {base['p50_ms']:.3f} ms "
+                f"baseline ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    """Render results as a fixed-width text table."""
+    width = max([len("case")] + [len(result["key"]) for result in results])
+    header = f"{'case':<{width}} {'ops/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak RSS MiB':>13}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(
+            f"{result['key']:<{width}} {result['ops_per_sec']:>12.1f} {result['p50_ms']:>10.3f} "
+            f"{result['p99_ms']:>10.3f} {result['peak_rss_kb'] / 1024:>13.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,603 @@
+"""Record timelines of the poller's inputs and replay them against it.
+
+A timeline is a JSON-lines file: a header ``{"timeline": 1, "start": <unix
+time>}`` followed by events ordered by ``t`` (seconds since the start)::
+
+    {"t": 12.0, "firebase": {"goalReachedToday": false, ...}}   # null: unreachable
+    {"t": 30.5, "config": {"apps": [...], "sites": [...]}}
+    {"t": 31.0, "started": [[4242, "steam"]]}
+    {"t": 95.0, "exited": [4242]}
+
+``python -m backend.benchmarks.replay record OUT`` samples the live goal
+status, the block config and the process table, writing an event only when
+something changed. ``replay synth OUT --days 7`` writes a synthetic week,
+and ``replay play TIMELINE`` runs the real poller against a timeline.
+
+During a replay the poller's phases run for real (config snapshots, hosts
+file edits, process matching, frontend files), but Firebase, the process
+table and the clock are fakes fed from the timeline and the hosts file is a
+temp file. Simulated time jumps straight to the next deadline or event, so
+a week replays in seconds; ``--speed`` paces it against the wall clock
+instead.
+"""
+import sys
+import json
+import time
+import random
+import tempfile
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+from .fixtures import APP_NAMES, site_names
+from .harness import percentile
+
+TIMELINE_VERSION = 1
+
+
+@dataclass
+class Timeline:
+    """Start time plus ``(t, kind, value)`` events sorted by ``t``."""
+    start: float
+    events: List[Tuple[float, str, Any]] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.events[-1][0] if self.events else 0.0
+
+    @classmethod
+    def load(cls, path: Path) -> "Timeline":
+        with open(path) as f:
+            header = json.loads(f.readline())
+            if header.get("timeline") != TIMELINE_VERSION:
+                raise ValueError(f"{path} is not a version {TIMELINE_VERSION} timeline")
+            timeline = cls(float(header["start"]))
+            for line in f:
+                if line.strip():
+                    event = json.loads(line)
+                    t = float(event.pop("t"))
+                    timeline.events.extend((t, kind, value) for kind, value in event.items())
+        timeline.events.sort(key=lambda event: event[0])
+        return timeline
+
+    def save(self, path: Path) -> None:
+        with open(path, "w") as f:
+            f.write(json.dumps({"timeline": TIMELINE_VERSION, "start": self.start}) + "\n")
+            for t, kind, value in self.events:
+                f.write(json.dumps({"t": round(t, 3), kind: value}) + "\n")
+
+
+def record(path: Path, duration: float, interval: float) -> int:
+    """Sample the live inputs every ``interval`` seconds; return the number of events.
+
+    Events are flushed as they are written, so an interrupted recording is
+    still a valid timeline.
+    """
+    from ..config.constants import BLOCKED_CONFIG_PATH, LOG_FILE
+    from ..utils.logger import Logger
+    from ..services.firebase_service import FirebaseService
+    from ..services.process_scanner import ProcessScanner
+
+    logger = Logger(Path(LOG_FILE))
+    service = FirebaseService(logger)
+    scanner = ProcessScanner()
+    config_path = Path(BLOCKED_CONFIG_PATH)
+    start = time.time()
+    last: Dict[str, Any] = {}
+    processes: Dict[int, Tuple[float, str]] = {}
+    count = 0
+    with open(path, "w") as f:
+        f.write(json.dumps({"timeline": TIMELINE_VERSION, "start": start}) + "\n")
+
+        def emit(t: float, kind: str, value: Any) -> None:
+            nonlocal count
+            f.write(json.dumps({"t": round(t, 3), kind: value}) + "\n")
+            f.flush()
+            count += 1
+
+        try:
+            while True:
+                t = time.time() - start
+                data = service.get_goal_status()
+                if "firebase" not in last or data != last["firebase"]:
+                    last["firebase"] = data
+                    emit(t, "firebase", data)
+                try:
+                    config = json.loads(config_path.read_text())
+                except (OSError, ValueError):
+                    config = last.get("config")
+                if config != last.get("config"):
+                    last["config"] = config
+                    emit(t, "config", config)
+                current = {info.pid: (info.create_time, info.name) for info in scanner.source()}
+                exited = [pid for pid, entry in processes.items() if current.get(pid) != entry]
+                started = [[pid, name] for pid, (created, name) in current.items()
+                           if processes.get(pid) != (created, name)]
+                if exited:
+                    emit(t, "exited", exited)
+                if started:
+                    emit(t, "started", started)
+                processes = current
+                if t + interval > duration:
+                    break
+                time.sleep(max(0.0, start + t + interval - time.time()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.client.close()
+    return count
+
+
+def synthetic_timeline(days: int, seed: int = 0) -> Timeline:
+    """A plausible stretch of ``days`` days, starting at a local midnight.
+
+    Each day the phone app resets the counter after midnight and logs a
+    workout in the evening, one minute at a time, reaching the 40-minute
+    goal on most days. Blocked apps are launched a few times a day among
+    ordinary processes, the block config is edited every third day and
+    Firebase is unreachable for 20 minutes around noon on the second day.
+    A few more sites are blocked during weekday office hours whatever the
+    goal, so enforcement also has to follow policy window edges.
+    """
+    from ..services.scheduler import next_midnight
+
+    rng = random.Random(seed)
+    start = next_midnight(1_700_000_000.0)
+    events: List[Tuple[float, str, Any]] = []
+    sites = site_names(50, seed)
+    config = {"apps": list(APP_NAMES[:3]), "sites": sites[:40],
+              "rules": [{"sites": sites[40:45], "until": "never",
+                         "windows": [{"days": "mon-fri", "start": "09:00", "end": "17:00"}]}]}
+    events.append((0.0, "config", dict(config)))
+    pids = iter(range(50_000, 10_000_000))
+    events.append((0.0, "started", [[next(pids), f"worker-{i}"] for i in range(300)]))
+    status = {"goalReachedToday": False, "workoutMinutesToday": 0, "restrictionsEnabled": True}
+
+    def firebase(t: float, **changes: Any) -> None:
+        status.update(changes, lastSyncedAt=int(start + t))
+        events.append((t, "firebase", dict(status)))
+
+    firebase(0.0)
+    for day in range(days):
+        base = day * 86_400.0
+        firebase(base + 90, goalReachedToday=False, workoutMinutesToday=0)
+        workout = base + rng.uniform(16, 20) * 3600
+        for minute in range(1, rng.choice((25, 45, 50, 60)) + 1):
+            firebase(workout + minute * 60, workoutMinutesToday=minute,
+                     goalReachedToday=minute >= 40)
+        for _ in range(4):
+            at = base + rng.uniform(8, 23) * 3600
+            pid = next(pids)
+            events.append((at, "started", [[pid, rng.choice(config["apps"])]]))
+            events.append((at + rng.uniform(600, 3600), "exited", [pid]))
+        for _ in range(20):
+            at = base + rng.uniform(7, 24) * 3600
+            pid = next(pids)
+            events.append((at, "started", [[pid, f"helper-{rng.randrange(50)}"]]))
+            events.append((at + rng.uniform(60, 7200), "exited", [pid]))
+        if day % 3 == 2:
+            config["sites"] = rng.sample(sites, 40)
+            events.append((base + rng.uniform(9, 22) * 3600, "config", dict(config)))
+        if day == 1:
+            events.append((base + 12 * 3600, "firebase", None))
+            events.append((base + 12 * 3600 + 1200, "firebase", dict(status)))
+    events.sort(key=lambda event: event[0])
+    return Timeline(start, events)
+
+
+class FakeFirebase:
+    """Stands in for FirebaseService: serves the timeline's status, applies resets."""
+
+    def __init__(self):
+        self.data: Optional[Dict[str, Any]] = {}
+        self.reachable = True
+        self.reads = 0
+        self.writes = 0
+        self.redundant_writes = 0
+
+    def get_goal_status(self) -> Optional[Dict[str, Any]]:
+        self.reads += 1
+        return dict(self.data) if self.reachable else None
+
+    def reset_goal(self, expires_at: Optional[float] = None) -> None:
+        self.writes += 1
+        if self.data.get("goalReachedToday") is False:
+            self.redundant_writes += 1
+        self.data["goalReachedToday"] = False
+
+    def with_pending(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Resets are applied at once, so no write is ever pending."""
+        return data
+
+
+class FakeStream:
+    """Stands in for FirebaseStream: a connected mirror of the fake database."""
+
+    def __init__(self, firebase: FakeFirebase):
+        self.firebase = firebase
+
+    @property
+    def connected(self) -> bool:
+        return self.firebase.reachable
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        return dict(self.firebase.data) if self.firebase.reachable else None
+
+    def stop(self) -> None:
+        pass
+
+
+class FakeProcessTable:
+    """Process table fed from the timeline; kills remove entries.
+
+    Processes matching ``matcher`` (the apps the timeline's config blocks)
+    are tracked as they come and go, so checking for a running blocked app
+    does not scan the table.
+    """
+
+    def __init__(self):
+        from ..services.process_scanner import ProcessInfo
+
+        self._info = ProcessInfo
+        self.processes: Dict[int, Any] = {}
+        self.matcher = None
+        self.blocked: set = set()
+        self.kills = 0
+
+    def watch(self, matcher: Any) -> None:
+        self.matcher = matcher
+        self.blocked = {pid for pid, info in self.processes.items() if matcher.matches(info.name)}
+
+    def start(self, pid: int, name: str, now: float) -> None:
+        self.processes[pid] = self._info(pid, now, name)
+        if self.matcher is not None and self.matcher.matches(name):
+            self.blocked.add(pid)
+
+    def exit(self, pid: int) -> None:
+        self.processes.pop(pid, None)
+        self.blocked.discard(pid)
+
+    def source(self) -> List[Any]:
+        return list(self.processes.values())
+
+    def kill(self, pid: int, name: str) -> bool:
+        if self.processes.pop(pid, None) is None:
+            return False
+        self.blocked.discard(pid)
+        self.kills += 1
+        return True
+
+
+class WriteAudit:
+    """Wraps the atomic file writers to count writes that did not change a file."""
+
+    def __init__(self):
+        self.writes: Dict[str, int] = {}
+        self.redundant: Dict[str, int] = {}
+
+    def _count(self, path: Any, content: str) -> None:
+        name = Path(path).name
+        self.writes[name] = self.writes.get(name, 0) + 1
+        try:
+            unchanged = Path(path).read_text() == content
+        except OSError:
+            unchanged = False
+        if unchanged:
+            self.redundant[name] = self.redundant.get(name, 0) + 1
+
+    def chunks(self, write: Callable[..., int]) -> Callable[..., int]:
+        def audited(path: Any, chunks: Any, fsync: bool = False) -> int:
+            content = "".join(chunks)
+            self._count(path, content)
+            return write(path, (content,), fsync)
+        return audited
+
+    def json(self, write: Callable[[Any, Any], None]) -> Callable[[Any, Any], None]:
+        def audited(path: Any, data: Any) -> None:
+            self._count(path, json.dumps(data))
+            write(path, data)
+        return audited
+
+
+@dataclass
+class ReplayReport:
+    mode: str
+    simulated_hours: float
+    wall_seconds: float
+    cpu_seconds: float
+    cpu_ms_per_hour: float
+    enforcement_episodes: int
+    latency_p50_s: float
+    latency_p99_s: float
+    latency_max_s: float
+    unresolved: int
+    firebase_reads: int
+    firebase_writes: int
+    hosts_writes: int
+    kills: int
+    wakeups: int
+    redundant_writes: Dict[str, int]
+    redundant_firebase_writes: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class Replayer:
+    """Drives a real FirebasePoller through a timeline on a fake clock.
+
+    The loop mirrors ``FirebasePoller.run_async``: the same scheduler jobs,
+    adaptive intervals and phase methods, run one after another instead of
+    on executors. ``push`` models the Firebase stream and the exec watcher
+    (changes reach the poller immediately); without it every change waits
+    for the next poll or sweep.
+
+    Enforcement latency is measured in simulated time, from the event that
+    made the enforced state wrong (a goal flip, config edit or blocked app
+    launch) to the step that made it right again. CPU is the process time
+    spent in the poller's phases only.
+    """
+
+    def __init__(self, timeline: Timeline, workdir: Path, push: bool = False, speed: float = 0.0):
+        self.timeline = timeline
+        self.workdir = Path(workdir)
+        self.push = push
+        self.speed = speed
+        self.firebase = FakeFirebase()
+        self.processes = FakeProcessTable()
+        self.audit = WriteAudit()
+        self.cpu = 0.0
+        self.wakeups = 0
+        self.latencies: List[float] = []
+        self._violating_since: Optional[float] = None
+        self._config = None  # snapshot of the timeline's config, for the expected state
+        self._hosts: Tuple[int, Any] = (-1, None)  # (hosts writes seen, managed sites)
+
+    def _build(self, stack: ExitStack) -> Any:
+        from .. import firebase_poller
+        from ..services import hosts_manager, resilience
+        from ..services.notifications import NullBackend
+        from ..services.process_scanner import ProcessScanner
+        from ..services.resilience import CircuitBreaker, LastKnownStatus
+        from ..services.scheduler import FakeClock, Scheduler
+        from ..services.timeseries import TimeSeriesStore
+        from ..utils.logger import Logger
+
+        workdir = self.workdir
+        Logger(workdir / "replay.log", echo=False)  # the poller's Logger shares this quiet writer
+        stack.enter_context(mock.patch.multiple(
+            firebase_poller, STREAM_ENABLED=False, ENFORCEMENT_BACKEND="hosts",
+            HEARTBEAT_FILE=workdir / "heartbeat.json", LOG_FILE=workdir / "replay.log",
+            CURRENT_WORKOUT_PATH=workdir / "current_workout.json",
+            GOAL_STATUS_PATH=workdir / "goal_status.json",
+            BLOCKED_CONFIG_PATH=workdir / "replay-config.json",
+            atomic_write_json=self.audit.json(firebase_poller.atomic_write_json),
+        ))
+        stack.enter_context(mock.patch.object(
+            hosts_manager, "atomic_write_chunks", self.audit.chunks(hosts_manager.atomic_write_chunks)))
+        stack.enter_context(mock.patch.object(
+            resilience, "atomic_write_json", self.audit.json(resilience.atomic_write_json)))
+        (workdir / "replay-hosts").write_text("127.0.0.1 localhost\n::1 localhost\n")
+        (workdir / "replay-config.json").write_text(json.dumps({"apps": [], "sites": []}))
+
+        self.clock = FakeClock(wall=self.timeline.start)
+        poller = firebase_poller.FirebasePoller()
+        poller.scheduler = Scheduler(self.clock)
+        poller.firebase_service = self.firebase
+        poller.goal_status.service = self.firebase
+        poller.goal_status.cache = LastKnownStatus(workdir / "goal-cache.json", clock=self.clock.time)
+        poller.goal_status.breaker = CircuitBreaker(clock=self.clock.monotonic, rng=lambda: 0.5)
+        poller.firebase_stream = FakeStream(self.firebase) if self.push else None
+        poller.hosts_manager.hosts_path = str(workdir / "replay-hosts")
+        poller.history = TimeSeriesStore(poller.logger, workdir / "history", poller.reset_tz)
+        manager = poller.process_manager
+        manager.exec_watcher = None
+        manager.scanner = ProcessScanner(source=self.processes.source, exe_resolver=lambda pid: "")
+        manager._kill = self.processes.kill
+        manager.notifier.backend = NullBackend()
+        stack.callback(poller.history.close)
+        stack.callback(poller.firebase_client.close)
+        return poller
+
+    def _phase(self, fn: Callable[..., Any], *args: Any) -> Any:
+        start = time.process_time()
+        try:
+            return fn(*args)
+        finally:
+            self.cpu += time.process_time() - start
+
+    def _apply(self, poller: Any, kind: str, value: Any, now: float) -> None:
+        from ..config.constants import CONFIG_DEBOUNCE
+        from ..services.config_manager import ConfigSnapshot
+        from ..utils.files import atomic_write_json
+
+        if kind == "firebase":
+            # While unreachable the database keeps its last value; the poller just cannot see it.
+            self.firebase.reachable = value is not None
+            if value is not None:
+                self.firebase.data = dict(value)
+            if self.push:
+                poller.scheduler.schedule("fetch", 0)
+        elif kind == "config":
+            atomic_write_json(poller.config_manager.config_path, value)
+            self._config = ConfigSnapshot.build(0, value)
+            self.processes.watch(self._config.app_matcher)
+            poller.scheduler.schedule("config", CONFIG_DEBOUNCE)
+        elif kind == "started":
+            for pid, name in value:
+                self.processes.start(pid, name, now)
+                # The exec watcher runs while apps are blocked and sees each launch at once.
+                if self.push and poller.process_manager._watch_matcher:
+                    self._phase(poller.process_manager._on_exec, pid)
+        elif kind == "exited":
+            for pid in value:
+                self.processes.exit(pid)
+
+    def _expected_state(self) -> Any:
+        from ..services.reconciler import EnforcementState
+
+        if self._config is None:
+            return None
+        data = self.firebase.data
+        return EnforcementState.from_config(data.get("goalReachedToday"), self._config,
+                                            self.clock.time(), data.get("workoutMinutesToday", 0))
+
+    def _compliant(self, expected: Any) -> bool:
+        from ..services.hosts_manager import HostsFile
+
+        if expected is None:
+            return True
+        writes = self.audit.writes.get("replay-hosts", 0)
+        if writes != self._hosts[0]:
+            # Only re-parse the hosts file after the poller wrote it.
+            self._hosts = (writes, HostsFile((self.workdir / "replay-hosts").read_text()).managed)
+        if self._hosts[1] != expected.blocked_sites:
+            return False
+        if not expected.blocked_apps:
+            return True
+        return not any(expected.app_matcher.matches(self.processes.processes[pid].name)
+                       for pid in self.processes.blocked)
+
+    def _check(self, now: float) -> None:
+        if self._compliant(self._expected_state()):
+            if self._violating_since is not None:
+                self.latencies.append(now - self._violating_since)
+                self._violating_since = None
+        elif self._violating_since is None:
+            self._violating_since = now
+
+    def _run_job(self, poller: Any, job: str) -> None:
+        from ..services.scheduler import next_midnight
+
+        self.wakeups += 1
+        if job == "fetch":
+            data = self._phase(poller.fetch_cycle)
+            if data != poller._latest:
+                poller.fetch_interval.reset()
+            else:
+                poller.fetch_interval.backoff()
+            poller._latest = data
+            poller.scheduler.schedule("fetch", poller._next_fetch_delay())
+            self._enforce(poller)
+        elif job in ("enforce", "config"):
+            self._enforce(poller)
+        elif job == "reset":
+            poller.scheduler.schedule_at("reset", next_midnight(self.clock.time(), poller.reset_tz))
+            self._phase(poller.reset_cycle)
+            poller.scheduler.schedule("fetch", 0)
+
+    def _enforce(self, poller: Any) -> None:
+        if poller._latest is None:
+            return
+        desired = self._phase(poller.prepare_cycle, poller._latest)
+        if desired is not None:
+            self._phase(poller.enforce_sites, desired)
+            self._phase(poller.enforce_apps, desired)
+        if desired != poller._last_desired:
+            poller.sweep_interval.reset()
+        else:
+            poller._backoff_sweep()
+        poller._last_desired = desired
+        poller.scheduler.schedule("enforce", poller._next_enforce_delay())
+
+    def run(self) -> ReplayReport:
+        from ..services.scheduler import next_midnight
+
+        wall_start = time.perf_counter()
+        with ExitStack() as stack:
+            poller = self._build(stack)
+            scheduler = poller.scheduler
+            scheduler.schedule("fetch", 0)
+            scheduler.schedule_at("reset", next_midnight(self.clock.time(), poller.reset_tz))
+            events, index, now = self.timeline.events, 0, 0.0
+            end = self.timeline.duration
+            while True:
+                delays = [scheduler.time_until_next()]
+                if index < len(events):
+                    delays.append(max(0.0, events[index][0] - now))
+                step = min(d for d in delays if d is not None)
+                if now + step > end:
+                    break
+                if self.speed:
+                    time.sleep(step / self.speed)
+                self.clock.advance(step)
+                now += step
+                while index < len(events) and events[index][0] <= now:
+                    self._apply(poller, events[index][1], events[index][2], now)
+                    index += 1
+                self._check(now)
+                for job in scheduler.pop_due():
+                    self._run_job(poller, job)
+                self._check(now)
+        hours = max(end, 1.0) / 3600
+        hosts = self.audit.writes.get("replay-hosts", 0)
+        latencies = self.latencies or [0.0]
+        return ReplayReport(
+            mode="push" if self.push else "poll",
+            simulated_hours=round(hours, 2),
+            wall_seconds=round(time.perf_counter() - wall_start, 3),
+            cpu_seconds=round(self.cpu, 3),
+            cpu_ms_per_hour=round(self.cpu * 1000 / hours, 2),
+            enforcement_episodes=len(self.latencies),
+            latency_p50_s=round(percentile(latencies, 0.50), 2),
+            latency_p99_s=round(percentile(latencies, 0.99), 2),
+            latency_max_s=round(max(latencies), 2),
+            unresolved=int(self._violating_since is not None),
+            firebase_reads=self.firebase.reads,
+            firebase_writes=self.firebase.writes,
+            hosts_writes=hosts,
+            kills=self.processes.kills,
+            wakeups=self.wakeups,
+            redundant_writes=dict(self.audit.redundant),
+            redundant_firebase_writes=self.firebase.redundant_writes,
+        )
+
+
+def replay(timeline: Timeline, push: bool = False, speed: float = 0.0,
+           workdir: Optional[Path] = None) -> ReplayReport:
+    """Replay a timeline in a temp directory (or ``workdir``) and return the report."""
+    if workdir is not None:
+        return Replayer(timeline, workdir, push, speed).run()
+    with tempfile.TemporaryDirectory(prefix="npng-replay-") as tmp:
+        return Replayer(timeline, Path(tmp), push, speed).run()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks.replay",
+                                     description="Record and replay the poller's inputs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record", help="sample live Firebase, config and processes")
+    rec.add_argument("output")
+    rec.add_argument("--duration", type=float, default=3600, help="seconds (default: 3600)")
+    rec.add_argument("--interval", type=float, default=5, help="seconds between samples (default: 5)")
+    synth = commands.add_parser("synth", help="write a synthetic timeline")
+    synth.add_argument("output")
+    synth.add_argument("--days", type=int, default=7)
+    synth.add_argument("--seed", type=int, default=0)
+    play = commands.add_parser("play", help="replay a timeline against the poller")
+    play.add_argument("timeline")
+    play.add_argument("--push", action="store_true",
+                      help="model the Firebase stream and exec watcher")
+    play.add_argument("--speed", type=float, default=0.0,
+                      help="simulated seconds per wall second (default: unpaced)")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        count = record(Path(args.output), args.duration, args.interval)
+        print(f"recorded {count} events to {args.output}")
+    elif args.command == "synth":
+        timeline = synthetic_timeline(args.days, args.seed)
+        timeline.save(Path(args.output))
+        print(f"wrote {len(timeline.events)} events ({args.days} days) to {args.output}")
+    else:
+        report = replay(Timeline.load(Path(args.timeline)), args.push, args.speed)
+        print(json.dumps(report.to_dict(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
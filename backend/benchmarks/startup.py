@@ -0,0 +1,46 @@
+"""Child process of the ``startup`` benchmark.
+
+``python -m backend.benchmarks.startup WORKDIR URL PROC_ROOT`` runs the real
+poller with its files (history and pending writes included), hosts file,
+``/proc`` and Firebase redirected to local fixtures. It imports nothing the
+daemon would not, so the parent's clock covers interpreter start, imports,
+construction and the first enforcement.
+"""
+import sys
+from pathlib import Path
+
+
+def main(argv) -> None:
+    workdir, url, proc_root = Path(argv[0]), argv[1], argv[2]
+    from backend import firebase_poller
+    from backend.services.notifications import NullBackend
+    from backend.services.process_scanner import ProcessScanner, iter_proc, proc_exe
+    from backend.services.resilience import LastKnownStatus
+    from backend.services.timeseries import TimeSeriesStore
+
+    for name, filename in (("HEARTBEAT_FILE", "heartbeat.json"), ("LOG_FILE", "bench.log"),
+                           ("CURRENT_WORKOUT_PATH", "current_workout.json"),
+                           ("GOAL_STATUS_PATH", "goal_status.json"),
+                           ("BLOCKED_CONFIG_PATH", "startup-config.json")):
+        setattr(firebase_poller, name, workdir / filename)
+    firebase_poller.STREAM_ENABLED = False
+
+    poller = firebase_poller.FirebasePoller()
+    poller.firebase_client.base_url = url.rstrip("/")
+    poller.goal_status.cache = LastKnownStatus(workdir / "goal-cache.json")
+    poller.write_queue.path = workdir / "pending-writes.json"
+    poller.history = poller.status_server.history = TimeSeriesStore(
+        poller.logger, workdir / "history", poller.reset_tz)
+    poller.hosts_manager.hosts_path = str(workdir / "startup-hosts")
+    poller.status_server.address = ("127.0.0.1", 0)
+    poller.process_manager.exec_watcher = None
+    poller.process_manager.notifier.backend = NullBackend()
+    poller.process_manager.scanner = ProcessScanner(
+        source=lambda: iter_proc(proc_root),
+        exe_resolver=lambda pid: proc_exe(pid, proc_root),
+    )
+    poller.run()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -13,9 +13,96 @@ BLOCKED_CONFIG_PATH = FRONTEND_DIR / 'blocked_config.json'
 CURRENT_WORKOUT_PATH = FRONTEND_DIR / 'current_workout.json'
 GOAL_STATUS_PATH = FRONTEND_DIR / 'goal_status.json'
 
+# Logging settings
+LOG_LEVEL = "INFO"
+LOG_FORMAT = "text"  # "text" or "json" (JSON lines)
+LOG_MAX_BYTES = 5 * 1024 * 1024  # rotate when the log reaches this size; 0 disables
+LOG_BACKUP_COUNT = 5  # compressed backups kept as nopainnogame.log.N.gz
+LOG_ROTATE_DAILY = True
+
+# Diagnostics (SIGUSR1 toggles a profiling session)
+DIAGNOSTICS_DIR = BASE_DIR / "diagnostics"  # .prof, .txt and Chrome .trace.json files
+PROFILE_CYCLES = 5  # cycles covered by one profiling session
+TRACE_MAX_EVENTS = 100_000  # newest spans kept while tracing
+
+# Desktop notifications
+NOTIFY_BACKEND = "auto"  # "auto", "osascript" (macOS), "notify-send" (Linux) or "none"
+NOTIFY_COALESCE_WINDOW = 2  # seconds to gather a burst of events into one notification
+NOTIFY_MIN_INTERVAL = 60  # seconds; a repeated notification waits this long, gathering events
+NOTIFY_TIMEOUT = 5  # seconds before a hung notification command is abandoned
+
 # Network settings
 REDIRECT_IP = "127.0.0.1"
-DATABASE_URL = "https://nopainnogameapp-default-rtdb.firebaseio.com/.json"
+DATABASE_BASE_URL = "https://nopainnogameapp-default-rtdb.firebaseio.com"
+DATABASE_URL = f"{DATABASE_BASE_URL}/.json"
+
+# HTTP client settings
+HTTP_CONNECT_TIMEOUT = 3.05  # seconds
+HTTP_READ_TIMEOUT = 10  # seconds
+HTTP_POOL_SIZE = 4
+WATCHED_KEYS = ("goalReachedToday", "workoutMinutesToday", "restrictionsEnabled", "lastSyncedAt")
+
+# Local status endpoint for the UI
+STATUS_HOST = "127.0.0.1"
+STATUS_PORT = 47621
+STATUS_HEARTBEAT_INTERVAL = 5  # seconds between SSE heartbeat events
+
+# Enforcement backend: "hosts" edits /etc/hosts; "dns" answers from a local DNS stub,
+# which needs the system resolver pointed at DNS_LISTEN_HOST
+ENFORCEMENT_BACKEND = "hosts"
+DNS_LISTEN_HOST = "127.0.0.1"
+DNS_LISTEN_PORT = 53
+DNS_UPSTREAM = ("1.1.1.1", 53)
+DNS_UPSTREAM_TIMEOUT = 2.0  # seconds before a forwarded query is answered with SERVFAIL
+DNS_CACHE_SIZE = 10_000  # upstream responses kept by the forwarding cache
+DNS_CACHE_MAX_TTL = 60 * 60  # seconds; upper bound on how long a response is cached
+DNS_ANSWER_MAX_TTL = 60  # seconds; TTL cap handed to clients so OS caches notice new blocks quickly
+DNS_BLOCKED_TTL = 10  # seconds clients may cache a blocked answer
+DNS_TCP_IDLE_TIMEOUT = 10  # seconds an idle TCP client connection is kept open
 
 # Polling settings
-POLL_INTERVAL = 10  # seconds
+POLL_INTERVAL = 10  # seconds; fastest poll, used right after a change
+POLL_INTERVAL_MAX = 120  # seconds; polling backs off to this while nothing changes
+STREAM_POLL_INTERVAL = 300  # seconds between confirmation reads while the stream is live
+SWEEP_INTERVAL_MAX = 60  # seconds; sweeps back off to this while stable, if the exec watcher runs
+SCHEDULER_MAX_SLEEP = 300  # seconds; longest sleep, bounds how late a wall-clock jump is noticed
+RESET_TIMEZONE = None  # IANA zone for the midnight goal reset (e.g. "Europe/Berlin"); None = local
+FETCH_TIMEOUT = 15  # seconds before a network phase is abandoned for this cycle
+NETWORK_WORKERS = 2
+PROFILE_WORKERS = 16  # multi-profile mode: concurrent fetches and hosts edits, and the HTTP pool size
+CONFIG_DEBOUNCE = 0.5  # seconds to coalesce config file events from one save
+HOSTS_GUARD_DEBOUNCE = 1.0  # seconds of quiet after an external hosts edit before it is checked
+EXEC_WATCH_POLL_INTERVAL = 0.1  # seconds, /proc diff fallback for the exec watcher
+
+# Streaming settings
+STREAM_ENABLED = True
+STREAM_READ_TIMEOUT = 90  # seconds; Firebase sends a keep-alive every 30 s
+STREAM_RECONNECT_DELAY = 1  # seconds, doubled (with jitter) after each failed attempt
+STREAM_MAX_RECONNECT_DELAY = 60  # seconds
+
+# Offline resilience settings
+GOAL_CACHE_PATH = BASE_DIR / "last_goal_status.json"
+GOAL_CACHE_TTL = 60 * 60  # seconds a cached goal status may drive enforcement
+GOAL_CACHE_PERSIST_INTERVAL = 60  # seconds between rewrites of an unchanged cache
+BREAKER_FAILURE_THRESHOLD = 3  # consecutive failures before network attempts pause
+BREAKER_BASE_DELAY = 10  # seconds before the first retry once open, doubled per failure
+BREAKER_MAX_DELAY = 15 * 60  # seconds
+
+# Outbound Firebase writes
+WRITE_QUEUE_PATH = BASE_DIR / "pending_writes.json"  # unsent writes, replayed after a restart
+WRITE_QUEUE_DELAY = 0.2  # seconds to let writes issued together join one PATCH
+WRITE_RETRY_BASE_DELAY = 2  # seconds before the first retry, doubled (with jitter) per failure
+WRITE_RETRY_MAX_DELAY = 5 * 60  # seconds
+
+# Block config sync across machines
+CONFIG_SYNC_ENABLED = False  # share apps/sites through Firebase as a versioned log of deltas
+CONFIG_SYNC_PATH = "configSync"  # database node holding head, log and snapshot
+CONFIG_SYNC_STATE_PATH = BASE_DIR / "config_sync.json"  # device id, synced version and base lists
+CONFIG_SYNC_INTERVAL = 60  # seconds between sync polls while the head stream is down
+CONFIG_SYNC_COMPACT_EVERY = 100  # versions between snapshots; older log entries are pruned
+CONFIG_SYNC_MAX_ATTEMPTS = 5  # conflicting pushes (another device took the version) before giving up
+
+# Workout history
+HISTORY_DIR = BASE_DIR / "history"  # daily sample segments and the day index
+HISTORY_RETENTION_DAYS = 400  # days raw samples are kept; daily totals are kept indefinitely
+HISTORY_MAX_BUCKETS = 400  # most buckets one /history query may return
@@ -1,280 +1,669 @@
 import os
 import sys
 import time
-import json
-import psutil
+import asyncio
 import signal
-import requests
-from datetime import datetime, date
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+import traceback
 from pathlib import Path
-
-from backend.config.constants import HEARTBEAT_FILE, LOG_FILE, CURRENT_WORKOUT_PATH, POLL_INTERVAL, GOAL_STATUS_PATH
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from backend.config.constants import (
+    HEARTBEAT_FILE, LOG_FILE, CURRENT_WORKOUT_PATH, POLL_INTERVAL, GOAL_STATUS_PATH,
+    BLOCKED_CONFIG_PATH,
+    STREAM_ENABLED, WATCHED_KEYS, FETCH_TIMEOUT, NETWORK_WORKERS, CONFIG_DEBOUNCE, HOSTS_GUARD_DEBOUNCE,
+    POLL_INTERVAL_MAX, STREAM_POLL_INTERVAL, SWEEP_INTERVAL_MAX,
+    SCHEDULER_MAX_SLEEP, RESET_TIMEZONE, ENFORCEMENT_BACKEND,
+    CONFIG_SYNC_ENABLED, CONFIG_SYNC_PATH, CONFIG_SYNC_INTERVAL,
+)
 from backend.utils.logger import Logger
 from backend.utils.exceptions import PollerError
 from backend.services.config_manager import ConfigManager
 from backend.services.firebase_service import FirebaseService
+from backend.services.resilience import LastKnownStatus, ResilientGoalStatus
+from backend.services.scheduler import Scheduler, AdaptiveInterval, next_midnight, resolve_timezone
+from backend.services.firebase_stream import FirebaseStream
+from backend.services.http_client import FirebaseClient
+from backend.services.write_queue import FirebaseWriteQueue
 from backend.services.process_manager import ProcessManager
 from backend.services.hosts_manager import HostsManager
+from backend.services.reconciler import Reconciler, EnforcementState
+from backend.services.policy import summarize_rules
+from backend.services.status_server import StatusBroadcaster, StatusServer
+from backend.services.timeseries import TimeSeriesStore
+from backend.utils.files import atomic_write_json
+from backend.utils.metrics import PHASE_SECONDS, CYCLES, LAST_CYCLE, FIREBASE_ERRORS
+from backend.utils.tracing import CycleProfiler, traced
+
+class ConfigChangeHandler:
+    """Watchdog handler that reports edits to the block config.
+
+    Implements the ``dispatch`` hook watchdog calls instead of subclassing
+    its FileSystemEventHandler, so watchdog is only imported once the
+    watcher is started.
+    """
 
-# === Constants ===
-HOSTS_PATH = "/etc/hosts"
-REDIRECT_IP = "127.0.0.1"
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-BLOCKED_CONFIG_PATH = os.path.join(BASE_DIR, 'frontend', 'blocked_config.json')
-DATABASE_URL = "https://nopainnogameapp-default-rtdb.firebaseio.com/.json"
-last_reset_date = date.today()
-last_blocked_sites = set()
-
-# === Utility Functions ===
-
-def log_event(message):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    full_message = f"[{timestamp}] {message}"
-    print(full_message)
-    with open(LOG_FILE, "a") as f:
-        f.write(full_message + "\n")
-
-
-def display_notification(message, title=None, subtitle=None, soundname=None):
-    parts = [
-        f'with title "{title}"' if title else '',
-        f'subtitle "{subtitle}"' if subtitle else '',
-        f'sound name "{soundname}"' if soundname else ''
-    ]
-    script = f'display notification "{message}" {" ".join(parts)}'
-    os.system(f"osascript -e '{script}'")
-
-
-def expand_site_list(sites):
-    return list({site for s in sites for site in (s, f"www.{s}" if not s.startswith("www.") else s)})
-
-
-def load_block_config():
-    try:
-        with open(BLOCKED_CONFIG_PATH, "r") as f:
-            config = json.load(f)
-            return config.get("apps", []), config.get("sites", [])
-    except Exception as e:
-        log_event(f"⚠️ Failed to load block config: {e}")
-        return [], []
-
-
-def get_goal_status():
-    try:
-        response = requests.get(DATABASE_URL)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        log_event(f"❌ Error contacting Firebase: {e}")
-        return None
-
-def block_websites(sites):
-    sites = expand_site_list(sites)
-    log_event("🔒 Blocking distracting websites.")
-
-    try:
-        with open(HOSTS_PATH, "r+") as file:
-            content = file.read()
-            file.seek(0)
-            for site in sites:
-                for entry in (f"{REDIRECT_IP} {site}", f"::1 {site}"):
-                    if entry not in content:
-                        file.write(entry + "\n")
-            file.write(content)
-    except PermissionError:
-        log_event("❌ Permission denied while modifying /etc/hosts. Try running with sudo.")
-    except Exception as e:
-        log_event(f"❌ Failed to block websites: {e}")
-
+    def __init__(self, poller):
+        self.poller = poller
 
-def unblock_websites(sites):
-    sites = expand_site_list(sites)
-    log_event("🔓 Unblocking distracting websites.")
+    def dispatch(self, event) -> None:
+        handler = getattr(self, f"on_{event.event_type}", None)
+        if handler is not None:
+            handler(event)
 
-    try:
-        with open(HOSTS_PATH, "r") as file:
-            lines = file.readlines()
-
-        with open(HOSTS_PATH, "w") as file:
-            for line in lines:
-                stripped = line.strip()
-                if not any(
-                    stripped.startswith(f"{ip} {site}") or stripped.startswith(f"{ip} www.{site}")
-                    for site in sites
-                    for ip in (REDIRECT_IP, "::1")
-                ):
-                    file.write(line)
-    except PermissionError:
-        log_event("❌ Permission denied while modifying /etc/hosts. Try running with sudo.")
-    except Exception as e:
-        log_event(f"❌ Failed to unblock websites: {e}")
+    def on_modified(self, event):
+        if event.src_path == str(self.poller.config_manager.config_path):
+            self.poller.handle_config_change()
 
+    def on_created(self, event):
+        self.on_modified(event)
 
-def block_apps(apps):
-    found = False
-    for proc in psutil.process_iter(attrs=['pid', 'name']):
-        try:
-            name = proc.info['name']
-            if any(app.lower() in name.lower() for app in apps):
-                os.kill(proc.info['pid'], signal.SIGKILL)
-                log_event(f"💣 Force-killed: {name}")
-                found = True
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-
-    if found:
-        display_notification(
-            "Please complete your goals before using blocked applications.",
-            title="Applications Blocked",
-            soundname="Pop"
-        )
-        log_event("💣 Applications blocked.")
-    else:
-        log_event("ℹ️ No blocked apps were running.")
+    def on_moved(self, event):
+        if event.dest_path == str(self.poller.config_manager.config_path):
+            self.poller.handle_config_change()
 
 
-def unblock_apps(apps):
-    log_event("✅ unblock_apps() called – nothing to do.")
+class HostsChangeHandler(ConfigChangeHandler):
+    """Watchdog handler that reports changes to the hosts file.
 
+    The file is replaced by rename (by us and by most editors), so the
+    directory is watched and events are matched on the resolved path.
+    """
 
-def reset_goal_in_firebase():
-    try:
-        response = requests.put(
-            DATABASE_URL,
-            json=False,
-            headers={"Content-Type": "application/json"},
-        )
-        if response.ok:
-            log_event("🕛 Reset goalReachedToday to false at midnight.")
-        else:
-            log_event(f"❌ Failed to reset goal: {response.text}")
-    except Exception as e:
-        log_event(f"❌ Exception during goal reset: {e}")
+    def __init__(self, poller, path: str):
+        super().__init__(poller)
+        self.path = path
 
+    def on_modified(self, event):
+        if event.src_path == self.path:
+            self.poller.handle_hosts_change()
 
-class ConfigChangeHandler(FileSystemEventHandler):
-    def __init__(self, poller):
-        self.poller = poller
+    def on_deleted(self, event):
+        self.on_modified(event)
 
-    def on_modified(self, event):
-        if event.src_path == str(self.poller.config_manager.config_path):
-            self.poller.handle_config_change()
+    def on_moved(self, event):
+        if event.dest_path == self.path:
+            self.poller.handle_hosts_change()
 
 
 class FirebasePoller:
     def __init__(self):
         self.logger = Logger(Path(LOG_FILE))
         self.config_manager = ConfigManager(Path(BLOCKED_CONFIG_PATH), self.logger)
-        self.firebase_service = FirebaseService(self.logger)
+        self.firebase_client = FirebaseClient()
+        self.write_queue = FirebaseWriteQueue(self.logger, self.firebase_client)
+        self.firebase_service = FirebaseService(self.logger, self.firebase_client,
+                                                writes=self.write_queue)
+        self.reset_tz = resolve_timezone(RESET_TIMEZONE)
+        self.goal_status = ResilientGoalStatus(self.logger, self.firebase_service,
+                                               LastKnownStatus(tz=self.reset_tz))
+        self.firebase_stream = FirebaseStream(self.logger, self.firebase_client) if STREAM_ENABLED else None
+        self.config_sync = None
+        self.sync_stream = None
+        if CONFIG_SYNC_ENABLED:
+            from backend.services.config_sync import ConfigSync
+            self.config_sync = ConfigSync(self.logger, self.config_manager, self.firebase_client)
+            if STREAM_ENABLED:
+                # Only the head is streamed; deltas are read once it moves.
+                self.sync_stream = FirebaseStream(self.logger, self.firebase_client,
+                                                  path=f"{CONFIG_SYNC_PATH}/head", keys=("version",))
         self.process_manager = ProcessManager(self.logger)
-        self.hosts_manager = HostsManager(self.logger)
+        self.dns_stub = None
+        if ENFORCEMENT_BACKEND == "dns":
+            from backend.services.dns_stub import DnsStub
+            self.dns_stub = DnsStub(self.logger)
+        self.hosts_manager = self.dns_stub or HostsManager(self.logger)
+        self.reconciler = Reconciler(self.logger, self.process_manager, self.hosts_manager)
+        self.scheduler = Scheduler()
+        self.profiler = CycleProfiler(self.logger)
+        self.history = TimeSeriesStore(self.logger, tz=self.reset_tz)
+        self.status = StatusBroadcaster()
+        self.status_server = StatusServer(self.logger, self.status, self.history)
+        self.fetch_interval = AdaptiveInterval(POLL_INTERVAL, POLL_INTERVAL_MAX)
+        self.sweep_interval = AdaptiveInterval(POLL_INTERVAL, SWEEP_INTERVAL_MAX)
         self.last_state = None
+        self._last_desired: Optional[EnforcementState] = None
+        self._policy_change: Optional[float] = None
+        self.cycle = 0
+        self.started_at = time.time()
+        self._written: Dict[Path, Any] = {}
+        self._latest: Optional[Dict[str, Any]] = None
+        self._config_version = 0
+        self._config_timer: Optional[asyncio.TimerHandle] = None
+        self._hosts_timer: Optional[asyncio.TimerHandle] = None
+        self._observer = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_requested = False
+        self._events: Dict[str, asyncio.Event] = {}
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending: Dict[str, Tuple[Callable[..., Any], Any]] = {}
 
     def setup_heartbeat(self) -> None:
         """Create the heartbeat file to indicate the poller is running."""
         try:
-            with open(HEARTBEAT_FILE, "w") as f:
-                f.write("✅ Poller is running\n")
+            self.write_heartbeat()
             self.logger.info("Heartbeat file written.")
         except Exception as e:
             self.logger.error(f"Failed to write heartbeat: {e}")
             raise PollerError(f"Failed to write heartbeat: {e}")
 
+    def write_heartbeat(self) -> None:
+        """Refresh the heartbeat file with the cycle counter and timestamps.
+
+        Written as each enforcement cycle completes, so it goes stale when the
+        cycles stop, even if the event loop itself is still running.
+        """
+        atomic_write_json(HEARTBEAT_FILE, {
+            "status": "running",
+            "pid": os.getpid(),
+            "cycle": self.cycle,
+            "started_at": self.started_at,
+            "timestamp": time.time(),
+            "monotonic": time.monotonic(),
+        })
+
     def cleanup(self) -> None:
         """Clean up resources when shutting down."""
         self.logger.info("Cleaning up... unblocking apps and websites.")
         apps, sites = self.config_manager.load_config()
         self.process_manager.unblock_apps(apps)
         self.hosts_manager.clear_all_blocked_sites(skip_poller_check=True)
+        self.reconciler.invalidate()
 
         if Path(HEARTBEAT_FILE).exists():
             Path(HEARTBEAT_FILE).unlink()
             self.logger.info("Heartbeat file removed.")
 
     def handle_config_change(self) -> None:
-        """Handle changes to the configuration file."""
+        """Handle changes to the configuration file.
+
+        Called from the watchdog thread. Bursts of events from a single
+        save are coalesced for CONFIG_DEBOUNCE seconds before the next
+        enforcement pass picks up the new snapshot.
+        """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._debounce_config_change)
+
+    def handle_hosts_change(self) -> None:
+        """Handle a change to the hosts file, ours or someone else's.
+
+        Called from the watchdog thread. Events are debounced for
+        HOSTS_GUARD_DEBOUNCE seconds, then the managed block is verified
+        on the hosts executor and re-applied only if it was altered.
+        """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._debounce_hosts_change)
+
+    def guard_hosts(self) -> None:
+        """Hosts phase: re-apply the managed block if it no longer matches what was written."""
+        desired = self._last_desired
+        if desired is None or self.hosts_manager.verify():
+            return
+        self.logger.warning("Hosts file was edited outside the poller; re-applying blocked sites.")
+        self.reconciler.invalidate_sites()
+        self.reconciler.reconcile_sites(desired)
+
+    def sync_config(self) -> None:
+        """Network phase: exchange block config deltas with other machines.
+
+        Remote changes land in the config file, so the watcher reloads them
+        and the next enforcement pass applies only what changed.
+        """
         try:
-            apps, sites = self.config_manager.load_config()
-            self.logger.info("Block config updated.")
-            self.logger.info(f"Apps to block: {apps}")
-            self.logger.info(f"Sites to block: {sites}")
-
-            if self.firebase_service.get_goal_status() is False:
-                self.process_manager.block_apps(apps)
-                self.hosts_manager.block_websites(sites)
+            self.config_sync.sync()
         except Exception as e:
-            self.logger.error(f"Failed to reload config: {e}")
+            FIREBASE_ERRORS.inc(operation="config_sync")
+            self.logger.warning(f"Config sync failed: {e}")
+
+    def _start_config_watcher(self) -> None:
+        """Watch the config directory, and the hosts file when it is enforced (imports watchdog on first use)."""
+        from watchdog.observers import Observer
+
+        observer = Observer()
+        observer.schedule(ConfigChangeHandler(self), path=str(self.config_manager.config_path.parent),
+                          recursive=False)
+        if self.dns_stub is None:
+            hosts_path = os.path.realpath(self.hosts_manager.hosts_path)
+            observer.schedule(HostsChangeHandler(self, hosts_path), path=os.path.dirname(hosts_path),
+                              recursive=False)
+        observer.start()
+        self._observer = observer
+
+    def _debounce_config_change(self) -> None:
+        """Restart the debounce timer for a config change (runs on the loop)."""
+        if self._config_timer is not None:
+            self._config_timer.cancel()
+        self._config_timer = self._loop.call_later(CONFIG_DEBOUNCE, self._config_settled)
+
+    def _config_settled(self) -> None:
+        """Enforce a saved config change and offer it to the other machines (runs on the loop)."""
+        self._events["enforce"].set()
+        if self.config_sync is not None:
+            self._events["sync"].set()
+
+    def _debounce_hosts_change(self) -> None:
+        """Restart the debounce timer for a hosts change (runs on the loop)."""
+        if self._hosts_timer is not None:
+            self._hosts_timer.cancel()
+        self._hosts_timer = self._loop.call_later(
+            HOSTS_GUARD_DEBOUNCE, self._run_background, "Hosts guard", "hosts", self.guard_hosts)
+
+    def _write_if_changed(self, path: Path, data: Dict[str, Any]) -> None:
+        """Atomically write a frontend JSON file, skipping unchanged content."""
+        if self._written.get(path) == data:
+            return
+        atomic_write_json(path, data)
+        self._written[path] = data
 
     def update_workout_minutes(self, minutes: int) -> None:
         """Update the current workout minutes in the frontend."""
         try:
-            with open(CURRENT_WORKOUT_PATH, "w") as f:
-                json.dump({"minutes": minutes}, f)
+            self._write_if_changed(CURRENT_WORKOUT_PATH, {"minutes": minutes})
         except Exception as e:
             self.logger.error(f"Failed to update workout minutes: {e}")
 
     def update_goal_status(self, status: bool) -> None:
         """Update the goal status in the frontend."""
         try:
-            with open(GOAL_STATUS_PATH, "w") as f:
-                json.dump({"goalReachedToday": status}, f)
+            self._write_if_changed(GOAL_STATUS_PATH, {"goalReachedToday": status})
         except Exception as e:
             self.logger.error(f"Failed to update goal status: {e}")
 
+    def fetch_goal_status(self) -> Dict[str, Any]:
+        """Return goal data from the stream mirror, polling Firebase as a fallback.
+
+        Either way our own unsent writes are overlaid. While Firebase is
+        unreachable the last known status is used until it goes stale.
+        """
+        if self.firebase_stream is not None:
+            data = self.firebase_stream.snapshot()
+            if data is not None:
+                data = self.firebase_service.with_pending(data)
+                self.goal_status.remember(data)
+                return data
+        return self.goal_status.get_goal_status()
+
+    @traced()
+    def fetch_cycle(self) -> Dict[str, Any]:
+        """Network phase: read goal status."""
+        self.firebase_client.begin_cycle()
+        with PHASE_SECONDS.time(phase="fetch"):
+            data = self.fetch_goal_status()
+        self.record_history(data)
+        return data
+
+    def record_history(self, data: Dict[str, Any]) -> None:
+        """Append live workout minutes to the local history; cached status is not a new sample."""
+        minutes = data.get("workoutMinutesToday")
+        if self.goal_status.source != ResilientGoalStatus.LIVE or \
+                not isinstance(minutes, (int, float)) or isinstance(minutes, bool):
+            return
+        try:
+            self.history.append(self.scheduler.clock.time(), float(minutes))
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Failed to record workout history: {e}")
+
+    @traced()
+    def reset_cycle(self) -> None:
+        """The daily goal reset, run at midnight by the scheduler.
+
+        Only queued here; the write queue delivers it in the background and
+        drops it if it is still unsent at the following midnight.
+        """
+        self.firebase_service.reset_goal(
+            expires_at=next_midnight(self.scheduler.clock.time(), self.reset_tz))
+
+    @traced()
+    def prepare_cycle(self, data: Dict[str, Any]) -> Optional[EnforcementState]:
+        """File phase: load config, publish status files and compute desired state."""
+        status = data.get("goalReachedToday", False)
+        current_minutes = data.get("workoutMinutesToday", 0)
+        with PHASE_SECONDS.time(phase="config_load"):
+            config = self.config_manager.snapshot()
+        if config.version != self._config_version:
+            self._config_version = config.version
+            self.logger.info("Block config updated.")
+            self.logger.info("Apps to block: %s", list(config.apps))
+            self.logger.info("Sites to block: %s", list(config.sites))
+            if config.raw.get("rules"):
+                for line in summarize_rules(config.policy.rules):
+                    self.logger.info("Rule: %s", line)
+
+        with PHASE_SECONDS.time(phase="file_writes"):
+            self.update_workout_minutes(current_minutes)
+            self.update_goal_status(status)
+        self.cycle += 1
+        CYCLES.inc()
+        LAST_CYCLE.set(time.time())
+        with PHASE_SECONDS.time(phase="file_writes"):
+            self._refresh_heartbeat()
+        self.last_state = status
+        now = self.scheduler.clock.time()
+        self._policy_change = config.policy.next_change(now)
+        return EnforcementState.from_config(status, config, now, current_minutes)
+
+    @traced()
+    def enforce_sites(self, desired: EnforcementState) -> None:
+        """Hosts phase: reconcile blocked sites."""
+        with PHASE_SECONDS.time(phase="hosts_edit"):
+            self.reconciler.reconcile_sites(desired)
+
+    @traced()
+    def enforce_apps(self, desired: EnforcementState) -> None:
+        """Process phase: sweep or release blocked apps."""
+        with PHASE_SECONDS.time(phase="process_scan"):
+            self.reconciler.reconcile_apps(desired)
+
+    def toggle_profiling(self) -> None:
+        """Profile and trace the next PROFILE_CYCLES cycles, or end a running session.
+
+        Safe to call from signal handlers and other threads: the toggle runs
+        on the event loop, which never holds the profiler's lock when it
+        picks it up.
+        """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.profiler.toggle)
+        else:
+            self.profiler.toggle()
+
     def run(self) -> None:
-        """Main polling loop."""
-        self.logger.info("Starting Firebase poller...")
-        self.setup_heartbeat()
+        """Run the poller event loop until stop() is called."""
+        asyncio.run(self.run_async())
 
-        # Setup config file watcher
-        event_handler = ConfigChangeHandler(self)
-        observer = Observer()
-        observer.schedule(event_handler, path=str(self.config_manager.config_path.parent), recursive=False)
-        observer.start()
+    def stop(self) -> None:
+        """Request shutdown; safe to call from signal handlers and other threads.
+
+        A request made before the loop is running is kept, and the loop
+        stops as soon as it starts.
+        """
+        self._stop_requested = True
+        self._signal("stop")
 
+    async def run_async(self) -> None:
+        """Main polling loop: network, enforcement and file phases as cooperating tasks."""
+        self.logger.info("Starting Firebase poller...")
+        self._events = {name: asyncio.Event()
+                        for name in ("stop", "fetch", "enforce", "schedule", "sync")}
+        self._loop = asyncio.get_running_loop()
+        if self._stop_requested:
+            self._events["stop"].set()
+        self._executors = {
+            "network": ThreadPoolExecutor(NETWORK_WORKERS, thread_name_prefix="poller-network"),
+            "files": ThreadPoolExecutor(1, thread_name_prefix="poller-files"),
+            "hosts": ThreadPoolExecutor(1, thread_name_prefix="poller-hosts"),
+            "process": ThreadPoolExecutor(1, thread_name_prefix="poller-process"),
+        }
+        self.profiler.executor = self._executors["files"]
+        self.setup_heartbeat()
+        self.status_server.start()
+        self.write_queue.start()
+        if self.dns_stub is not None:
+            self.dns_stub.start()
+
+        # The config watcher is not needed for the first enforcement; start it alongside.
+        self._run_background("Config watcher start", "network", self._start_config_watcher)
+        if self.firebase_stream is not None:
+            self.firebase_stream.on_change = lambda: self._signal("fetch")
+            self.firebase_stream.start()
+        if self.sync_stream is not None:
+            self.sync_stream.on_change = lambda: self._signal("sync")
+            self.sync_stream.start()
+
+        # Enforce from the last known status right away; the first fetch confirms it.
+        self._latest = self.goal_status.cache.fresh()
+        if self._latest is not None:
+            self._events["enforce"].set()
+        self._schedule("fetch", 0)
+        if self.config_sync is not None:
+            self._schedule("sync", 0)
+        self._schedule_reset()
+        stop = asyncio.create_task(self._events["stop"].wait(), name="stop")
+        tasks = [
+            asyncio.create_task(self._schedule_loop(), name="schedule"),
+            asyncio.create_task(self._fetch_loop(), name="fetch"),
+            asyncio.create_task(self._enforce_loop(), name="enforce"),
+        ]
+        if self.config_sync is not None:
+            tasks.append(asyncio.create_task(self._sync_loop(), name="sync"))
         try:
-            while True:
-                data = self.firebase_service.get_goal_status() or {}
-                status = data.get("goalReachedToday", False)
-                current_minutes = data.get("workoutMinutesToday", 0)
-                apps, sites = self.config_manager.load_config()
-
-                # Update workout minutes and goal status
-                self.update_workout_minutes(current_minutes)
-                self.update_goal_status(status)
-
-                # Reset Firebase daily
-                if self.firebase_service.should_reset_goal():
-                    self.firebase_service.reset_goal()
-
-                # Handle blocking/unblocking based on status
-                if status is False:
-                    self.logger.info(f"Detected goalReachedToday: {status}")
-                    self.process_manager.block_apps(apps)
-                    self.hosts_manager.block_websites(sites)
-                elif status is True:
-                    self.process_manager.unblock_apps(apps)
-                    self.hosts_manager.unblock_websites(sites)
-
-                self.last_state = status
-                time.sleep(POLL_INTERVAL)
+            done, _ = await asyncio.wait(tasks + [stop], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is not stop and task.exception():
+                    raise task.exception()
         finally:
-            observer.stop()
-            observer.join()
+            for task in tasks + [stop]:
+                task.cancel()
+            await asyncio.gather(*tasks, stop, return_exceptions=True)
+            self.profiler.executor = None
+            for executor in self._executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+            if self.firebase_stream is not None:
+                self.firebase_stream.stop()
+            if self.sync_stream is not None:
+                self.sync_stream.stop()
+            if self._observer is not None:
+                self._observer.stop()
+                self._observer.join()
+                self._observer = None
+            self.status_server.stop()
+            if self.dns_stub is not None:
+                self.dns_stub.stop()
+            self.write_queue.stop()
+            self.process_manager.notifier.stop()
+            self.firebase_client.close()
+            self.history.close()
+            self._loop = None
+
+    async def _schedule_loop(self) -> None:
+        """Sleep until the next deadline, then fire every job that is due."""
+        while True:
+            delay = self.scheduler.time_until_next()
+            self._events["schedule"].clear()
+            await self._wait("schedule", SCHEDULER_MAX_SLEEP if delay is None
+                             else min(delay, SCHEDULER_MAX_SLEEP))
+            for job in self.scheduler.pop_due():
+                if job == "reset":
+                    self._schedule_reset()
+                    self._run_background("Goal reset", "network", self.reset_cycle) \
+                        .add_done_callback(lambda _: self._signal("fetch"))
+                else:
+                    self._events[job].set()
+
+    async def _fetch_loop(self) -> None:
+        """Fetch goal status on every stream change or when the poll deadline is due."""
+        while True:
+            await self._events["fetch"].wait()
+            self._events["fetch"].clear()
+            try:
+                data = await asyncio.wait_for(
+                    self._loop.run_in_executor(self._executors["network"],
+                                               self.profiler.call, self.fetch_cycle),
+                    FETCH_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                self.logger.warning("Firebase fetch timed out; keeping last known status.")
+                self.fetch_interval.reset()
+            except Exception:
+                self.logger.error("Fetch cycle failed; keeping last known status.\n%s",
+                                  traceback.format_exc())
+                self.fetch_interval.reset()
+            else:
+                if data != self._latest:
+                    self.fetch_interval.reset()
+                else:
+                    self.fetch_interval.backoff()
+                self._latest = data
+                self.status.publish(goalStatusSource=self.goal_status.source,
+                                    **{key: data.get(key) for key in WATCHED_KEYS})
+                self._events["enforce"].set()
+            self._schedule("fetch", self._next_fetch_delay())
+
+    async def _enforce_loop(self) -> None:
+        """Reconcile enforcement on new status, config changes or the sweep deadline."""
+        while True:
+            await self._events["enforce"].wait()
+            self._events["enforce"].clear()
+            if self._latest is None:
+                continue
+            try:
+                desired = await self._loop.run_in_executor(
+                    self._executors["files"], self.profiler.call, self.prepare_cycle, self._latest
+                )
+                if desired is not None:
+                    self._dispatch("hosts", self.enforce_sites, desired)
+                    self._dispatch("process", self.enforce_apps, desired)
+            except Exception:
+                self.logger.error("Enforcement cycle failed; retrying at the next sweep.\n%s",
+                                  traceback.format_exc())
+                self.sweep_interval.reset()
+            else:
+                if desired != self._last_desired:
+                    self.sweep_interval.reset()
+                else:
+                    self._backoff_sweep()
+                self._last_desired = desired
+            self._schedule("enforce", self._next_enforce_delay())
+            self.profiler.cycle_done()
+
+    async def _sync_loop(self) -> None:
+        """Sync the block config on local saves, on head changes, or when the poll deadline is due."""
+        while True:
+            await self._events["sync"].wait()
+            self._events["sync"].clear()
+            try:
+                await asyncio.wait_for(
+                    self._loop.run_in_executor(self._executors["network"], self.sync_config),
+                    FETCH_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                self.logger.warning("Config sync timed out; retrying at the next poll.")
+            live = self.sync_stream is not None and self.sync_stream.connected
+            self._schedule("sync", STREAM_POLL_INTERVAL if live else CONFIG_SYNC_INTERVAL)
+
+    def _next_fetch_delay(self) -> float:
+        """Poll delay: long while the stream is live, adaptive otherwise.
+
+        The adaptive interval is tightened so the next poll lands right after
+        a known change point, such as the cached status expiring.
+        """
+        if self.firebase_stream is not None and self.firebase_stream.connected:
+            return STREAM_POLL_INTERVAL
+        return self.fetch_interval.until(self.goal_status.next_change())
+
+    def _backoff_sweep(self) -> None:
+        """Stretch the sweep interval; past POLL_INTERVAL only while the exec watcher kills launches."""
+        watcher = self.process_manager.exec_watcher
+        self.sweep_interval.maximum = \
+            SWEEP_INTERVAL_MAX if watcher is not None and watcher.running else POLL_INTERVAL
+        self.sweep_interval.backoff()
+
+    def _next_enforce_delay(self) -> float:
+        """Sweep delay, cut short so enforcement runs as soon as a policy window opens or closes."""
+        if self._policy_change is None:
+            return self.sweep_interval.current
+        return max(0.0, min(self.sweep_interval.current,
+                            self._policy_change - self.scheduler.clock.time()))
+
+    def _schedule(self, job: str, delay: float) -> None:
+        """(Re)schedule a job and wake the scheduler so it sees the new deadline."""
+        self.scheduler.schedule(job, delay)
+        self._events["schedule"].set()
+
+    def _schedule_reset(self) -> None:
+        """Schedule the goal reset for the next midnight in RESET_TIMEZONE."""
+        self.scheduler.schedule_at("reset", next_midnight(self.scheduler.clock.time(), self.reset_tz))
+        self._events["schedule"].set()
+
+    def _refresh_heartbeat(self) -> None:
+        try:
+            self.write_heartbeat()
+        except OSError as e:
+            self.logger.error(f"Failed to refresh heartbeat: {e}")
 
+    async def _wait(self, name: str, timeout: float) -> None:
+        """Wait for an event to be set or for the timeout to elapse."""
+        try:
+            await asyncio.wait_for(self._events[name].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _signal(self, name: str) -> None:
+        """Set a loop event from any thread."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._events[name].set)
+
+    def _run_background(self, name: str, executor: str, fn: Callable[[], Any]) -> asyncio.Future:
+        """Run fn() on an executor without awaiting it; a failure is logged."""
+        future = self._loop.run_in_executor(self._executors[executor], fn)
+        future.add_done_callback(lambda f: self._background_done(name, f))
+        return future
+
+    def _background_done(self, name: str, future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.error(f"{name} failed: {future.exception()}")
+
+    def _dispatch(self, phase: str, fn: Callable[..., Any], arg: Any) -> None:
+        """Run fn(arg) on the phase executor, keeping at most one run in flight.
+
+        While a previous run is still busy only the latest request is kept,
+        so a slow phase never builds a backlog or delays the other phases.
+        """
+        running = self._inflight.get(phase)
+        if running is not None and not running.done():
+            self._pending[phase] = (fn, arg)
+            return
+        future = self._loop.run_in_executor(self._executors[phase], self.profiler.call, fn, arg)
+        future.add_done_callback(lambda f: self._phase_done(phase, f))
+        self._inflight[phase] = future
+
+    def _phase_done(self, phase: str, future: asyncio.Future) -> None:
+        """Log a failed phase and start its pending run, if any."""
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.error(f"{phase} phase failed: {future.exception()}")
+        pending = self._pending.pop(phase, None)
+        if pending is not None and not self._events["stop"].is_set():
+            self._dispatch(phase, *pending)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the poller until SIGINT/SIGTERM, then release all enforcement."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Enforce workout goals by blocking apps and sites.")
+    parser.add_argument("--profiles", metavar="PATH",
+                        help="serve every profile listed in PATH from this one process")
+    args = parser.parse_args(argv)
+    if args.profiles:
+        from backend.multi_poller import MultiProfilePoller
+        poller = MultiProfilePoller(Path(args.profiles))
+    else:
+        poller = FirebasePoller()
 
-if __name__ == "__main__":
-    poller = FirebasePoller()
+    def graceful_exit(signum, frame):
+        """Handle SIGINT and SIGTERM by stopping the event loop."""
+        poller.logger.info("Received exit signal. Cleaning up...")
+        poller.stop()
 
-    # Setup signal handlers
     signal.signal(signal.SIGINT, graceful_exit)
     signal.signal(signal.SIGTERM, graceful_exit)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: poller.toggle_profiling())
 
     try:
         poller.run()
     except Exception as e:
         poller.logger.error(f"Fatal error: {e}")
         poller.cleanup()
-        sys.exit(1)
+        return 1
+
+    poller.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import os
+import time
+import asyncio
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from backend.config.constants import (
+    HEARTBEAT_FILE, LOG_FILE, POLL_INTERVAL, POLL_INTERVAL_MAX, RESET_TIMEZONE,
+    PROFILE_WORKERS, FETCH_TIMEOUT,
+)
+from backend.utils.logger import Logger
+from backend.utils.exceptions import PollerError
+from backend.services.http_client import FirebaseClient
+from backend.services.write_queue import FirebaseWriteQueue
+from backend.services.process_manager import ProcessManager
+from backend.services.profiles import HostsTarget, ProfileRuntime, load_profiles
+from backend.services.reconciler import Reconciler, EnforcementState
+from backend.services.process_scanner import AppMatcher
+from backend.services.resilience import CircuitBreaker
+from backend.services.scheduler import AdaptiveInterval, next_midnight, resolve_timezone
+from backend.utils.files import atomic_write_json
+from backend.utils.metrics import PHASE_SECONDS, CYCLES, LAST_CYCLE
+from backend.utils.tracing import CycleProfiler
+
+
+class MultiProfilePoller:
+    """Serve many profiles (users or devices) from one process.
+
+    Each round fetches every profile's goal status concurrently over one
+    pooled HTTP client, reconciles each hosts file that a profile with a
+    changed desired state names (merging all profiles on that file), and
+    sweeps processes once for the union of apps blocked by any profile. The
+    HTTP pool, circuit breaker, process scanner, and configs and hosts files
+    shared by several profiles are created once, so a profile only adds its
+    own small state.
+    """
+
+    def __init__(self, profiles_path: Path, client: Optional[FirebaseClient] = None):
+        self.logger = Logger(Path(LOG_FILE))
+        self.firebase_client = client or FirebaseClient(pool_size=PROFILE_WORKERS)
+        self.process_manager = ProcessManager(self.logger)
+        self.breaker = CircuitBreaker()
+        # One queue for every profile: the midnight resets go out as a single PATCH.
+        self.write_queue = FirebaseWriteQueue(self.logger, self.firebase_client)
+        self.reset_tz = resolve_timezone(RESET_TIMEZONE)
+        self.profiles: List[ProfileRuntime] = ProfileRuntime.build(
+            load_profiles(profiles_path), self.logger, self.firebase_client,
+            self.process_manager, self.breaker, self.write_queue, self.reset_tz,
+        )
+        self.hosts_targets: List[HostsTarget] = list(dict.fromkeys(
+            runtime.hosts for runtime in self.profiles))
+        self._retry_hosts: List[HostsTarget] = []
+        # Apps are swept once for all profiles, so this reconciler never edits hosts.
+        self.apps_reconciler = Reconciler(self.logger, self.process_manager, None)
+        self.interval = AdaptiveInterval(POLL_INTERVAL, POLL_INTERVAL_MAX)
+        self.cycle = 0
+        self.started_at = time.time()
+        self._apps: Optional[EnforcementState] = None
+        self._executor = ThreadPoolExecutor(PROFILE_WORKERS, thread_name_prefix="profiles")
+        self.profiler = CycleProfiler(self.logger, executor=self._executor)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._stop_requested = False
+
+    def write_heartbeat(self) -> None:
+        """Refresh the heartbeat file with the cycle counter and profile count."""
+        atomic_write_json(HEARTBEAT_FILE, {
+            "status": "running",
+            "pid": os.getpid(),
+            "cycle": self.cycle,
+            "profiles": len(self.profiles),
+            "started_at": self.started_at,
+            "timestamp": time.time(),
+            "monotonic": time.monotonic(),
+        })
+
+    def cleanup(self) -> None:
+        """Release enforcement for every profile and remove the heartbeat."""
+        self.logger.info(f"Cleaning up... unblocking apps and websites for {len(self.profiles)} profiles.")
+        self.process_manager.unblock_apps([])
+        for target in self.hosts_targets:
+            try:
+                target.hosts_manager.clear_all_blocked_sites(skip_poller_check=True)
+            except PollerError as e:
+                self.logger.error(f"Failed to clear {target.hosts_manager.hosts_path}: {e}")
+            target.reconciler.invalidate()
+        for runtime in self.profiles:
+            runtime.desired = None
+        self.apps_reconciler.invalidate()
+        self._apps = None
+
+        if Path(HEARTBEAT_FILE).exists():
+            Path(HEARTBEAT_FILE).unlink()
+            self.logger.info("Heartbeat file removed.")
+
+    async def poll_once(self) -> int:
+        """Fetch all profiles and reconcile those that changed; return how many did."""
+        loop = asyncio.get_running_loop()
+        self.firebase_client.begin_cycle()
+        with PHASE_SECONDS.time(phase="fetch"):
+            statuses = await asyncio.wait_for(asyncio.gather(*(
+                loop.run_in_executor(self._executor, self.profiler.call, runtime.fetch)
+                for runtime in self.profiles
+            )), FETCH_TIMEOUT)
+
+        changed = []
+        with PHASE_SECONDS.time(phase="config_load"):
+            for runtime, data in zip(self.profiles, statuses):
+                if runtime.update(data) is not None:
+                    changed.append(runtime)
+
+        # One edit per hosts file, however many of its profiles changed.
+        targets = dict.fromkeys(self._retry_hosts + [runtime.hosts for runtime in changed])
+        edits = [(target, target.desired()) for target in targets]
+        edits = [(target, desired) for target, desired in edits if desired is not None]
+        with PHASE_SECONDS.time(phase="hosts_edit"):
+            results = await asyncio.gather(*(
+                loop.run_in_executor(self._executor, self.profiler.call,
+                                     target.reconciler.reconcile_sites, desired)
+                for target, desired in edits
+            ))
+        # Failed edits are retried on the next round.
+        self._retry_hosts = [target for (target, _), ok in zip(edits, results) if not ok]
+
+        with PHASE_SECONDS.time(phase="process_scan"):
+            await loop.run_in_executor(self._executor, self.profiler.call, self.enforce_apps)
+        self.cycle += 1
+        CYCLES.inc()
+        LAST_CYCLE.set(time.time())
+        self.profiler.cycle_done()
+        return len(changed)
+
+    def enforce_apps(self) -> None:
+        """Sweep the apps blocked by any profile; one process scan serves them all.
+
+        Only apps a profile blocks right now count, so goal-gated apps are
+        released once that profile's goal is reached even while its other
+        rules still block.
+        """
+        blocking = [runtime.desired for runtime in self.profiles
+                    if runtime.desired is not None and runtime.desired.blocked_apps]
+        apps = frozenset().union(*(desired.blocked_apps for desired in blocking))
+        if self._apps is None or self._apps.apps != apps:
+            # A single profile's compiled matcher is reused; a union needs its own.
+            matcher = blocking[0].app_matcher if len(blocking) == 1 else None
+            matcher = matcher or AppMatcher(apps)
+            self._apps = EnforcementState(bool(apps), apps, frozenset(), matcher)
+        self.apps_reconciler.reconcile_apps(self._apps)
+
+    def next_policy_change(self) -> Optional[float]:
+        """Seconds until any profile's rule windows open or close, or None if none will."""
+        changes = [runtime.policy_change for runtime in self.profiles
+                   if runtime.policy_change is not None]
+        return max(0.0, min(changes) - time.time()) if changes else None
+
+    def reset_all(self) -> None:
+        """Queue the daily goal reset for every profile."""
+        expires_at = next_midnight(time.time(), self.reset_tz)
+        for runtime in self.profiles:
+            runtime.service.reset_goal(expires_at)
+
+    def toggle_profiling(self) -> None:
+        """Profile and trace the next PROFILE_CYCLES rounds, or end a running session.
+
+        Safe to call from signal handlers and other threads, like stop().
+        """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.profiler.toggle)
+        else:
+            self.profiler.toggle()
+
+    def run(self) -> None:
+        """Run the poller event loop until stop() is called."""
+        asyncio.run(self.run_async())
+
+    def stop(self) -> None:
+        """Request shutdown; safe to call from signal handlers and other threads.
+
+        A request made before the loop is running is kept, and the loop
+        stops as soon as it starts.
+        """
+        self._stop_requested = True
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._stop.set)
+
+    async def run_async(self) -> None:
+        """Poll all profiles, backing off while nothing changes."""
+        self.logger.info(f"Starting multi-profile poller for {len(self.profiles)} profiles...")
+        self._stop = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        if self._stop_requested:
+            self._stop.set()
+        reset_at = next_midnight(time.time(), self.reset_tz)
+        self.write_queue.start()
+        try:
+            while not self._stop.is_set():
+                if time.time() >= reset_at:
+                    self.reset_all()
+                    reset_at = next_midnight(time.time(), self.reset_tz)
+                try:
+                    changed = await self.poll_once()
+                except asyncio.TimeoutError:
+                    self.logger.warning("Profile fetch timed out; keeping last known status.")
+                    changed = 1
+                await self._loop.run_in_executor(self._executor, self._refresh_heartbeat)
+                delay = self.interval.reset() if changed else self.interval.backoff()
+                policy_change = self.next_policy_change()
+                if policy_change is not None:
+                    delay = min(delay, policy_change)
+                try:
+                    await asyncio.wait_for(self._stop.wait(), min(delay, max(0.0, reset_at - time.time())))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.profiler.executor = None
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self.write_queue.stop()
+            self.process_manager.notifier.stop()
+            self.firebase_client.close()
+            self._loop = None
+
+    def _refresh_heartbeat(self) -> None:
+        try:
+            self.write_heartbeat()
+        except OSError as e:
+            self.logger.error(f"Failed to refresh heartbeat: {e}")
@@ -1,14 +1,66 @@
 import json
+import threading
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Tuple, Dict, Any
+from types import MappingProxyType
+from typing import Tuple, Dict, Any, FrozenSet, Mapping, Optional
 from ..utils.exceptions import ConfigError
+from ..utils.files import atomic_write_text
 from ..utils.logger import Logger
+from ..utils.tracing import traced
+from .process_scanner import AppMatcher
+from .domain_set import DomainSet, EMPTY, load_blocklists
+from .policy import Policy
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Immutable, versioned view of blocked_config.json with derived data precomputed.
+
+    ``apps`` and ``sites`` are the flat lists the UI edits; ``expanded_sites``
+    and ``app_matcher`` cover every target in the config, rules included.
+    """
+    version: int
+    apps: Tuple[str, ...]
+    sites: Tuple[str, ...]
+    expanded_sites: FrozenSet[str]
+    app_matcher: AppMatcher = field(compare=False)
+    raw: Mapping[str, Any] = field(compare=False, default_factory=dict)
+    blocklists: Tuple[str, ...] = ()
+    blocklist: DomainSet = field(compare=False, default=EMPTY)
+    policy: Policy = field(compare=False, default_factory=Policy)
+
+    @classmethod
+    def build(cls, version: int, config: Dict[str, Any],
+              base_dir: Optional[Path] = None) -> "ConfigSnapshot":
+        """Create a snapshot from a parsed config document.
+
+        Blocklist paths are resolved relative to ``base_dir``; rules are
+        compiled into a :class:`Policy` (ConfigError if one is malformed).
+        """
+        blocklists = tuple(config.get("blocklists", []))
+        policy = Policy.from_config(config)
+        return cls(
+            version=version,
+            apps=tuple(config.get("apps", [])),
+            sites=tuple(config.get("sites", [])),
+            expanded_sites=policy.sites,
+            app_matcher=policy.app_matcher,
+            raw=MappingProxyType(dict(config)),
+            blocklists=blocklists,
+            blocklist=load_blocklists(blocklists, base_dir),
+            policy=policy,
+        )
+
 
 class ConfigManager:
     def __init__(self, config_path: Path, logger: Logger):
         self.config_path = config_path
         self.logger = logger
         self._ensure_config_exists()
+        self._snapshot = ConfigSnapshot.build(0, {})
+        self._file_key: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
 
     def _ensure_config_exists(self) -> None:
         """Ensure the config file exists with default values if it doesn't."""
@@ -26,21 +78,77 @@ class ConfigManager:
         except Exception as e:
             raise ConfigError(f"Failed to write config: {e}")
 
+    @traced()
+    def snapshot(self) -> ConfigSnapshot:
+        """Return the current config snapshot, re-parsing only if the file changed.
+
+        The file is identified by (mtime, inode, size); while that key is
+        unchanged the cached snapshot is returned without opening the file.
+        Blocklist files are checked the same way and only rebuilt when one
+        of them changed. If the file cannot be parsed the last good snapshot
+        is kept.
+        """
+        with self._lock:
+            try:
+                stat = self.config_path.stat()
+                key = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+                if key == self._file_key:
+                    return self._refresh_blocklist()
+                with self.config_path.open('r') as f:
+                    config = json.load(f)
+                self._snapshot = ConfigSnapshot.build(
+                    self._snapshot.version + 1, config, self.config_path.parent)
+                self._file_key = key
+            except Exception as e:
+                self.logger.error(f"Failed to load config: {e}")
+            return self._snapshot
+
+    def _refresh_blocklist(self) -> ConfigSnapshot:
+        """Pick up edits to blocklist files while the config itself is unchanged."""
+        snapshot = self._snapshot
+        if snapshot.blocklists:
+            blocklist = load_blocklists(snapshot.blocklists, self.config_path.parent)
+            if blocklist is not snapshot.blocklist:
+                self._snapshot = replace(snapshot, version=snapshot.version + 1,
+                                         blocklist=blocklist)
+        return self._snapshot
+
     def load_config(self) -> Tuple[list, list]:
         """Load and return the current configuration."""
-        try:
-            with self.config_path.open('r') as f:
-                config = json.load(f)
-                return config.get("apps", []), config.get("sites", [])
-        except Exception as e:
-            self.logger.error(f"Failed to load config: {e}")
-            return [], []
+        snapshot = self.snapshot()
+        return list(snapshot.apps), list(snapshot.sites)
 
+    @traced()
     def update_config(self, apps: list, sites: list) -> None:
         """Update the configuration with new values."""
         try:
-            self._write_config({"apps": apps, "sites": sites})
+            # Keep keys the UI does not edit, such as blocklists.
+            config = dict(self.snapshot().raw)
+            config.update(apps=apps, sites=sites)
+            self._write_config(config)
             self.logger.info(f"Config updated - Apps: {apps}, Sites: {sites}")
         except Exception as e:
             self.logger.error(f"Failed to update config: {e}")
             raise ConfigError(f"Failed to update config: {e}")
+
+    def replace_lists(self, apps: list, sites: list, expected: ConfigSnapshot) -> bool:
+        """Atomically rewrite apps and sites if the file still holds ``expected``.
+
+        Used to apply changes made elsewhere (config sync); returns False
+        without writing if the file was edited after ``expected`` was taken,
+        so a local save is never overwritten. The rename is picked up by
+        the config watcher like any other save.
+        """
+        with self._lock:
+            try:
+                stat = self.config_path.stat()
+                if (self._snapshot is not expected
+                        or (stat.st_mtime_ns, stat.st_ino, stat.st_size) != self._file_key):
+                    return False
+                config = dict(expected.raw)
+                config.update(apps=apps, sites=sites)
+                atomic_write_text(self.config_path, json.dumps(config, indent=2))
+            except OSError as e:
+                raise ConfigError(f"Failed to write config: {e}")
+        self.logger.info(f"Config lists replaced - {len(apps)} apps, {len(sites)} sites")
+        return True
@@ -0,0 +1,272 @@
+import json
+import time
+import uuid
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+from ..utils.exceptions import ConfigSyncError
+from ..utils.files import atomic_write_json
+from ..utils.logger import Logger
+from ..utils.metrics import CONFIG_SYNC_OPS
+from ..config.constants import (
+    CONFIG_SYNC_PATH,
+    CONFIG_SYNC_STATE_PATH,
+    CONFIG_SYNC_COMPACT_EVERY,
+    CONFIG_SYNC_MAX_ATTEMPTS,
+)
+from .config_manager import ConfigManager, ConfigSnapshot
+from .http_client import FirebaseClient
+
+# The config lists that are synced; rules and blocklist files stay per machine.
+LISTS = ("apps", "sites")
+
+Lists = Dict[str, FrozenSet[str]]
+Delta = Dict[str, Dict[str, List[str]]]
+
+
+def version_key(version: int) -> str:
+    """Log key of a version, zero-padded so that key order is version order."""
+    return f"{version:010d}"
+
+
+def _entries(value: Any) -> FrozenSet[str]:
+    """The strings in a list read back from Firebase (which may return a sparse list as an object)."""
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, list):
+        return frozenset()
+    return frozenset(item for item in value if isinstance(item, str))
+
+
+def _version(value: Any) -> int:
+    return value if isinstance(value, int) and not isinstance(value, bool) else 0
+
+
+def empty_lists() -> Lists:
+    return {name: frozenset() for name in LISTS}
+
+
+def diff_lists(base: Lists, target: Lists) -> Delta:
+    """The delta turning ``base`` into ``target``; empty parts are left out."""
+    delta: Delta = {}
+    for op, changes in (("add", {name: target[name] - base[name] for name in LISTS}),
+                        ("remove", {name: base[name] - target[name] for name in LISTS})):
+        changes = {name: sorted(entries) for name, entries in changes.items() if entries}
+        if changes:
+            delta[op] = changes
+    return delta
+
+
+def apply_delta(lists: Lists, delta: Mapping[str, Any]) -> Lists:
+    """Apply a delta's removals, then its additions."""
+    add = delta.get("add") if isinstance(delta.get("add"), dict) else {}
+    remove = delta.get("remove") if isinstance(delta.get("remove"), dict) else {}
+    return {name: (lists[name] - _entries(remove.get(name))) | _entries(add.get(name))
+            for name in LISTS}
+
+
+def _ordered(current: Iterable[str], target: FrozenSet[str]) -> List[str]:
+    """``target`` as a list that keeps the order of ``current``, new entries appended sorted."""
+    seen = set()
+    kept = [entry for entry in current
+            if entry in target and not (entry in seen or seen.add(entry))]
+    return kept + sorted(target - seen)
+
+
+class ConfigSync:
+    """Share the block config's apps and sites between machines through Firebase.
+
+    Changes are kept at CONFIG_SYNC_PATH as a log of deltas (entries added
+    and removed), keyed by version; ``head`` holds the latest version. A
+    device claims the next version with a conditional write, so concurrent
+    edits never share a slot: the loser pulls the winner's delta, rebases
+    its own onto it and tries the next version. Every device replays the
+    log in version order, so all of them end with the same lists, the
+    latest delta winning for any entry. Every CONFIG_SYNC_COMPACT_EVERY
+    versions the full lists are stored as a snapshot and older entries are
+    pruned; a device that fell behind the pruned range restarts from it.
+
+    ``base`` is the log's state at ``version``; whatever the config file
+    has that differs from it is this device's unpushed edit. Remote deltas
+    are written into the config file, where the config watcher picks them
+    up like a local save. A device joining with entries of its own pushes
+    them, so its first sync merges both sides.
+    """
+
+    def __init__(self, logger: Logger, config_manager: ConfigManager,
+                 client: Optional[FirebaseClient] = None, path: str = CONFIG_SYNC_PATH,
+                 state_path: Path = CONFIG_SYNC_STATE_PATH,
+                 compact_every: int = CONFIG_SYNC_COMPACT_EVERY,
+                 max_attempts: int = CONFIG_SYNC_MAX_ATTEMPTS,
+                 clock: Callable[[], float] = time.time):
+        self.logger = logger
+        self.config_manager = config_manager
+        self.client = client or FirebaseClient()
+        self.path = path.strip("/")
+        self.state_path = Path(state_path)
+        self.compact_every = compact_every
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.device, self.version, self.base = self._load_state()
+        self._null_etag: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _load_state(self) -> Tuple[str, int, Lists]:
+        """Device id, synced version and base lists from the state file."""
+        try:
+            with self.state_path.open("r") as f:
+                state = json.load(f)
+            return (str(state["device"]), int(state["version"]),
+                    {name: _entries(state["base"][name]) for name in LISTS})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Config sync state is unreadable, syncing from scratch: {e}")
+        return uuid.uuid4().hex, 0, empty_lists()
+
+    def _save_state(self) -> None:
+        atomic_write_json(self.state_path, {
+            "device": self.device,
+            "version": self.version,
+            "base": {name: sorted(self.base[name]) for name in LISTS},
+        })
+
+    def sync(self, force: bool = False) -> bool:
+        """Pull remote deltas, push the local one; return whether the config file was rewritten.
+
+        Without ``force`` the log is only read when ``head`` moved past the
+        local version, which costs a 304 while nothing changes. If the file
+        is saved while a sync runs, nothing is written and the next sync
+        (prompted by that save) starts over. Raises ConfigSyncError when the
+        log cannot be followed or a push keeps conflicting; network errors
+        propagate.
+        """
+        with self._lock:
+            snapshot = self.config_manager.snapshot()
+            local = {"apps": frozenset(snapshot.apps), "sites": frozenset(snapshot.sites)}
+            version, base = self.version, self.base
+            delta = diff_lists(base, local)
+            try:
+                self._pull(force)
+                pushed = bool(delta) and self._push(delta)
+                target = apply_delta(self.base, delta)
+                written = target != local and self._write_local(snapshot, target)
+                if target != local and not written:
+                    # The file changed under us; leave it and the base as they were.
+                    self.version, self.base = version, base
+                    return False
+            except BaseException:
+                self.version, self.base = version, base
+                raise
+            if self.version != version:
+                self._save_state()
+                self.logger.info(f"Config synced from version {version} to {self.version}"
+                                 f"{' with a local change' if pushed else ''}")
+            return written
+
+    def _pull(self, force: bool = False) -> int:
+        """Apply logged deltas newer than ``version`` to ``base``; return how many were applied."""
+        head = self.client.get(f"{self.path}/head")
+        latest = _version(head.get("version")) if isinstance(head, dict) else 0
+        if latest <= self.version and not force:
+            return 0
+        start = version_key(self.version + 1)
+        entries = self.client.get(f"{self.path}/log",
+                                  query={"orderBy": '"$key"', "startAt": json.dumps(start)})
+        entries = entries if isinstance(entries, dict) else {}
+        if start not in entries and (entries or latest > self.version):
+            self._load_snapshot()
+
+        applied = 0
+        for key in sorted(entries):
+            version = int(key) if key.isdigit() else 0
+            if version <= self.version:
+                continue
+            if version != self.version + 1:
+                self.logger.warning(f"Config sync log has a gap after version {self.version}")
+                break
+            delta = entries[key]
+            self.base = apply_delta(self.base, delta if isinstance(delta, dict) else {})
+            self.version = version
+            applied += 1
+        if applied:
+            CONFIG_SYNC_OPS.inc(applied, result="pulled")
+        return applied
+
+    def _load_snapshot(self) -> None:
+        """Restart from the compacted snapshot once the entries after ``version`` are pruned."""
+        snapshot = self.client.get(f"{self.path}/snapshot")
+        if not isinstance(snapshot, dict) or _version(snapshot.get("version")) < self.version:
+            raise ConfigSyncError(
+                f"Config sync log no longer has version {self.version + 1} and no snapshot covers it")
+        self.base = {name: _entries(snapshot.get(name)) for name in LISTS}
+        self.version = snapshot["version"]
+        CONFIG_SYNC_OPS.inc(result="snapshot")
+
+    def _push(self, delta: Delta) -> bool:
+        """Append the local delta at the next free version, rebasing it after each conflict.
+
+        Returns False if nothing was left to push once rebased.
+        """
+        for _ in range(self.max_attempts):
+            change = diff_lists(self.base, apply_delta(self.base, delta))
+            if not change:
+                return False  # Other devices already made the same edit.
+            version = self.version + 1
+            path = f"{self.path}/log/{version_key(version)}"
+            # The slot must still be empty. Any empty node has the same ETag, so it is
+            # learned once and later pushes go straight to the conditional write.
+            etag, taken = self._null_etag, False
+            if etag is None:
+                current, etag = self.client.get_etag(path)
+                taken = current is not None
+                if not taken:
+                    self._null_etag = etag
+            if not taken:
+                entry = dict(change, device=self.device, at=round(self.clock(), 3))
+                written, current, etag = self.client.put_if(path, entry, etag)
+                if not written and current is None:
+                    self._null_etag = etag  # Our empty-node ETag was stale; the slot is still free.
+                    continue
+                if written:
+                    self.base = apply_delta(self.base, change)
+                    self.version = version
+                    CONFIG_SYNC_OPS.inc(result="pushed")
+                    self._advance_head(version)
+                    if version % self.compact_every == 0:
+                        self._compact(version)
+                    return True
+            CONFIG_SYNC_OPS.inc(result="conflict")
+            self._pull(force=True)
+        raise ConfigSyncError(f"Config change not pushed after {self.max_attempts} conflicting writes")
+
+    def _advance_head(self, version: int) -> None:
+        """Move ``head`` up to ``version``, never back, despite concurrent writers."""
+        path = f"{self.path}/head"
+        head, etag = self.client.get_etag(path)
+        for _ in range(self.max_attempts):
+            if isinstance(head, dict) and _version(head.get("version")) >= version:
+                return
+            written, head, etag = self.client.put_if(path, {"version": version}, etag)
+            if written:
+                return
+        self.logger.warning(f"Config sync head not advanced to version {version}")
+
+    def _compact(self, version: int) -> None:
+        """Store the lists at ``version`` as the snapshot and prune the entries it makes redundant.
+
+        One full interval of entries before the snapshot is kept, so a
+        device just behind it still catches up from the log.
+        """
+        updates: Dict[str, Any] = {
+            "snapshot": dict({name: sorted(self.base[name]) for name in LISTS}, version=version),
+        }
+        for old in range(max(1, version - 2 * self.compact_every + 1),
+                         version - self.compact_every + 1):
+            updates[f"log/{version_key(old)}"] = None
+        self.client.patch(self.path, updates).raise_for_status()
+
+    def _write_local(self, snapshot: ConfigSnapshot, target: Lists) -> bool:
+        return self.config_manager.replace_lists(
+            _ordered(snapshot.apps, target["apps"]), _ordered(snapshot.sites, target["sites"]),
+            snapshot)
@@ -0,0 +1,477 @@
+import time
+import random
+import socket
+import struct
+import asyncio
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from ..utils.exceptions import DnsError
+from ..utils.logger import Logger
+from ..config.constants import (
+    REDIRECT_IP,
+    DNS_LISTEN_HOST,
+    DNS_LISTEN_PORT,
+    DNS_UPSTREAM,
+    DNS_UPSTREAM_TIMEOUT,
+    DNS_CACHE_SIZE,
+    DNS_CACHE_MAX_TTL,
+    DNS_ANSWER_MAX_TTL,
+    DNS_BLOCKED_TTL,
+    DNS_TCP_IDLE_TIMEOUT,
+)
+from .domain_set import DomainSet, EMPTY
+
+TYPE_A, TYPE_AAAA, TYPE_OPT = 1, 28, 41
+CLASS_IN = 1
+RCODE_NOERROR, RCODE_FORMERR, RCODE_SERVFAIL, RCODE_NXDOMAIN, RCODE_NOTIMP = 0, 1, 2, 3, 4
+FLAG_QR, FLAG_TC, FLAG_RD, FLAG_RA = 0x8000, 0x0200, 0x0100, 0x0080
+_HEADER = struct.Struct("!HHHHHH")
+_RR_FIXED = struct.Struct("!HHIH")
+# Answers for blocked names, by query type.
+_BLOCKED_RDATA = {
+    TYPE_A: socket.inet_pton(socket.AF_INET, REDIRECT_IP),
+    TYPE_AAAA: socket.inet_pton(socket.AF_INET6, "::1"),
+}
+
+
+@dataclass(frozen=True)
+class Question:
+    """The single question of a DNS query."""
+    id: int
+    flags: int
+    name: str
+    qtype: int
+    qclass: int
+    end: int
+
+    @property
+    def key(self) -> Tuple[str, int, int]:
+        return self.name, self.qtype, self.qclass
+
+    @classmethod
+    def parse(cls, message: bytes) -> "Question":
+        """Parse the header and first question; raise ValueError on malformed input."""
+        if len(message) < _HEADER.size:
+            raise ValueError("short message")
+        qid, flags, qdcount, _, _, _ = _HEADER.unpack_from(message)
+        if qdcount != 1:
+            raise ValueError("expected exactly one question")
+        labels = []
+        offset = _HEADER.size
+        while True:
+            length = message[offset]
+            if length == 0:
+                offset += 1
+                break
+            if length & 0xC0:
+                raise ValueError("compressed name in question")
+            labels.append(message[offset + 1:offset + 1 + length])
+            offset += 1 + length
+        qtype, qclass = struct.unpack_from("!HH", message, offset)
+        name = b".".join(labels).decode("ascii", "replace").lower()
+        return cls(qid, flags, name, qtype, qclass, offset + 4)
+
+
+def _skip_name(message: bytes, offset: int) -> int:
+    """Return the offset just past a (possibly compressed) name."""
+    while True:
+        length = message[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += 1 + length
+
+
+def ttl_offsets(message: bytes, question_end: int) -> List[int]:
+    """Return the offset of every resource record's TTL field (EDNS OPT excluded)."""
+    _, _, _, ancount, nscount, arcount = _HEADER.unpack_from(message)
+    offsets = []
+    offset = question_end
+    for _ in range(ancount + nscount + arcount):
+        offset = _skip_name(message, offset)
+        rtype, _, _, rdlength = _RR_FIXED.unpack_from(message, offset)
+        if rtype != TYPE_OPT:
+            offsets.append(offset + 4)
+        offset += _RR_FIXED.size + rdlength
+    if offset > len(message):
+        raise ValueError("truncated record")
+    return offsets
+
+
+def build_response(query: bytes, question: Question, rcode: int = RCODE_NOERROR,
+                   answer: Optional[bytes] = None, ttl: int = DNS_BLOCKED_TTL) -> bytes:
+    """Build a response echoing the question, with at most one answer record."""
+    flags = FLAG_QR | FLAG_RA | (question.flags & (0x7800 | FLAG_RD)) | rcode
+    header = _HEADER.pack(question.id, flags, 1, 1 if answer else 0, 0, 0)
+    body = query[_HEADER.size:question.end]
+    if answer:
+        # 0xC00C points back at the question name.
+        body += struct.pack("!HHHIH", 0xC00C, question.qtype, CLASS_IN, ttl, len(answer)) + answer
+    return header + body
+
+
+class ResponseCache:
+    """LRU cache of upstream responses, served with TTLs counted down.
+
+    Each entry keeps the response, the offsets of its TTL fields and the
+    time it was stored, so a hit only patches the ID and the TTLs. The TTL
+    handed to clients is capped at ``answer_max_ttl`` so OS caches drop an
+    answer soon after its name becomes blocked.
+    """
+
+    def __init__(self, size: int = DNS_CACHE_SIZE, max_ttl: float = DNS_CACHE_MAX_TTL,
+                 answer_max_ttl: int = DNS_ANSWER_MAX_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.size = size
+        self.max_ttl = max_ttl
+        self.answer_max_ttl = answer_max_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, int, int], Tuple[bytes, List[int], int, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, question: Question) -> Optional[bytes]:
+        """Return a cached response for ``question`` rewritten for its ID, or None."""
+        entry = self._entries.get(question.key)
+        if entry is None:
+            self.misses += 1
+            return None
+        response, offsets, ttl, stored_at = entry
+        remaining = int(ttl - (self.clock() - stored_at))
+        if remaining <= 0:
+            del self._entries[question.key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(question.key)
+        self.hits += 1
+        patched = bytearray(response)
+        struct.pack_into("!H", patched, 0, question.id)
+        remaining = min(remaining, self.answer_max_ttl)
+        for offset in offsets:
+            struct.pack_into("!I", patched, offset, remaining)
+        return bytes(patched)
+
+    def put(self, question: Question, response: bytes) -> None:
+        """Cache a NOERROR or NXDOMAIN response for the smallest TTL it carries."""
+        flags = _HEADER.unpack_from(response)[1]
+        if flags & FLAG_TC or (flags & 0xF) not in (RCODE_NOERROR, RCODE_NXDOMAIN):
+            return
+        try:
+            offsets = ttl_offsets(response, question.end)
+        except (ValueError, IndexError, struct.error):
+            return
+        ttls = [struct.unpack_from("!I", response, offset)[0] for offset in offsets]
+        # A response without records (NODATA) is cached briefly.
+        ttl = min(min(ttls, default=DNS_BLOCKED_TTL), self.max_ttl)
+        if ttl <= 0:
+            return
+        self._entries[question.key] = (response, offsets, ttl, self.clock())
+        self._entries.move_to_end(question.key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+
+class _UpstreamProtocol(asyncio.DatagramProtocol):
+    """One UDP socket to the upstream resolver, shared by all forwarded queries."""
+
+    def __init__(self):
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        if len(data) < _HEADER.size:
+            return
+        future = self.pending.pop(struct.unpack_from("!H", data)[0], None)
+        if future is not None and not future.done():
+            future.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        pass
+
+
+class _ClientProtocol(asyncio.DatagramProtocol):
+    """UDP listener; local answers are sent inline, forwarded ones from a task."""
+
+    def __init__(self, stub: "DnsStub"):
+        self.stub = stub
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self._tasks: Set[asyncio.Future] = set()
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        response, question = self.stub.answer_locally(data)
+        if response is not None:
+            self.transport.sendto(response, addr)
+        elif question is not None:
+            task = asyncio.ensure_future(self._forward(data, question, addr))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _forward(self, data: bytes, question: Question, addr: Tuple[str, int]) -> None:
+        response = await self.stub.forward(data, question, tcp=False)
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.sendto(response, addr)
+
+    def error_received(self, exc: Exception) -> None:
+        pass
+
+
+class DnsStub:
+    """Local DNS resolver that enforces blocking, as an alternative to the hosts file.
+
+    Offers the same interface as HostsManager, so the reconciler drives it
+    unchanged. Blocked names (a configured site or any subdomain of it, or
+    a blocklist match) are answered with REDIRECT_IP for A and ``::1`` for
+    AAAA queries; other names are forwarded to ``upstream`` over UDP, or
+    TCP for TCP clients, through a TTL-respecting response cache.
+
+    Block state is held in memory: adding or removing a site is a set
+    operation and a new blocklist is a reference swap. Nothing is written
+    to disk and the cache never needs flushing, because names are checked
+    against the block state before the cache.
+
+    The server runs on its own thread and event loop; block state may be
+    changed from any thread.
+    """
+
+    def __init__(self, logger: Logger, host: str = DNS_LISTEN_HOST, port: int = DNS_LISTEN_PORT,
+                 upstream: Tuple[str, int] = DNS_UPSTREAM,
+                 upstream_timeout: float = DNS_UPSTREAM_TIMEOUT,
+                 cache: Optional[ResponseCache] = None):
+        self.logger = logger
+        self.address = (host, port)
+        self.upstream = upstream
+        self.upstream_timeout = upstream_timeout
+        self.cache = cache or ResponseCache()
+        self.blocked_queries = 0
+        self.forwarded_queries = 0
+        self._sites: Set[str] = set()
+        self._blocklist: DomainSet = EMPTY
+        self._inflight: Dict[Tuple[str, int, int, bool], asyncio.Future] = {}
+        self._upstream: Optional[_UpstreamProtocol] = None
+        self._udp: Optional[asyncio.DatagramTransport] = None
+        self._tcp: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+    # HostsManager interface
+
+    def clear_all_blocked_sites(self, skip_poller_check: bool = False) -> None:
+        """Stop blocking every site and drop the blocklist."""
+        self.logger.info("Clearing all blocked sites from the DNS stub.")
+        self._sites = set()
+        self._blocklist = EMPTY
+
+    def block_websites(self, sites: List[str]) -> None:
+        """Block the given sites and all of their subdomains."""
+        self.logger.info("Blocking distracting websites.")
+        self._sites |= {site.lower().rstrip(".") for site in sites}
+
+    def unblock_websites(self, sites: List[str]) -> None:
+        """Unblock the given sites."""
+        self.logger.info("Unblocking distracting websites.")
+        self._sites -= {site.lower().rstrip(".") for site in sites}
+
+    def apply_websites(self, block: List[str], unblock: List[str],
+                       domain_set: Optional[DomainSet]) -> None:
+        """Unblock, block and swap the blocklist in one step."""
+        self.logger.info("Applying blocked websites.")
+        blocked = {site.lower().rstrip(".") for site in block}
+        self._sites = (self._sites - {site.lower().rstrip(".") for site in unblock}) | blocked
+        self.set_blocklist(domain_set)
+
+    def set_blocklist(self, domain_set: Optional[DomainSet]) -> None:
+        """Swap in a new blocklist; None or an empty set removes it."""
+        domain_set = domain_set or EMPTY
+        if domain_set is not self._blocklist:
+            self._blocklist = domain_set
+            self.logger.info(f"Blocklist applied: {len(domain_set)} domains.")
+
+    # Resolution
+
+    def is_blocked(self, name: str) -> bool:
+        """Return whether ``name`` or one of its parent domains is blocked."""
+        sites = self._sites
+        if sites:
+            labels = name.split(".")
+            for i in range(len(labels)):
+                if ".".join(labels[i:]) in sites:
+                    return True
+        return len(self._blocklist) > 0 and self._blocklist.matches(name)
+
+    def answer_locally(self, query: bytes) -> Tuple[Optional[bytes], Optional[Question]]:
+        """Answer from block state or the cache if possible.
+
+        Returns ``(response, question)``; a None response with a question
+        means the query must be forwarded, and ``(None, None)`` means the
+        message is too broken to answer at all.
+        """
+        try:
+            question = Question.parse(query)
+        except (ValueError, IndexError, struct.error):
+            if len(query) < _HEADER.size:
+                return None, None
+            flags = FLAG_QR | FLAG_RA | RCODE_FORMERR
+            return _HEADER.pack(struct.unpack_from("!H", query)[0], flags, 0, 0, 0, 0), None
+        if question.flags & FLAG_QR:
+            return None, None
+        if question.flags & 0x7800:
+            return build_response(query, question, RCODE_NOTIMP), None
+        if self.is_blocked(question.name):
+            self.blocked_queries += 1
+            if question.qclass == CLASS_IN:
+                return build_response(query, question, answer=_BLOCKED_RDATA.get(question.qtype)), None
+            return build_response(query, question), None
+        return self.cache.get(question), question
+
+    async def forward(self, query: bytes, question: Question, tcp: bool) -> bytes:
+        """Resolve upstream; concurrent identical queries share one upstream request."""
+        key = question.key + (tcp,)
+        pending = self._inflight.get(key)
+        if pending is None:
+            self.forwarded_queries += 1
+            pending = asyncio.ensure_future(self._resolve_upstream(query, question, tcp))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        response = await asyncio.shield(pending)
+        if response is None:
+            return build_response(query, question, RCODE_SERVFAIL)
+        return struct.pack("!H", question.id) + response[2:]
+
+    async def _resolve_upstream(self, query: bytes, question: Question,
+                                tcp: bool) -> Optional[bytes]:
+        try:
+            if tcp:
+                response = await asyncio.wait_for(self._query_tcp(query), self.upstream_timeout)
+            else:
+                response = await self._query_udp(query)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            self.logger.warning(f"Upstream DNS query for {question.name} failed: {e!r}")
+            return None
+        if response[_HEADER.size:question.end].lower() != query[_HEADER.size:question.end].lower():
+            return None
+        # A large TCP answer must not be replayed to a UDP client.
+        if not tcp or len(response) <= 512:
+            self.cache.put(question, response)
+        return response
+
+    async def _query_udp(self, query: bytes) -> bytes:
+        upstream = self._upstream
+        qid = random.getrandbits(16)
+        while qid in upstream.pending:
+            qid = random.getrandbits(16)
+        future = asyncio.get_running_loop().create_future()
+        upstream.pending[qid] = future
+        try:
+            upstream.transport.sendto(struct.pack("!H", qid) + query[2:])
+            return await asyncio.wait_for(future, self.upstream_timeout)
+        finally:
+            upstream.pending.pop(qid, None)
+
+    async def _query_tcp(self, query: bytes) -> bytes:
+        reader, writer = await asyncio.open_connection(*self.upstream)
+        try:
+            writer.write(struct.pack("!H", len(query)) + query)
+            await writer.drain()
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+            return await reader.readexactly(length)
+        finally:
+            writer.close()
+
+    async def _serve_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer length-prefixed queries on one TCP connection until it goes idle."""
+        try:
+            while True:
+                header = await asyncio.wait_for(reader.readexactly(2), DNS_TCP_IDLE_TIMEOUT)
+                query = await reader.readexactly(struct.unpack("!H", header)[0])
+                response, question = self.answer_locally(query)
+                if response is None and question is not None:
+                    response = await self.forward(query, question, tcp=True)
+                if response is None:
+                    break
+                writer.write(struct.pack("!H", len(response)) + response)
+                await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    # Lifecycle
+
+    @property
+    def port(self) -> Optional[int]:
+        return self._udp.get_extra_info("sockname")[1] if self._udp else None
+
+    async def _open(self) -> None:
+        loop = asyncio.get_running_loop()
+        host, port = self.address
+        self._udp, _ = await loop.create_datagram_endpoint(
+            lambda: _ClientProtocol(self), local_addr=(host, port))
+        # TCP shares the port actually bound for UDP (matters when port is 0).
+        self._tcp = await asyncio.start_server(self._serve_tcp, host, self.port)
+        _, self._upstream = await loop.create_datagram_endpoint(
+            _UpstreamProtocol, remote_addr=self.upstream)
+
+    async def _run(self, ready: threading.Event, errors: List[BaseException]) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        try:
+            await self._open()
+        except OSError as e:
+            errors.append(e)
+            ready.set()
+            await self._close()
+            return
+        ready.set()
+        await self._stopped.wait()
+        await self._close()
+
+    async def _close(self) -> None:
+        for transport in (self._udp, self._upstream and self._upstream.transport):
+            if transport is not None:
+                transport.close()
+        if self._tcp is not None:
+            self._tcp.close()
+            await self._tcp.wait_closed()
+        self._udp = self._tcp = self._upstream = None
+
+    def start(self) -> None:
+        """Bind UDP and TCP listeners and serve them on a background thread."""
+        ready = threading.Event()
+        errors: List[BaseException] = []
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._run(ready, errors)),
+                                        name="dns-stub", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread.join()
+            self._thread = None
+            self.logger.error(f"Failed to start DNS stub on {self.address}: {errors[0]}")
+            raise DnsError(f"Failed to start DNS stub on {self.address}: {errors[0]}")
+        self.logger.info(
+            f"DNS stub listening on {self.address[0]}:{self.port}, forwarding to "
+            f"{self.upstream[0]}:{self.upstream[1]}; point the system resolver at it to enforce."
+        )
+
+    def stop(self) -> None:
+        """Close the listeners and wait for the server thread to exit."""
+        if self._thread is None:
+            return
+        loop, stopped = self._loop, self._stopped
+        if loop is not None and stopped is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(stopped.set)
+        self._thread.join()
+        self._thread = None
+        self._loop = None
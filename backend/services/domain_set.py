@@ -0,0 +1,263 @@
+import os
+import re
+import hashlib
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from ..utils.exceptions import ConfigError
+
+# Names that appear in every hosts file and must never be redirected.
+RESERVED_NAMES = frozenset({
+    "localhost", "localhost.localdomain", "local", "broadcasthost", "ip6-localhost",
+    "ip6-loopback", "ip6-localnet", "ip6-mcastprefix", "ip6-allnodes", "ip6-allrouters",
+    "ip6-allhosts", "0.0.0.0",
+})
+_VALID_NAME = re.compile(r"^(?=.{1,253}$)[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?"
+                         r"(?:\.[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?)+$")
+_IP_LIKE = re.compile(r"^[0-9.]+$|:")
+EMIT_BATCH = 4096
+# Label separator in stored keys. It sorts below every character allowed in a
+# label, so a name, its wildcard and its subdomains are adjacent in key order.
+SEP = ","
+_SEP_BYTES = SEP.encode("ascii")
+
+
+def normalize_domain(raw: str) -> Optional[Tuple[str, bool]]:
+    """Return ``(domain, wildcard)`` for a blocklist entry, or None if it is not a domain.
+
+    Accepts plain names, ``*.example.com`` and adblock-style ``||example.com^``
+    (both meaning the domain and every subdomain). Names are lowercased,
+    stripped of a trailing dot and IDNA-encoded.
+    """
+    name = raw.strip().lower().rstrip(".")
+    wildcard = False
+    # Plain names, the vast majority of any list, pass this check directly.
+    if not _VALID_NAME.match(name):
+        if name.startswith("||"):
+            name, wildcard = name[2:].rstrip("^").rstrip("."), True
+        if name.startswith("*."):
+            name, wildcard = name[2:], True
+        if not name.isascii():
+            try:
+                name = name.encode("idna").decode("ascii")
+            except UnicodeError:
+                return None
+        if not _VALID_NAME.match(name):
+            return None
+    if name in RESERVED_NAMES or (name[-1].isdigit() and _IP_LIKE.match(name)):
+        return None
+    return name, wildcard
+
+
+def iter_blocklist(lines: Iterable[str]) -> Iterator[Tuple[str, bool]]:
+    """Yield normalized entries from hosts-format or plain one-domain-per-line text.
+
+    A line whose first field looks like an IP address is read as a hosts
+    entry (every following field is a name); otherwise the first field is
+    the name. Comments (``#`` and ``!``) and blank lines are skipped.
+    """
+    for line in lines:
+        fields = (line.split("#", 1)[0] if "#" in line else line).split()
+        if not fields or fields[0][0] == "!":
+            continue
+        if len(fields) == 1:
+            entry = normalize_domain(fields[0])
+            if entry is not None:
+                yield entry
+            continue
+        for name in fields[1:] if _IP_LIKE.match(fields[0]) else fields[:1]:
+            entry = normalize_domain(name)
+            if entry is not None:
+                yield entry
+
+
+def _to_key(domain: str) -> str:
+    return SEP.join(reversed(domain.split(".")))
+
+
+def _from_key(key: str) -> str:
+    return ".".join(reversed(key.split(SEP)))
+
+
+class DomainSet:
+    """Immutable set of blocked domains stored as one sorted, reversed-label blob.
+
+    ``a.example.com`` is stored as ``com,example,a`` so a domain and all of
+    its subdomains are adjacent in sort order. Wildcard entries carry a
+    trailing separator (``com,example,``); exact entries already covered by a
+    wildcard are dropped at build time. Keys live in a single bytes object
+    with an offset array, a few bytes per domain instead of a Python str
+    each, and lookups are binary searches over it.
+    """
+
+    def __init__(self, keys: Sequence[str]):
+        blob = "\n".join(keys).encode("ascii")
+        offsets = array("I", [0])
+        position = 0
+        for key in keys:
+            position += len(key) + 1
+            offsets.append(position)
+        self._blob = blob + b"\n" if keys else b""
+        self._offsets = offsets
+        self.fingerprint = hashlib.blake2b(self._blob, digest_size=8).hexdigest()
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Tuple[str, bool]]) -> "DomainSet":
+        """Build from ``(domain, wildcard)`` pairs, deduplicating and compacting."""
+        keys = {_to_key(domain) + SEP if wildcard else _to_key(domain)
+                for domain, wildcard in entries}
+        wildcards = sorted(key for key in keys if key.endswith(SEP))
+        if wildcards:
+            keys.difference_update(key[:-1] for key in wildcards)
+        ordered = sorted(keys)
+        del keys
+        if wildcards:
+            ordered = cls._drop_covered(ordered, wildcards)
+        return cls(ordered)
+
+    @classmethod
+    def from_domains(cls, domains: Iterable[str]) -> "DomainSet":
+        """Build from raw names such as a config's site list."""
+        return cls.from_entries(
+            entry for entry in map(normalize_domain, domains) if entry is not None
+        )
+
+    @classmethod
+    def from_files(cls, paths: Iterable[Union[str, Path]]) -> "DomainSet":
+        """Stream one or more blocklist files into a set."""
+        def entries() -> Iterator[Tuple[str, bool]]:
+            for path in paths:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    yield from iter_blocklist(f)
+        return cls.from_entries(entries())
+
+    @staticmethod
+    def _drop_covered(ordered: List[str], wildcards: List[str]) -> List[str]:
+        """Remove keys that sit below a wildcard (``com,example,`` covers ``com,example,a``)."""
+        kept: List[str] = []
+        cover: Optional[str] = None
+        for key in ordered:
+            if cover is not None and key.startswith(cover) and key != cover:
+                continue
+            cover = key if key.endswith(SEP) else cover
+            kept.append(key)
+        return kept
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the set's storage."""
+        return len(self._blob) + self._offsets.itemsize * len(self._offsets)
+
+    def _key(self, index: int) -> bytes:
+        return self._blob[self._offsets[index]:self._offsets[index + 1] - 1]
+
+    def _bisect(self, key: bytes) -> int:
+        """Return the index of the first stored key not less than ``key``."""
+        blob, offsets = self._blob, self._offsets
+        lo, hi = 0, len(offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if blob[offsets[mid]:offsets[mid + 1] - 1] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def matches(self, name: str) -> bool:
+        """Return whether ``name`` is blocked exactly or by a wildcard on it or a parent.
+
+        One binary search suffices: nothing is stored below a wildcard, so a
+        wildcard covering ``name`` sorts immediately before it, and one on
+        ``name`` itself sorts at its position.
+        """
+        entry = normalize_domain(name)
+        if entry is None:
+            return False
+        key = _to_key(entry[0]).encode("ascii")
+        index = self._bisect(key)
+        if index < len(self) and self._key(index) in (key, key + _SEP_BYTES):
+            return True
+        if index > 0:
+            previous = self._key(index - 1)
+            return previous.endswith(_SEP_BYTES) and key.startswith(previous)
+        return False
+
+    __contains__ = matches
+
+    def _iter_key_batches(self) -> Iterator[List[str]]:
+        """Yield the keys EMIT_BATCH at a time, decoding one slice of the blob per batch."""
+        offsets = self._offsets
+        for start in range(0, len(self), EMIT_BATCH):
+            end = min(start + EMIT_BATCH, len(self))
+            yield self._blob[offsets[start]:offsets[end] - 1].decode("ascii").split("\n")
+
+    def iter_entries(self) -> Iterator[Tuple[str, bool]]:
+        """Yield ``(domain, wildcard)`` pairs in reversed-label order."""
+        for keys in self._iter_key_batches():
+            for key in keys:
+                wildcard = key.endswith(SEP)
+                yield _from_key(key.rstrip(SEP)), wildcard
+
+    def iter_hostnames(self) -> Iterator[str]:
+        """Yield every name to put in a hosts file.
+
+        The hosts file has no wildcards, so a wildcard entry is emitted as its
+        domain plus the ``www.`` subdomain.
+        """
+        for domain, wildcard in self.iter_entries():
+            yield domain
+            if wildcard and not domain.startswith("www."):
+                yield f"www.{domain}"
+
+    def iter_hosts_lines(self, ips: Sequence[str]) -> Iterator[str]:
+        """Yield hosts-file text in chunks of about EMIT_BATCH names, never as one string."""
+        names: List[str] = []
+        for domain, wildcard in self.iter_entries():
+            names.append(domain)
+            if wildcard and not domain.startswith("www."):
+                names.append(f"www.{domain}")
+            if len(names) >= EMIT_BATCH:
+                yield "".join(f"{ip} {name}\n" for name in names for ip in ips)
+                names = []
+        if names:
+            yield "".join(f"{ip} {name}\n" for name in names for ip in ips)
+
+
+EMPTY = DomainSet([])
+
+_cache: Dict[Tuple[Tuple[str, int, int], ...], DomainSet] = {}
+_cache_lock = threading.Lock()
+
+
+def load_blocklists(paths: Iterable[Union[str, Path]],
+                    base_dir: Optional[Path] = None) -> DomainSet:
+    """Load blocklist files into one DomainSet, reusing the last build if none changed.
+
+    Relative paths are resolved against ``base_dir``. A file that cannot be
+    read raises ConfigError.
+    """
+    resolved = [Path(base_dir or ".", path) for path in paths]
+    if not resolved:
+        return EMPTY
+    try:
+        key = tuple(
+            (str(path), stat.st_mtime_ns, stat.st_size)
+            for path, stat in ((path, os.stat(path)) for path in resolved)
+        )
+    except OSError as e:
+        raise ConfigError(f"Cannot read blocklist: {e}")
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            domain_set = DomainSet.from_files(resolved)
+        except OSError as e:
+            raise ConfigError(f"Cannot read blocklist: {e}")
+        _cache.clear()
+        _cache[key] = domain_set
+        return domain_set
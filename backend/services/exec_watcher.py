@@ -0,0 +1,176 @@
+import os
+import socket
+import struct
+import threading
+from typing import Callable, Optional, Set
+from ..utils.logger import Logger
+from ..config.constants import EXEC_WATCH_POLL_INTERVAL
+from .process_scanner import PROC_ROOT
+
+# linux/connector.h and linux/cn_proc.h
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_COMM = 0x00000200
+NLMSG_DONE = 3
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_CN_MSG = struct.Struct("=IIIIHH")
+_PROC_EVENT = struct.Struct("=IIQ")
+_EXEC_EVENT = struct.Struct("=II")
+
+
+class NetlinkExecSource:
+    """Receive exec notifications from the kernel process connector.
+
+    Needs CAP_NET_ADMIN; construction raises OSError when unavailable.
+    """
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            self.sock.bind((os.getpid(), CN_IDX_PROC))
+            self._control(PROC_CN_MCAST_LISTEN)
+            self.sock.settimeout(0.5)
+        except OSError:
+            self.sock.close()
+            raise
+
+    def _control(self, op: int) -> None:
+        """Send a listen/ignore request to the process connector."""
+        payload = struct.pack("=I", op)
+        cn_msg = _CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+        header = _NLMSGHDR.pack(_NLMSGHDR.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+        self.sock.send(header + cn_msg)
+
+    def poll(self) -> Set[int]:
+        """Wait briefly and return pids that exec'd or were renamed."""
+        try:
+            data = self.sock.recv(4096)
+        except socket.timeout:
+            return set()
+        pids = set()
+        offset = 0
+        while offset + _NLMSGHDR.size <= len(data):
+            length = _NLMSGHDR.unpack_from(data, offset)[0]
+            event = offset + _NLMSGHDR.size + _CN_MSG.size
+            if length < _NLMSGHDR.size or event + _PROC_EVENT.size + _EXEC_EVENT.size > len(data):
+                break
+            what = _PROC_EVENT.unpack_from(data, event)[0]
+            if what in (PROC_EVENT_EXEC, PROC_EVENT_COMM):
+                pids.add(_EXEC_EVENT.unpack_from(data, event + _PROC_EVENT.size)[0])
+            offset += (length + 3) & ~3
+        return pids
+
+    def close(self) -> None:
+        """Unsubscribe and close the socket."""
+        try:
+            self._control(PROC_CN_MCAST_IGNORE)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class ProcDiffSource:
+    """Detect new processes by diffing the ``/proc`` directory listing.
+
+    New pids are reported when first seen and once more on the following
+    tick, to catch a fork whose exec lands just after the first sighting.
+    """
+
+    def __init__(self, interval: float = EXEC_WATCH_POLL_INTERVAL, root: str = PROC_ROOT):
+        self.interval = interval
+        self.root = root
+        self._known = self._list()
+        self._recheck: Set[int] = set()
+        self._stop = threading.Event()
+
+    def _list(self) -> Set[int]:
+        """Return the pids currently listed under /proc."""
+        return {int(entry) for entry in os.listdir(self.root) if entry.isdigit()}
+
+    def poll(self) -> Set[int]:
+        """Wait one interval and return new or recently new pids."""
+        if self._stop.wait(self.interval):
+            return set()
+        current = self._list()
+        new = current - self._known
+        pids = new | (self._recheck & current)
+        self._known, self._recheck = current, new
+        return pids
+
+    def close(self) -> None:
+        """Wake a pending poll."""
+        self._stop.set()
+
+
+class ExecWatcher:
+    """Call back with each pid as new processes start, on a background thread.
+
+    Uses the netlink process connector when privileged, otherwise falls
+    back to cheap ``/proc`` directory diffing.
+    """
+
+    def __init__(self, logger: Logger, on_exec: Callable[[int], None]):
+        self.logger = logger
+        self.on_exec = on_exec
+        self._source = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def supported() -> bool:
+        """Whether exec watching is possible on this platform."""
+        return os.path.isdir(PROC_ROOT) and hasattr(socket, "AF_NETLINK")
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start watching for new processes."""
+        if self.running:
+            return
+        try:
+            self._source = NetlinkExecSource()
+            self.logger.info("Exec watcher using netlink process connector.")
+        except OSError:
+            self._source = ProcDiffSource()
+            self.logger.info("Exec watcher using /proc diffing.")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="exec-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching and release the event source."""
+        self._stop.set()
+        if self._source is not None:
+            self._source.close()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._thread = None
+        self._source = None
+
+    def _run(self) -> None:
+        """Dispatch pids from the event source until stopped."""
+        source = self._source
+        own_pid = os.getpid()
+        while not self._stop.is_set():
+            try:
+                pids = source.poll()
+            except OSError as e:
+                if self._stop.is_set():
+                    break
+                self.logger.warning(f"Exec watcher event source failed: {e}")
+                source = self._source = ProcDiffSource()
+                continue
+            for pid in pids:
+                if pid == own_pid:
+                    continue
+                try:
+                    self.on_exec(pid)
+                except Exception as e:
+                    self.logger.error(f"Exec watcher callback failed for pid {pid}: {e}")
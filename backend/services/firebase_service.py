@@ -1,45 +1,50 @@
-import requests
-from datetime import date
-from typing import Optional, Dict, Any
-from ..utils.exceptions import FirebaseError
+from typing import Optional, Dict, Any, TYPE_CHECKING
 from ..utils.logger import Logger
-from ..config.constants import DATABASE_URL
+from ..utils.tracing import traced
+from ..config.constants import WATCHED_KEYS
+from .http_client import FirebaseClient
+from ..utils.metrics import FIREBASE_ERRORS
+
+if TYPE_CHECKING:
+    from .write_queue import FirebaseWriteQueue
 
 class FirebaseService:
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, client: Optional[FirebaseClient] = None, path: str = "",
+                 writes: Optional["FirebaseWriteQueue"] = None):
         self.logger = logger
-        self.last_reset_date = date.today()
+        self.client = client or FirebaseClient()
+        self.path = path
+        if writes is None:
+            from .write_queue import FirebaseWriteQueue
+            writes = FirebaseWriteQueue(logger, self.client)
+        self.writes = writes
 
+    @traced()
     def get_goal_status(self) -> Optional[Dict[str, Any]]:
         """Fetch the current goal status from Firebase."""
+        import requests
+
         try:
-            response = requests.get(DATABASE_URL)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            data = self.client.get_keys(WATCHED_KEYS, self.path)
+        except (requests.RequestException, ValueError) as e:
+            FIREBASE_ERRORS.inc(operation="fetch")
             self.logger.error(f"Error contacting Firebase: {e}")
             return None
+        return self.with_pending(data)
 
-    def reset_goal(self) -> None:
-        """Reset the goal in Firebase."""
-        try:
-            response = requests.put(
-                DATABASE_URL,
-                json=False,
-                headers={"Content-Type": "application/json"},
-            )
-            if response.ok:
-                self.logger.info("Reset goalReachedToday to false at midnight.")
-            else:
-                self.logger.error(f"Failed to reset goal: {response.text}")
-        except Exception as e:
-            self.logger.error(f"Exception during goal reset: {e}")
-            raise FirebaseError(f"Failed to reset goal: {e}")
+    def with_pending(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Overlay our own unsent writes, so a queued reset takes effect right away."""
+        data.update((key, value) for key, value in self.writes.pending(self.path).items()
+                    if key in WATCHED_KEYS)
+        return data
+
+    @traced()
+    def reset_goal(self, expires_at: Optional[float] = None) -> None:
+        """Queue ``goalReachedToday = false``, leaving the other keys untouched.
 
-    def should_reset_goal(self) -> bool:
-        """Check if the goal should be reset based on the date."""
-        today = date.today()
-        if today != self.last_reset_date:
-            self.last_reset_date = today
-            return True
-        return False
+        The write is sent in the background; ``expires_at`` (normally the
+        next midnight) stops a reset that could not be delivered in time from
+        clearing a goal reached on a later day.
+        """
+        self.writes.set(f"{self.path}/goalReachedToday", False, expires_at)
+        self.logger.info("Queued reset of goalReachedToday to false.")
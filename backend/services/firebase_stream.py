@@ -0,0 +1,217 @@
+import os
+import json
+import socket
+import threading
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, Tuple, TYPE_CHECKING
+from ..utils.logger import Logger
+from .http_client import FirebaseClient
+from .resilience import backoff_delay
+from ..utils.metrics import FIREBASE_ERRORS, FIREBASE_RETRIES
+from ..config.constants import (
+    WATCHED_KEYS,
+    STREAM_READ_TIMEOUT,
+    STREAM_RECONNECT_DELAY,
+    STREAM_MAX_RECONNECT_DELAY,
+)
+
+if TYPE_CHECKING:
+    import requests
+
+
+def parse_sse(lines: Iterable[bytes]) -> Iterator[Tuple[str, str]]:
+    """Parse a Server-Sent Events byte stream into (event, data) pairs."""
+    event, data = "message", []
+    for raw in lines:
+        line = raw.decode("utf-8").rstrip("\r")
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue
+        else:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+
+
+class FirebaseStream:
+    """Mirror selected Firebase keys through a Realtime Database event stream.
+
+    A background thread holds one ``text/event-stream`` connection, applies
+    ``put``/``patch`` events to an in-memory mirror of ``keys`` and signals
+    waiters only when one of those values actually changes.
+    """
+
+    def __init__(self, logger: Logger, client: Optional[FirebaseClient] = None,
+                 path: str = "", keys: Iterable[str] = WATCHED_KEYS,
+                 on_change: Optional[Callable[[], None]] = None):
+        self.logger = logger
+        self.on_change = on_change
+        self.client = client or FirebaseClient()
+        self.path = path
+        self.keys = tuple(keys)
+        self._mirror: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        self._synced = False
+        self._response = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def connected(self) -> bool:
+        """Whether the mirror holds a live copy of the watched keys."""
+        return self._synced
+
+    def start(self) -> None:
+        """Start the background listener thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="firebase-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the listener and close the open stream."""
+        self._stop.set()
+        response = self._response
+        if response is not None:
+            self._interrupt(response)
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._synced = False
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Return a copy of the mirrored keys, or None while not synced."""
+        with self._lock:
+            return dict(self._mirror) if self._synced else None
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """Block until a watched value changes or the timeout elapses."""
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        return changed
+
+    @staticmethod
+    def _interrupt(response: "requests.Response") -> None:
+        """Wake a read blocked on the listener thread.
+
+        Closing the response from another thread blocks until the pending
+        read returns, which can take a full keep-alive interval; shutting
+        the socket down makes the read return immediately instead.
+        """
+        try:
+            with socket.socket(fileno=os.dup(response.raw.fileno())) as sock:
+                sock.shutdown(socket.SHUT_RDWR)
+        except (OSError, ValueError):
+            pass
+
+    def _listen(self) -> None:
+        """Connect, consume events and reconnect with backoff until stopped."""
+        import requests
+
+        attempt = 0
+        while not self._stop.is_set():
+            try:
+                self._consume()
+            except (requests.RequestException, ConnectionError, ValueError) as e:
+                if self._stop.is_set():
+                    break
+                FIREBASE_ERRORS.inc(operation="stream")
+                self.logger.warning(f"Firebase stream disconnected: {e}")
+            finally:
+                # A connection that delivered data starts the backoff over.
+                attempt = 0 if self._synced else attempt + 1
+                self._set_synced(False)
+            delay = backoff_delay(attempt, STREAM_RECONNECT_DELAY, STREAM_MAX_RECONNECT_DELAY)
+            if self._stop.wait(delay):
+                break
+            FIREBASE_RETRIES.inc(operation="stream")
+
+    def _consume(self) -> None:
+        """Hold one stream open and apply its events until it closes."""
+        with self.client.stream(self.path, read_timeout=STREAM_READ_TIMEOUT) as response:
+            response.raise_for_status()
+            self._response = response
+            self.logger.info("Firebase stream connected.")
+            try:
+                for event, data in parse_sse(response.iter_lines(chunk_size=None)):
+                    if self._stop.is_set():
+                        return
+                    if event in ("put", "patch"):
+                        payload = json.loads(data)
+                        self._apply(event, payload.get("path", "/"), payload.get("data"))
+                    elif event in ("cancel", "auth_revoked"):
+                        raise ValueError(f"stream {event}: {data}")
+            finally:
+                self._response = None
+        raise ConnectionError("stream closed by server")
+
+    def _apply(self, event: str, path: str, data: Any) -> None:
+        """Apply a put/patch event to the mirror and signal on change."""
+        with self._lock:
+            before = dict(self._mirror)
+            parts = [p for p in path.split("/") if p]
+            if not parts:
+                # Absent keys stay out of the mirror (null deletes in Firebase), as
+                # FirebaseClient.get_keys does, so callers fall back to their defaults.
+                # A root that is not an object carries none of the keys.
+                source = data if isinstance(data, dict) else {}
+                if event == "put":
+                    self._mirror = {key: source[key] for key in self.keys
+                                    if source.get(key) is not None}
+                else:
+                    for key, value in source.items():
+                        if key in self.keys:
+                            self._store(key, value)
+            elif parts[0] in self.keys:
+                if len(parts) == 1 and event == "put":
+                    self._store(parts[0], data)
+                elif len(parts) == 1:
+                    current = self._mirror.get(parts[0])
+                    merged = dict(current) if isinstance(current, dict) else {}
+                    merged.update(data or {})
+                    self._mirror[parts[0]] = merged
+                else:
+                    self._mirror[parts[0]] = self._set_nested(self._mirror.get(parts[0]), parts[1:], data)
+            changed = self._mirror != before
+            first_sync = not self._synced
+            self._synced = True
+        if changed or first_sync:
+            self._notify()
+
+    def _store(self, key: str, value: Any) -> None:
+        """Set a mirrored key; a null value removes it."""
+        if value is None:
+            self._mirror.pop(key, None)
+        else:
+            self._mirror[key] = value
+
+    def _set_nested(self, node: Any, parts: list, data: Any) -> Any:
+        """Return a copy of node with data stored at the nested path."""
+        node = dict(node) if isinstance(node, dict) else {}
+        if len(parts) == 1:
+            if data is None:
+                node.pop(parts[0], None)
+            else:
+                node[parts[0]] = data
+        else:
+            node[parts[0]] = self._set_nested(node.get(parts[0]), parts[1:], data)
+        return node
+
+    def _set_synced(self, synced: bool) -> None:
+        """Mark the mirror live or stale; waiters are woken on loss."""
+        was_synced = self._synced
+        self._synced = synced
+        if was_synced and not synced:
+            self._notify()
+
+    def _notify(self) -> None:
+        """Wake waiters and the optional change callback."""
+        self._changed.set()
+        if self.on_change is not None:
+            self.on_change()
@@ -1,20 +1,206 @@
-from typing import List, Set
-from pathlib import Path
+import zlib
+from typing import List, Set, Dict, Iterable, Iterator, Optional
 from ..utils.exceptions import HostsFileError
+from ..utils.files import atomic_write_chunks
 from ..utils.logger import Logger
+from ..utils.tracing import traced
+from ..utils.metrics import HOSTS_BYTES_WRITTEN, HOSTS_TAMPER
 from ..config.constants import HOSTS_PATH, REDIRECT_IP
+from .domain_set import DomainSet, EMPTY
+
+MANAGED_BEGIN = "# >>> nopainnogame managed block >>>"
+MANAGED_END = "# <<< nopainnogame managed block <<<"
+# Blocklist section inside the managed block; the begin marker carries the set's fingerprint.
+BLOCKLIST_BEGIN = "# >>> nopainnogame blocklist"
+BLOCKLIST_END = "# <<< nopainnogame blocklist <<<"
+BLOCK_IPS = (REDIRECT_IP, "::1")
+
+
+def expand_site_list(sites: Iterable[str]) -> Set[str]:
+    """Expand site list to include www variants."""
+    return {site for s in sites for site in (s, f"www.{s}" if not s.startswith("www.") else s)}
+
+
+class ManagedChecksum:
+    """CRC32 of the managed block, computed from the file's text fed in order.
+
+    Fed the chunks of a render as they are written, or a whole file as one
+    chunk, so the check costs one pass over the block and never a parse.
+    ``value`` is None when no complete managed block was seen.
+    """
+
+    def __init__(self):
+        self.value: Optional[int] = None
+        self._crc: Optional[int] = None
+
+    def feed(self, chunk: str) -> str:
+        if self.value is not None:
+            return chunk
+        start = 0
+        if self._crc is None:
+            start = chunk.find(MANAGED_BEGIN)
+            if start < 0:
+                return chunk
+            self._crc = 0
+        end = chunk.find(MANAGED_END, start)
+        if end < 0:
+            self._crc = zlib.crc32(chunk[start:].encode(), self._crc)
+        else:
+            self.value = zlib.crc32(chunk[start:end + len(MANAGED_END)].encode(), self._crc)
+        return chunk
+
+    @classmethod
+    def of(cls, text: str) -> Optional[int]:
+        checksum = cls()
+        checksum.feed(text)
+        return checksum.value
+
+
+class HostsFile:
+    """Parsed hosts file split into foreign lines and our managed block.
+
+    The file is parsed once into a set of managed sites plus an index of
+    legacy ``<ip> <site>`` lines written outside the block by older versions,
+    so every edit is a set operation and rendering is a single pass.
+
+    A blocklist section can hold hundreds of thousands of lines, so it is
+    never split into lines: it is cut out as one slice, identified by the
+    fingerprint on its begin marker, and written back verbatim unless a
+    different blocklist replaces it.
+    """
+
+    def __init__(self, text: str):
+        self.original = text
+        self.lines: List[str] = []
+        self.block_index: Optional[int] = None
+        self.managed: Set[str] = set()
+        self.legacy: Dict[str, List[int]] = {}
+        self.blocklist_id: Optional[str] = None
+        self._blocklist_text = ""
+        self._blocklist: Optional[DomainSet] = None
+        self._dropped: Set[int] = set()
+        self._rest = self._cut_blocklist(text)
+        self._parse(self._rest)
+        self._parsed_managed = frozenset(self.managed)
+
+    def _cut_blocklist(self, text: str) -> str:
+        """Set the blocklist section aside and return the rest of the file."""
+        start = text.find(BLOCKLIST_BEGIN)
+        if start < 0 or (start and text[start - 1] != "\n"):
+            return text
+        end = text.find(BLOCKLIST_END, start)
+        if end < 0:
+            return text
+        end = text.find("\n", end)
+        end = len(text) if end < 0 else end + 1
+        header_end = text.find("\n", start)
+        self.blocklist_id = text[start + len(BLOCKLIST_BEGIN):header_end].strip() or None
+        self._blocklist_text = text[start:end]
+        return text[:start] + text[end:]
+
+    def _parse(self, text: str) -> None:
+        """Split the file into foreign lines, the managed block and legacy entries."""
+        in_block = False
+        for line in text.splitlines(keepends=True):
+            stripped = line.strip()
+            if stripped == MANAGED_BEGIN and self.block_index is None:
+                in_block = True
+                self.block_index = len(self.lines)
+                continue
+            if in_block:
+                if stripped == MANAGED_END:
+                    in_block = False
+                else:
+                    parts = stripped.split()
+                    if len(parts) == 2 and parts[0] in BLOCK_IPS:
+                        self.managed.add(parts[1])
+                continue
+            parts = stripped.split()
+            if len(parts) == 2 and parts[0] in BLOCK_IPS:
+                self.legacy.setdefault(parts[1], []).append(len(self.lines))
+            self.lines.append(line)
+
+    def drop_legacy(self, sites: Iterable[str]) -> None:
+        """Remove entries for sites that were written outside the managed block."""
+        for site in sites:
+            self._dropped.update(self.legacy.pop(site, ()))
+
+    def set_blocklist(self, domain_set: DomainSet) -> None:
+        """Replace the blocklist section; an empty set removes it."""
+        self._blocklist = domain_set
+
+    @property
+    def blocklist_changed(self) -> bool:
+        if self._blocklist is None:
+            return False
+        new_id = self._blocklist.fingerprint if len(self._blocklist) else None
+        return new_id != self.blocklist_id
+
+    def changed(self) -> bool:
+        """Return whether rendering would produce different content than was read.
+
+        Only the small part of the file is rendered for the comparison; the
+        blocklist section is compared by fingerprint.
+        """
+        if self.blocklist_changed or self._dropped or self.managed != self._parsed_managed:
+            return True
+        return "".join(self.iter_render(blocklist=False)) != self._rest
+
+    def _has_blocklist(self) -> bool:
+        if self._blocklist is None:
+            return bool(self._blocklist_text)
+        return len(self._blocklist) > 0
+
+    def _iter_blocklist(self) -> Iterator[str]:
+        if not self.blocklist_changed:
+            if self._blocklist_text:
+                yield self._blocklist_text
+            return
+        if len(self._blocklist):
+            yield f"{BLOCKLIST_BEGIN} {self._blocklist.fingerprint}\n"
+            yield from self._blocklist.iter_hosts_lines(BLOCK_IPS)
+            yield f"{BLOCKLIST_END}\n"
+
+    def iter_render(self, blocklist: bool = True) -> Iterator[str]:
+        """Render the file in chunks with the managed block at its original position."""
+        index = len(self.lines) if self.block_index is None else self.block_index
+        head = [line for i, line in enumerate(self.lines[:index]) if i not in self._dropped]
+        tail = [line for i, line in enumerate(self.lines[index:], index) if i not in self._dropped]
+        if not (self.managed or self._has_blocklist()):
+            yield "".join(head) + "".join(tail)
+            return
+
+        if head and not head[-1].endswith("\n"):
+            head[-1] += "\n"
+        entries = "".join(f"{ip} {site}\n" for site in sorted(self.managed) for ip in BLOCK_IPS)
+        yield "".join(head) + f"{MANAGED_BEGIN}\n{entries}"
+        if blocklist:
+            yield from self._iter_blocklist()
+        yield f"{MANAGED_END}\n" + "".join(tail)
+
+    def render(self) -> str:
+        """Render the file with the managed block at its original position."""
+        return "".join(self.iter_render())
+
 
 class HostsManager:
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, hosts_path: str = HOSTS_PATH):
         self.logger = logger
+        self.hosts_path = hosts_path
+        # Checksum of the managed block as last read or written; None until then.
+        self.checksum: Optional[int] = None
 
     def _expand_site_list(self, sites: List[str]) -> Set[str]:
         """Expand site list to include www variants."""
-        return {site for s in sites for site in (s, f"www.{s}" if not s.startswith("www.") else s)}
+        return expand_site_list(sites)
 
+    @traced()
     def clear_all_blocked_sites(self, skip_poller_check: bool = False) -> None:
         """Remove all blocked sites from the hosts file.
 
+        Only the managed block is removed; lines written by other tools
+        are never touched.
+
         Args:
             skip_poller_check: If True, skips checking if the poller is active.
                              This should be True when called during cleanup.
@@ -24,24 +210,10 @@ class HostsManager:
 
         self.logger.info("Clearing all blocked sites from hosts file.")
         try:
-            with open(HOSTS_PATH, "r") as file:
-                lines = file.readlines()
-
-            with open(HOSTS_PATH, "w") as file:
-                for line in lines:
-                    stripped = line.strip()
-                    # Keep localhost entries and other system entries
-                    if stripped.startswith("127.0.0.1") and "localhost" in stripped:
-                        file.write(line)
-                    elif stripped.startswith("::1") and "localhost" in stripped:
-                        file.write(line)
-                    elif stripped.startswith("255.255.255.255"):
-                        file.write(line)
-                    elif stripped.startswith("#"):
-                        file.write(line)
-                    # Only remove lines that start with our redirect IPs and don't contain localhost
-                    elif not (stripped.startswith(REDIRECT_IP) or stripped.startswith("::1")):
-                        file.write(line)
+            hosts = self._read()
+            hosts.managed.clear()
+            hosts.set_blocklist(EMPTY)
+            self._write(hosts)
         except PermissionError:
             self.logger.error("Permission denied while modifying /etc/hosts. Try running with sudo.")
             raise HostsFileError("Permission denied while modifying /etc/hosts")
@@ -49,20 +221,17 @@ class HostsManager:
             self.logger.error(f"Failed to clear blocked sites: {e}")
             raise HostsFileError(f"Failed to clear blocked sites: {e}")
 
+    @traced()
     def block_websites(self, sites: List[str]) -> None:
-        """Block specified websites by modifying the hosts file."""
+        """Block specified websites by adding them to the managed block."""
         sites = self._expand_site_list(sites)
         self.logger.info("Blocking distracting websites.")
 
         try:
-            with open(HOSTS_PATH, "r+") as file:
-                content = file.read()
-                file.seek(0)
-                for site in sites:
-                    for entry in (f"{REDIRECT_IP} {site}", f"::1 {site}"):
-                        if entry not in content:
-                            file.write(entry + "\n")
-                file.write(content)
+            hosts = self._read()
+            hosts.drop_legacy(sites)
+            hosts.managed |= sites
+            self._write(hosts)
         except PermissionError:
             self.logger.error("Permission denied while modifying /etc/hosts. Try running with sudo.")
             raise HostsFileError("Permission denied while modifying /etc/hosts")
@@ -70,27 +239,106 @@ class HostsManager:
             self.logger.error(f"Failed to block websites: {e}")
             raise HostsFileError(f"Failed to block websites: {e}")
 
+    @traced()
     def unblock_websites(self, sites: List[str]) -> None:
         """Unblock specified websites by removing them from the hosts file."""
         sites = self._expand_site_list(sites)
         self.logger.info("Unblocking distracting websites.")
 
         try:
-            with open(HOSTS_PATH, "r") as file:
-                lines = file.readlines()
-
-            with open(HOSTS_PATH, "w") as file:
-                for line in lines:
-                    stripped = line.strip()
-                    if not any(
-                        stripped.startswith(f"{ip} {site}") or stripped.startswith(f"{ip} www.{site}")
-                        for site in sites
-                        for ip in (REDIRECT_IP, "::1")
-                    ):
-                        file.write(line)
+            hosts = self._read()
+            hosts.drop_legacy(sites)
+            hosts.managed -= sites
+            self._write(hosts)
         except PermissionError:
             self.logger.error("Permission denied while modifying /etc/hosts. Try running with sudo.")
             raise HostsFileError("Permission denied while modifying /etc/hosts")
         except Exception as e:
             self.logger.error(f"Failed to unblock websites: {e}")
             raise HostsFileError(f"Failed to unblock websites: {e}")
+
+    @traced()
+    def apply_websites(self, block: List[str], unblock: List[str],
+                       domain_set: Optional[DomainSet]) -> None:
+        """Unblock, block and set the blocklist in a single read and write of the file.
+
+        Used to re-apply everything at once: separate edits would each
+        re-read the file, and one that finds nothing to change takes the
+        file as it is, so an external edit landing between them would be
+        adopted as the applied state.
+        """
+        block_sites = self._expand_site_list(block)
+        unblock_sites = self._expand_site_list(unblock) - block_sites
+        self.logger.info("Applying blocked websites.")
+
+        try:
+            hosts = self._read()
+            hosts.drop_legacy(block_sites | unblock_sites)
+            hosts.managed -= unblock_sites
+            hosts.managed |= block_sites
+            hosts.set_blocklist(domain_set or EMPTY)
+            self._write(hosts)
+        except PermissionError:
+            self.logger.error("Permission denied while modifying /etc/hosts. Try running with sudo.")
+            raise HostsFileError("Permission denied while modifying /etc/hosts")
+        except Exception as e:
+            self.logger.error(f"Failed to apply blocked websites: {e}")
+            raise HostsFileError(f"Failed to apply blocked websites: {e}")
+
+    @traced()
+    def set_blocklist(self, domain_set: Optional[DomainSet]) -> None:
+        """Write a blocklist into the managed block, replacing any previous one.
+
+        None or an empty set removes the blocklist section. Nothing is
+        written when the file already holds a blocklist with the same
+        fingerprint.
+        """
+        domain_set = domain_set or EMPTY
+        try:
+            hosts = self._read()
+            hosts.set_blocklist(domain_set)
+            if self._write(hosts):
+                self.logger.info(f"Blocklist applied: {len(domain_set)} domains.")
+        except PermissionError:
+            self.logger.error("Permission denied while modifying /etc/hosts. Try running with sudo.")
+            raise HostsFileError("Permission denied while modifying /etc/hosts")
+        except Exception as e:
+            self.logger.error(f"Failed to apply blocklist: {e}")
+            raise HostsFileError(f"Failed to apply blocklist: {e}")
+
+    def verify(self) -> bool:
+        """Return whether the managed block is still exactly what was last applied.
+
+        Only the block's checksum is compared; edits elsewhere in the file
+        do not count. True while nothing has been applied yet.
+        """
+        if self.checksum is None:
+            return True
+        try:
+            with open(self.hosts_path, "r") as file:
+                found = ManagedChecksum.of(file.read())
+        except OSError as e:
+            self.logger.warning(f"Failed to read hosts file for verification: {e}")
+            found = None
+        if found == self.checksum:
+            return True
+        HOSTS_TAMPER.inc()
+        return False
+
+    def _read(self) -> HostsFile:
+        """Read and parse the hosts file in one pass."""
+        with open(self.hosts_path, "r") as file:
+            return HostsFile(file.read())
+
+    def _write(self, hosts: HostsFile) -> bool:
+        """Atomically replace the hosts file; skip the write if nothing changed."""
+        if not hosts.changed():
+            self.checksum = ManagedChecksum.of(hosts.original)
+            return False
+
+        checksum = ManagedChecksum()
+        written = atomic_write_chunks(self.hosts_path, map(checksum.feed, hosts.iter_render()),
+                                      fsync=True)
+        self.checksum = checksum.value
+        HOSTS_BYTES_WRITTEN.inc(written)
+        return True
@@ -0,0 +1,181 @@
+import os
+import threading
+from typing import Optional, Dict, Any, Iterable, Tuple, TYPE_CHECKING
+from ..config.constants import (
+    DATABASE_BASE_URL,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_POOL_SIZE,
+)
+
+if TYPE_CHECKING:
+    import requests
+
+
+class FirebaseClient:
+    """Shared keep-alive HTTP client for all Firebase REST traffic.
+
+    Requests go through one pooled session with strict timeouts. GETs are
+    sent with ``If-None-Match`` so an unchanged resource costs a 304, and the
+    client counts bytes and new connections so savings can be measured.
+
+    ``requests`` is imported when the first request is sent, not when the
+    client is built, so it stays off the daemon's startup path.
+    """
+
+    def __init__(self, base_url: str = DATABASE_BASE_URL, pool_size: int = HTTP_POOL_SIZE,
+                 timeout: Tuple[float, float] = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session: Optional["requests.Session"] = None
+        self._adapter: Any = None
+        self._session_lock = threading.Lock()
+        self._cache: Dict[str, Tuple[str, Any]] = {}
+        self._stats = {"requests": 0, "bytes": 0, "not_modified": 0}
+        self._cycle_start = dict(self._stats, handshakes=0)
+
+    @property
+    def session(self) -> "requests.Session":
+        """The pooled session, created on first use."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    # Proxy and CA settings come from the daemon's environment, which
+                    # does not change; resolve them once instead of on every request.
+                    session.proxies.update(requests.utils.get_environ_proxies(self.base_url))
+                    session.verify = (os.environ.get("REQUESTS_CA_BUNDLE")
+                                      or os.environ.get("CURL_CA_BUNDLE") or True)
+                    session.trust_env = False
+                    self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                                                max_retries=0)
+                    session.mount("https://", self._adapter)
+                    session.mount("http://", self._adapter)
+                    self._session = session
+        return self._session
+
+    def url(self, path: str = "") -> str:
+        """Return the REST URL for a database path."""
+        path = path.strip("/")
+        return f"{self.base_url}/{path}.json" if path else f"{self.base_url}/.json"
+
+    def get(self, path: str = "", shallow: bool = False,
+            query: Optional[Dict[str, str]] = None) -> Any:
+        """GET a database path, returning the cached value on 304.
+
+        ``query`` adds REST query parameters such as ``orderBy``/``startAt``;
+        their values are JSON, so strings must be quoted. Query results are
+        not cached, since each query is usually asked only once.
+        """
+        url = self.url(path)
+        if query:
+            response = self._request("GET", url, params=query)
+            response.raise_for_status()
+            return response.json()
+        params = {"shallow": "true"} if shallow else None
+        key = f"{url}?shallow" if shallow else url
+        headers = {"X-Firebase-ETag": "true"}
+        cached = self._cache.get(key)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+
+        response = self._request("GET", url, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            self._stats["not_modified"] += 1
+            return cached[1]
+        response.raise_for_status()
+        value = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            self._cache[key] = (etag, value)
+        return value
+
+    def get_keys(self, keys: Iterable[str], path: str = "") -> Dict[str, Any]:
+        """Read only the given keys of a path (the root by default) using a shallow read."""
+        data = self.get(path, shallow=True)
+        data = data if isinstance(data, dict) else {}
+        return {key: data[key] for key in keys if key in data}
+
+    def get_etag(self, path: str) -> Tuple[Any, str]:
+        """GET a database path together with its ETag, for a later :meth:`put_if`."""
+        response = self._request("GET", self.url(path), headers={"X-Firebase-ETag": "true"})
+        response.raise_for_status()
+        return response.json(), response.headers.get("ETag", "")
+
+    def put_if(self, path: str, value: Any, etag: str) -> Tuple[bool, Any, str]:
+        """PUT a value only if the path still has ``etag`` (a compare-and-set).
+
+        Returns (written, current value, current ETag); when another writer
+        got there first the server answers 412 with its value and ETag.
+        """
+        response = self._request("PUT", self.url(path), json=value,
+                                 headers={"Content-Type": "application/json", "if-match": etag,
+                                          "X-Firebase-ETag": "true"})
+        if response.status_code == 412:
+            return False, response.json(), response.headers.get("ETag", "")
+        response.raise_for_status()
+        self._cache.clear()
+        return True, value, response.headers.get("ETag", "")
+
+    def put(self, path: str, value: Any) -> "requests.Response":
+        """PUT a JSON value at a database path."""
+        return self._write("PUT", path, value)
+
+    def patch(self, path: str, value: Dict[str, Any]) -> "requests.Response":
+        """PATCH several children of a database path in one request."""
+        return self._write("PATCH", path, value)
+
+    def stream(self, path: str = "", read_timeout: Optional[float] = None) -> "requests.Response":
+        """Open a ``text/event-stream`` response for a database path."""
+        return self.session.get(
+            self.url(path),
+            headers={"Accept": "text/event-stream"},
+            stream=True,
+            timeout=(self.timeout[0], read_timeout or self.timeout[1]),
+        )
+
+    def begin_cycle(self) -> None:
+        """Start a new accounting window for :meth:`cycle_stats`."""
+        self._cycle_start = self.stats()
+
+    def cycle_stats(self) -> Dict[str, int]:
+        """Return traffic counters accumulated since :meth:`begin_cycle`."""
+        current = self.stats()
+        return {name: current[name] - self._cycle_start.get(name, 0) for name in current}
+
+    def stats(self) -> Dict[str, int]:
+        """Return cumulative request, byte, 304 and handshake counters."""
+        return dict(self._stats, handshakes=self.handshakes)
+
+    @property
+    def handshakes(self) -> int:
+        """Number of connections (TCP/TLS handshakes) opened so far."""
+        if self._adapter is None:
+            return 0
+        pools = self._adapter.poolmanager.pools
+        return sum(getattr(pools[key], "num_connections", 0) for key in pools.keys())
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        if self._session is not None:
+            self._session.close()
+
+    def _write(self, method: str, path: str, value: Any) -> "requests.Response":
+        """Send a JSON write and drop cached ETags that it invalidates."""
+        response = self._request(method, self.url(path), json=value,
+                                 headers={"Content-Type": "application/json"})
+        self._cache.clear()
+        return response
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> "requests.Response":
+        """Send a request through the pool and account for its size."""
+        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        self._stats["requests"] += 1
+        self._stats["bytes"] += len(response.content) + sum(
+            len(k) + len(v) + 4 for k, v in response.headers.items()
+        )
+        return response
@@ -0,0 +1,210 @@
+import sys
+import time
+import shutil
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from ..utils.logger import Logger
+from ..utils.metrics import NOTIFICATIONS
+from ..config.constants import (
+    NOTIFY_BACKEND,
+    NOTIFY_COALESCE_WINDOW,
+    NOTIFY_MIN_INTERVAL,
+    NOTIFY_TIMEOUT,
+)
+
+APP_NAME = "No Pain No Game"
+
+
+@dataclass
+class Notification:
+    """One toast, possibly summarising several coalesced events."""
+    title: str
+    message: str
+    subtitle: Optional[str] = None
+    sound: Optional[str] = None
+
+
+def _applescript_string(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class OsascriptBackend:
+    """macOS Notification Center through ``osascript``; no shell is involved."""
+
+    name = "osascript"
+
+    def __init__(self, timeout: float = NOTIFY_TIMEOUT):
+        self.timeout = timeout
+
+    def send(self, notification: Notification) -> None:
+        import subprocess
+
+        script = f"display notification {_applescript_string(notification.message)} " \
+                 f"with title {_applescript_string(notification.title)}"
+        if notification.subtitle:
+            script += f" subtitle {_applescript_string(notification.subtitle)}"
+        if notification.sound:
+            script += f" sound name {_applescript_string(notification.sound)}"
+        subprocess.run(["osascript", "-e", script], check=True, timeout=self.timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class NotifySendBackend:
+    """Desktop notifications on Linux through ``notify-send`` (freedesktop D-Bus)."""
+
+    name = "notify-send"
+
+    def __init__(self, timeout: float = NOTIFY_TIMEOUT):
+        self.timeout = timeout
+
+    def send(self, notification: Notification) -> None:
+        import subprocess
+
+        body = notification.message
+        if notification.subtitle:
+            body = f"{notification.subtitle}\n{body}"
+        subprocess.run(["notify-send", "--app-name", APP_NAME, notification.title, body],
+                       check=True, timeout=self.timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class NullBackend:
+    """Keeps notifications in memory instead of showing them (tests, benchmarks, headless)."""
+
+    name = "none"
+
+    def __init__(self):
+        self.sent: List[Notification] = []
+
+    def send(self, notification: Notification) -> None:
+        self.sent.append(notification)
+
+
+BACKENDS: Dict[str, Callable[[], object]] = {
+    OsascriptBackend.name: OsascriptBackend,
+    NotifySendBackend.name: NotifySendBackend,
+    NullBackend.name: NullBackend,
+}
+
+
+def default_backend(name: str = NOTIFY_BACKEND):
+    """The configured backend; "auto" picks the platform's tool if it is installed."""
+    if name != "auto":
+        return BACKENDS[name]()
+    if sys.platform == "darwin" and shutil.which("osascript"):
+        return OsascriptBackend()
+    if sys.platform.startswith("linux") and shutil.which("notify-send"):
+        return NotifySendBackend()
+    return NullBackend()
+
+
+@dataclass
+class _Pending:
+    title: str
+    message: str
+    sound: Optional[str]
+    items: "Counter[str]" = field(default_factory=Counter)
+    events: int = 0
+
+
+class NotificationDispatcher:
+    """Shows notifications from a background thread, coalesced and rate limited.
+
+    :meth:`notify` only records the event and returns; the backend (which
+    may spawn a process) runs on the dispatcher's own thread, started on
+    first use. Events with the same key that arrive within
+    NOTIFY_COALESCE_WINDOW, or while the key is rate limited, become one
+    notification listing the items involved, and each key is shown at most
+    once per NOTIFY_MIN_INTERVAL.
+    """
+
+    def __init__(self, logger: Logger, backend=None,
+                 window: float = NOTIFY_COALESCE_WINDOW,
+                 min_interval: float = NOTIFY_MIN_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.logger = logger
+        self.backend = backend
+        self.window = window
+        self.min_interval = min_interval
+        self.clock = clock
+        self._pending: Dict[str, _Pending] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def notify(self, title: str, message: str, key: Optional[str] = None,
+               item: Optional[str] = None, sound: Optional[str] = None) -> None:
+        """Queue a notification; never blocks and never raises."""
+        key = key or title
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = _Pending(title, message, sound)
+            pending.events += 1
+            if item:
+                pending.items[item] += 1
+            if self._thread is None and not self._stopping.is_set():
+                self._thread = threading.Thread(target=self._run, name="notifications", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Stop the dispatcher thread; notifications still pending are dropped."""
+        self._stopping.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def flush(self) -> int:
+        """Send every pending notification whose key is not rate limited; return how many."""
+        now = self.clock()
+        with self._lock:
+            due = {key: pending for key, pending in self._pending.items()
+                   if now - self._last_sent.get(key, float("-inf")) >= self.min_interval}
+            for key in due:
+                del self._pending[key]
+                self._last_sent[key] = now
+        for pending in due.values():
+            self._send(pending)
+        return len(due)
+
+    def next_due(self) -> Optional[float]:
+        """Seconds until a rate-limited key may be shown again, or None if nothing waits."""
+        now = self.clock()
+        with self._lock:
+            waits = [self._last_sent.get(key, float("-inf")) + self.min_interval - now
+                     for key in self._pending]
+        return max(0.0, min(waits)) if waits else None
+
+    def _send(self, pending: _Pending) -> None:
+        if self.backend is None:
+            self.backend = default_backend()
+        subtitle = None
+        if pending.items:
+            subtitle = "Closed " + ", ".join(
+                name if count == 1 else f"{name} ({count}x)"
+                for name, count in sorted(pending.items.items()))
+        notification = Notification(pending.title, pending.message, subtitle, pending.sound)
+        try:
+            self.backend.send(notification)
+        except Exception as e:
+            NOTIFICATIONS.inc(result="failed")
+            self.logger.warning(f"Failed to display notification via {self.backend.name}: {e}")
+            return
+        NOTIFICATIONS.inc(result="sent")
+        if pending.events > 1:
+            NOTIFICATIONS.inc(pending.events - 1, result="coalesced")
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.next_due())
+            self._wake.clear()
+            # Let a burst (one sweep killing several apps) land in a single toast.
+            if self._stopping.wait(self.window):
+                return
+            self.flush()
@@ -0,0 +1,276 @@
+import math
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, tzinfo
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+from ..utils.exceptions import ConfigError
+from ..config.constants import RESET_TIMEZONE
+from .hosts_manager import expand_site_list
+from .process_scanner import AppMatcher
+from .scheduler import resolve_timezone
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DAY_GROUPS = {"daily": range(7), "weekdays": range(5), "weekends": range(5, 7)}
+# Values of a rule's "until": blocked until the daily goal is reached, or for the whole window.
+UNTIL_GOAL = "goal"
+UNTIL_NEVER = "never"
+# Decisions cached per policy; the poller moves forward through the week, so few are live.
+DECISION_CACHE_SIZE = 64
+
+Until = Union[str, float]
+
+
+def _parse_time(value: Any, what: str) -> int:
+    """Minutes after midnight for "HH:MM" (24:00 allowed)."""
+    try:
+        hours, minutes = (int(part) for part in str(value).split(":"))
+    except ValueError:
+        raise ConfigError(f"Invalid {what} time {value!r}; expected HH:MM")
+    total = hours * 60 + minutes
+    if not (0 <= minutes < 60 and 0 <= total <= MINUTES_PER_DAY):
+        raise ConfigError(f"Invalid {what} time {value!r}")
+    return total
+
+
+def _parse_days(value: Any) -> List[int]:
+    """Weekday numbers for "mon-fri", "daily", "weekends" or a list of day names."""
+    if value is None:
+        return list(range(7))
+    names = [value] if isinstance(value, str) else list(value)
+    days = []
+    for name in names:
+        name = str(name).lower()
+        if name in DAY_GROUPS:
+            days.extend(DAY_GROUPS[name])
+        elif "-" in name:
+            first, _, last = name.partition("-")
+            if first not in DAY_NAMES or last not in DAY_NAMES:
+                raise ConfigError(f"Invalid day range {name!r}")
+            start, end = DAY_NAMES.index(first), DAY_NAMES.index(last)
+            days.extend(day % 7 for day in range(start, end + (1 if end >= start else 8)))
+        elif name in DAY_NAMES:
+            days.append(DAY_NAMES.index(name))
+        else:
+            raise ConfigError(f"Invalid day {name!r}")
+    return sorted(set(days))
+
+
+def parse_window(raw: Mapping[str, Any]) -> List[Tuple[int, int]]:
+    """Minute-of-week spans [start, end) for one window; Monday 00:00 is minute 0.
+
+    A window whose end is not after its start runs overnight into the next
+    day, so {"start": "22:00", "end": "06:00"} covers the night after each
+    listed day; equal times cover the whole day.
+    """
+    start = _parse_time(raw.get("start", "00:00"), "start")
+    end = _parse_time(raw.get("end", "24:00"), "end")
+    length = (end - start) % MINUTES_PER_DAY or MINUTES_PER_DAY
+    spans = []
+    for day in _parse_days(raw.get("days")):
+        first = day * MINUTES_PER_DAY + start
+        last = first + length
+        if last > MINUTES_PER_WEEK:
+            spans.append((0, last - MINUTES_PER_WEEK))
+            last = MINUTES_PER_WEEK
+        spans.append((first, last))
+    return spans
+
+
+def _targets(value: Any, what: str) -> Tuple[str, ...]:
+    """A rule's apps or sites; must be a list of non-empty strings.
+
+    A bare string would otherwise become one target per character, and a
+    one-letter app name matches nearly every process.
+    """
+    if value is None:
+        return ()
+    if not isinstance(value, (list, tuple)) or not all(
+            isinstance(item, str) and item.strip() for item in value):
+        raise ConfigError(f"Invalid {what} {value!r}; expected a list of non-empty strings")
+    return tuple(value)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Apps and sites blocked during some windows until a condition is met.
+
+    ``until`` is UNTIL_GOAL, UNTIL_NEVER or a number of workout minutes;
+    no windows means the rule applies around the clock.
+    """
+    apps: Tuple[str, ...] = ()
+    sites: Tuple[str, ...] = ()
+    until: Until = UNTIL_GOAL
+    windows: Tuple[Tuple[int, int], ...] = ()
+
+    @classmethod
+    def parse(cls, raw: Mapping[str, Any]) -> "Rule":
+        """Build a rule from its config entry; raises ConfigError if it is malformed."""
+        if not isinstance(raw, Mapping):
+            raise ConfigError(f"Invalid rule {raw!r}; expected an object")
+        until = raw.get("until", UNTIL_GOAL)
+        if isinstance(until, bool) or not (until in (UNTIL_GOAL, UNTIL_NEVER)
+                                           or isinstance(until, (int, float))):
+            raise ConfigError(f"Invalid rule until {until!r}; expected "
+                              f"{UNTIL_GOAL!r}, {UNTIL_NEVER!r} or workout minutes")
+        windows = tuple(span for window in raw.get("windows", ()) for span in parse_window(window))
+        return cls(_targets(raw.get("apps"), "rule apps"), _targets(raw.get("sites"), "rule sites"),
+                   float(until) if isinstance(until, (int, float)) else until, windows)
+
+    def blocks(self, goal_reached: bool, minutes: float) -> bool:
+        """Whether the rule blocks its targets, given that one of its windows is open."""
+        if self.until == UNTIL_NEVER:
+            return True
+        if self.until == UNTIL_GOAL:
+            return not goal_reached
+        return minutes < self.until
+
+
+@dataclass(frozen=True)
+class Decision:
+    """What a policy blocks at one moment: apps, and sites with their www variants."""
+    apps: FrozenSet[str]
+    sites: FrozenSet[str]
+    app_matcher: AppMatcher = field(compare=False)
+
+
+class Policy:
+    """Block rules compiled into minute-of-week buckets.
+
+    The week is cut at every window edge; neighbouring spans with the same
+    open rules form one bucket, and a minute-indexed array maps any time to
+    its bucket. Within a bucket the outcome depends only on whether the goal
+    is reached and on which workout-minute thresholds are passed, so each
+    such combination is decided once and cached: a decision is an array
+    lookup plus a dict hit, and checking one process or domain against it
+    is a set or matcher lookup. Each bucket also knows when the next
+    different bucket begins, which is when enforcement has to run again.
+    """
+
+    def __init__(self, rules: Sequence[Rule] = (), tz: Optional[tzinfo] = None):
+        self.rules = tuple(rules)
+        self.tz = tz
+        self.apps = frozenset(app for rule in self.rules for app in rule.apps)
+        self.sites = frozenset(expand_site_list(site for rule in self.rules for site in rule.sites))
+        self.app_matcher = AppMatcher(self.apps)
+        # Every rule blocks until the goal, around the clock: the goal alone decides.
+        self.simple = all(rule.until == UNTIL_GOAL and not rule.windows for rule in self.rules)
+        self._compile()
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], tz: Optional[tzinfo] = None) -> "Policy":
+        """Compile a config's ``rules``, plus its flat apps/sites lists as a goal rule.
+
+        Windows are read in RESET_TIMEZONE, the zone whose days the goal counts.
+        """
+        rules = []
+        apps, sites = _targets(config.get("apps"), "apps"), _targets(config.get("sites"), "sites")
+        if apps or sites:
+            rules.append(Rule(apps, sites))
+        raw_rules = config.get("rules", [])
+        if not isinstance(raw_rules, list):
+            raise ConfigError("rules must be a list")
+        rules.extend(Rule.parse(raw) for raw in raw_rules)
+        return cls(rules, tz if tz is not None else resolve_timezone(RESET_TIMEZONE))
+
+    def _compile(self) -> None:
+        # Sweep the week's window edges, counting how many of its spans hold each rule open.
+        changes: Dict[int, Dict[int, int]] = {0: {}, MINUTES_PER_WEEK: {}}
+        for i, rule in enumerate(self.rules):
+            for start, end in (rule.windows or ((0, MINUTES_PER_WEEK),)):
+                for edge, delta in ((start, 1), (end, -1)):
+                    counts = changes.setdefault(edge, {})
+                    counts[i] = counts.get(i, 0) + delta
+        edges = sorted(changes)
+        depth: Dict[int, int] = {}
+        self._open: List[Tuple[int, ...]] = []  # indexes of the rules open in each bucket
+        self._spans: List[Tuple[int, int]] = []
+        self._index = array("H", bytes(2 * MINUTES_PER_WEEK))
+        for start, end in zip(edges, edges[1:]):
+            for i, delta in changes[start].items():
+                depth[i] = depth.get(i, 0) + delta
+                if not depth[i]:
+                    del depth[i]
+            open_rules = tuple(sorted(depth))
+            if self._open and self._open[-1] == open_rules:
+                self._spans[-1] = (self._spans[-1][0], end)
+            else:
+                self._open.append(open_rules)
+                self._spans.append((start, end))
+            self._index[start:end] = array("H", [len(self._open) - 1]) * (end - start)
+
+        # Minute of the week (possibly in the following week) at which each bucket gives way.
+        count = len(self._open)
+        self._changes: List[Optional[int]] = []
+        for bucket, (_, end) in enumerate(self._spans):
+            if count == 1:
+                self._changes.append(None)
+            elif bucket == count - 1 and self._open[0] == self._open[bucket]:
+                # The week wraps into a bucket with the same rules; the change comes when it ends.
+                self._changes.append(MINUTES_PER_WEEK + self._spans[0][1])
+            else:
+                self._changes.append(end)
+        self._thresholds = [sorted({self.rules[i].until for i in open_rules
+                                    if isinstance(self.rules[i].until, float)})
+                            for open_rules in self._open]
+        self._decisions: Dict[Tuple[int, bool, int], Decision] = {}
+        self._minute: Tuple[float, Optional[datetime], int] = (float("inf"), None, 0)
+
+    def _minute_of_week(self, now: float) -> Tuple[datetime, int]:
+        """Start of the local minute containing ``now``, and its minute of the week."""
+        start, minute_start, minute = self._minute
+        if start <= now < start + 60:
+            return minute_start, minute
+        # Whole seconds keep the minute's bounds exact, so an edge is never seen late.
+        whole = math.floor(now)
+        local = datetime.fromtimestamp(whole, self.tz)
+        start = whole - local.second
+        local = local.replace(second=0)
+        minute = local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+        self._minute = (start, local, minute)
+        return local, minute
+
+    def decide(self, now: float, goal_reached: bool, minutes: float = 0) -> Decision:
+        """Apps and sites blocked at ``now`` for the given goal status and workout minutes."""
+        bucket = self._index[self._minute_of_week(now)[1]]
+        thresholds = self._thresholds[bucket]
+        level = bisect_right(thresholds, minutes)
+        key = (bucket, goal_reached, level)
+        decision = self._decisions.get(key)
+        if decision is None:
+            if len(self._decisions) >= DECISION_CACHE_SIZE:
+                self._decisions.clear()
+            # Any value in the threshold band decides the same; use its lower end.
+            passed = thresholds[level - 1] if level else float("-inf")
+            blocking = [self.rules[i] for i in self._open[bucket]
+                        if self.rules[i].blocks(goal_reached, passed)]
+            apps = frozenset(app for rule in blocking for app in rule.apps)
+            decision = self._decisions[key] = Decision(
+                apps, frozenset(expand_site_list(site for rule in blocking for site in rule.sites)),
+                self.app_matcher if apps == self.apps else AppMatcher(apps))
+        return decision
+
+    def next_change(self, now: float) -> Optional[float]:
+        """Unix time at which the open windows next change, or None if they never do.
+
+        Computed on the wall clock, so a window edge keeps its local time
+        across DST changes.
+        """
+        local, minute = self._minute_of_week(now)
+        change = self._changes[self._index[minute]]
+        if change is None:
+            return None
+        edge = local + timedelta(minutes=change - minute)
+        return edge.timestamp()
+
+
+def summarize_rules(rules: Iterable[Rule]) -> List[str]:
+    """One line per rule for the log, e.g. "2 apps, 3 sites until goal in 5 windows"."""
+    lines = []
+    for rule in rules:
+        until = rule.until if isinstance(rule.until, str) else f"{rule.until:g} workout minutes"
+        windows = f" in {len(rule.windows)} windows" if rule.windows else ""
+        lines.append(f"{len(rule.apps)} apps, {len(rule.sites)} sites until {until}{windows}")
+    return lines
@@ -1,52 +1,87 @@
 import os
 import signal
-import psutil
 from typing import List, Optional
-from ..utils.exceptions import ProcessError
 from ..utils.logger import Logger
+from ..utils.tracing import traced
+from ..utils.metrics import PROCESSES_KILLED
+from .process_scanner import AppMatcher, ProcessScanner
+from .exec_watcher import ExecWatcher
+from .notifications import NotificationDispatcher
+
+BLOCKED_TITLE = "Applications Blocked"
+BLOCKED_MESSAGE = "Please complete your goals before using blocked applications."
+
 
 class ProcessManager:
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, scanner: Optional[ProcessScanner] = None,
+                 notifier: Optional[NotificationDispatcher] = None):
         self.logger = logger
+        self.scanner = scanner or ProcessScanner()
+        self.notifier = notifier or NotificationDispatcher(logger)
+        self._matcher = AppMatcher([])
+        self._watch_matcher = AppMatcher([])
+        self.exec_watcher = ExecWatcher(logger, self._on_exec) if ExecWatcher.supported() else None
+
+    def _matcher_for(self, apps: List[str]) -> AppMatcher:
+        """Return the compiled matcher for apps, recompiling only when they change."""
+        if tuple(sorted({app.lower() for app in apps if app})) != self._matcher.apps:
+            self._matcher = AppMatcher(apps)
+        return self._matcher
+
+    @traced()
+    def block_apps(self, apps: List[str], matcher: Optional[AppMatcher] = None) -> None:
+        """Block specified applications by killing their processes.
 
-    def block_apps(self, apps: List[str]) -> None:
-        """Block specified applications by killing their processes."""
+        A precompiled matcher (e.g. from a config snapshot) skips recompiling.
+        """
+        matcher = matcher or self._matcher_for(apps)
+        self._watch(matcher)
         found = False
-        for proc in psutil.process_iter(attrs=['pid', 'name']):
-            try:
-                name = proc.info['name']
-                if any(app.lower() in name.lower() for app in apps):
-                    os.kill(proc.info['pid'], signal.SIGKILL)
-                    self.logger.info(f"Force-killed: {name}")
-                    found = True
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+        own_pid = os.getpid()
+        for proc in self.scanner.scan(matcher):
+            if proc.pid != own_pid and self._kill(proc.pid, proc.name):
+                self._notify_blocked(proc.name)
+                found = True
 
         if found:
-            self._display_notification(
-                "Please complete your goals before using blocked applications.",
-                title="Applications Blocked",
-                soundname="Pop"
-            )
             self.logger.info("Applications blocked.")
         else:
             self.logger.info("No blocked apps were running.")
 
+    @traced()
     def unblock_apps(self, apps: List[str]) -> None:
-        """Unblock applications (currently a no-op as we don't need to do anything)."""
+        """Unblock applications; stops watching for new launches."""
+        self._watch(AppMatcher([]))
         self.logger.info("unblock_apps() called – nothing to do.")
 
-    def _display_notification(self, message: str, title: Optional[str] = None,
-                            subtitle: Optional[str] = None, soundname: Optional[str] = None) -> None:
-        """Display a system notification."""
+    def _watch(self, matcher: AppMatcher) -> None:
+        """Kill matching processes as they launch, between sweeps."""
+        self._watch_matcher = matcher
+        if self.exec_watcher is None:
+            return
+        if matcher and not self.exec_watcher.running:
+            self.exec_watcher.start()
+        elif not matcher and self.exec_watcher.running:
+            self.exec_watcher.stop()
+
+    @traced()
+    def _on_exec(self, pid: int) -> None:
+        """Kill a newly started process if it matches the blocked apps."""
+        proc = self.scanner.inspect(pid, self._watch_matcher)
+        if proc is not None and self._kill(proc.pid, proc.name):
+            self._notify_blocked(proc.name)
+
+    def _kill(self, pid: int, name: str) -> bool:
+        """Force-kill a process; return whether a signal was delivered."""
         try:
-            parts = [
-                f'with title "{title}"' if title else '',
-                f'subtitle "{subtitle}"' if subtitle else '',
-                f'sound name "{soundname}"' if soundname else ''
-            ]
-            script = f'display notification "{message}" {" ".join(parts)}'
-            os.system(f"osascript -e '{script}'")
-        except Exception as e:
-            self.logger.error(f"Failed to display notification: {e}")
-            raise ProcessError(f"Failed to display notification: {e}")
+            os.kill(pid, signal.SIGKILL)
+            PROCESSES_KILLED.inc()
+            self.logger.info("Force-killed: %s", name)
+            return True
+        except (ProcessLookupError, PermissionError):
+            return False
+
+    def _notify_blocked(self, name: str) -> None:
+        """Tell the user an app was closed; queued, so the sweep never waits on it."""
+        self.notifier.notify(BLOCKED_TITLE, BLOCKED_MESSAGE, key="blocked-apps",
+                             item=name, sound="Pop")
@@ -0,0 +1,150 @@
+import os
+import re
+import sys
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+PROC_ROOT = "/proc"
+
+
+class ProcessInfo(NamedTuple):
+    pid: int
+    create_time: float
+    name: str
+
+
+def exe_name(exe: str) -> str:
+    """Return the part of an executable path that names the program.
+
+    That is the outermost ``.app`` bundle on macOS, so a bundle's helpers
+    count as the app, and the file name elsewhere. Directories the program
+    merely lives in never count.
+    """
+    parts = re.split(r"[\\/]", exe)
+    return next((part for part in parts[:-1] if part.lower().endswith(".app")), parts[-1])
+
+
+class AppMatcher:
+    """Case-insensitive substring matcher compiled once from the blocked app list."""
+
+    def __init__(self, apps: Iterable[str]):
+        self.apps: Tuple[str, ...] = tuple(sorted({app.lower() for app in apps if app}))
+        self._search = (
+            re.compile("|".join(re.escape(app) for app in self.apps)).search if self.apps else None
+        )
+
+    def __bool__(self) -> bool:
+        return self._search is not None
+
+    def matches(self, name: str, exe: str = "") -> bool:
+        """Return whether a process name or its executable's name contains a blocked app."""
+        if self._search is None:
+            return False
+        return bool(self._search(name.lower()) or (exe and self._search(exe_name(exe).lower())))
+
+
+def read_proc_stat(pid: int, root: str = PROC_ROOT) -> Optional[ProcessInfo]:
+    """Read name and start time from ``/proc/<pid>/stat``, or None if it is gone."""
+    try:
+        with open(f"{root}/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    end = stat.rfind(b")")
+    fields = stat[end + 2:].split()
+    if end < 0 or len(fields) < 20:
+        return None
+    name = stat[stat.find(b"(") + 1:end].decode("utf-8", "replace")
+    return ProcessInfo(pid, float(fields[19]), name)
+
+
+def iter_proc(root: str = PROC_ROOT) -> Iterator[ProcessInfo]:
+    """Yield processes by reading ``/proc`` directly (Linux)."""
+    for entry in os.listdir(root):
+        if entry.isdigit():
+            info = read_proc_stat(int(entry), root)
+            if info is not None:
+                yield info
+
+
+def proc_exe(pid: int, root: str = PROC_ROOT) -> str:
+    """Return the executable path of a process from ``/proc``, or '' if unavailable."""
+    try:
+        return os.readlink(f"{root}/{pid}/exe")
+    except OSError:
+        return ""
+
+
+def iter_psutil() -> Iterator[ProcessInfo]:
+    """Yield processes through psutil (portable fallback)."""
+    import psutil
+
+    for proc in psutil.process_iter(attrs=["pid", "name", "create_time"]):
+        info = proc.info
+        yield ProcessInfo(info["pid"], info["create_time"] or 0.0, info["name"] or "")
+
+
+def psutil_exe(pid: int) -> str:
+    """Return the executable path of a process through psutil, or '' if unavailable."""
+    import psutil
+
+    try:
+        return psutil.Process(pid).exe() or ""
+    except (psutil.Error, OSError):
+        return ""
+
+
+class ProcessScanner:
+    """Find processes matching an AppMatcher, inspecting only new processes.
+
+    Non-matching processes are cached by (pid, create_time), so a scan only
+    classifies processes started since the previous scan. Matches are never
+    cached, so a process that survives a kill is reported again.
+    """
+
+    def __init__(self, source: Optional[Callable[[], Iterable[ProcessInfo]]] = None,
+                 exe_resolver: Optional[Callable[[int], str]] = None):
+        use_proc = source is None and sys.platform.startswith("linux") and os.path.isdir(PROC_ROOT)
+        self.source = source or (iter_proc if use_proc else iter_psutil)
+        self.exe_resolver = exe_resolver or (proc_exe if use_proc else psutil_exe)
+        self._ignored: Dict[int, float] = {}
+        self._apps: Optional[Tuple[str, ...]] = None
+
+    def scan(self, matcher: AppMatcher) -> List[ProcessInfo]:
+        """Return processes whose name or executable matches."""
+        if matcher.apps != self._apps:
+            self._ignored.clear()
+            self._apps = matcher.apps
+        if not matcher:
+            return []
+
+        previous, ignored, matches = self._ignored, {}, []
+        for info in self.source():
+            if previous.get(info.pid) == info.create_time:
+                ignored[info.pid] = info.create_time
+            elif matcher.matches(info.name, self.exe_resolver(info.pid)):
+                matches.append(info)
+            else:
+                ignored[info.pid] = info.create_time
+        self._ignored = ignored
+        return matches
+
+    def inspect(self, pid: int, matcher: AppMatcher) -> Optional[ProcessInfo]:
+        """Classify a single process, bypassing the cache; None if it does not match."""
+        if not matcher:
+            return None
+        if self.source is iter_proc:
+            info = read_proc_stat(pid)
+        elif self.source is iter_psutil:
+            import psutil
+
+            try:
+                proc = psutil.Process(pid)
+                info = ProcessInfo(pid, proc.create_time(), proc.name())
+            except psutil.Error:
+                info = None
+        else:
+            # A custom source (fake /proc, replay) has no per-pid lookup; search it.
+            info = next((p for p in self.source() if p.pid == pid), None)
+        if info is not None and matcher.matches(info.name, self.exe_resolver(pid)):
+            return info
+        return None
@@ -0,0 +1,179 @@
+import os
+import json
+import re
+import time
+from dataclasses import dataclass
+from datetime import tzinfo
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from ..utils.exceptions import ConfigError
+from ..utils.logger import Logger
+from ..config.constants import HOSTS_PATH
+from .config_manager import ConfigManager
+from .domain_set import DomainSet
+from .firebase_service import FirebaseService
+from .hosts_manager import HostsManager
+from .http_client import FirebaseClient
+from .process_manager import ProcessManager
+from .reconciler import EnforcementState, Reconciler
+from .resilience import CircuitBreaker, LastKnownStatus, ResilientGoalStatus
+from .write_queue import FirebaseWriteQueue
+
+_VALID_PROFILE_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+@dataclass(frozen=True)
+class Profile:
+    """One user or device served by a multi-profile poller."""
+    name: str
+    firebase_path: str
+    config_path: Path
+    hosts_path: str
+    cache_path: Path
+
+
+def load_profiles(path: Path) -> List[Profile]:
+    """Read a profiles file.
+
+    The file holds ``{"profiles": [{"name": ..., "firebase_path": ...,
+    "config": ..., "hosts": ...}]}``. Relative config paths are resolved
+    against the file's directory; ``hosts`` defaults to HOSTS_PATH, and
+    profiles naming the same hosts file share its managed block. Each
+    profile's last known goal status is kept under ``goal_cache/`` next to
+    the file.
+    """
+    try:
+        document = json.loads(Path(path).read_text())
+        entries = document["profiles"]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise ConfigError(f"Failed to load profiles from {path}: {e}")
+
+    base_dir = Path(path).parent
+    profiles: List[Profile] = []
+    seen = set()
+    for entry in entries:
+        try:
+            name = entry["name"]
+            firebase_path = entry["firebase_path"].strip("/")
+            config = entry["config"]
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ConfigError(f"Invalid profile entry {entry!r}: missing {e}")
+        if not _VALID_PROFILE_NAME.match(name) or name in seen:
+            raise ConfigError(f"Invalid or duplicate profile name: {name!r}")
+        seen.add(name)
+        profiles.append(Profile(
+            name=name,
+            firebase_path=firebase_path,
+            config_path=base_dir / config,
+            hosts_path=entry.get("hosts", HOSTS_PATH),
+            cache_path=base_dir / "goal_cache" / f"{name}.json",
+        ))
+    return profiles
+
+
+class HostsTarget:
+    """One hosts file, edited on behalf of every profile that names it.
+
+    The file has a single managed block, so the profiles' desired states
+    are merged (sites and blocklists of all of them) and applied by one
+    reconciler; profiles reconciled separately would overwrite each
+    other's entries.
+    """
+
+    def __init__(self, logger: Logger, process_manager: ProcessManager, hosts_path: str):
+        self.hosts_manager = HostsManager(logger, hosts_path)
+        self.reconciler = Reconciler(logger, process_manager, self.hosts_manager)
+        self.profiles: List["ProfileRuntime"] = []
+        self._merged_blocklist: Tuple[Tuple[str, ...], Optional[DomainSet]] = ((), None)
+
+    def desired(self) -> Optional[EnforcementState]:
+        """The merged hosts state of the profiles, or None while none has a known status."""
+        states = [runtime.desired for runtime in self.profiles if runtime.desired is not None]
+        if len(states) <= 1:
+            return states[0] if states else None
+        sites = frozenset().union(*(state.sites for state in states))
+        blocked = frozenset().union(*(state.blocked_sites for state in states))
+        blocklist = self._blocklist([state.blocked_list for state in states])
+        return EnforcementState(bool(blocked or blocklist), frozenset(), sites,
+                                blocklist=blocklist, blocklist_id=blocklist and blocklist.fingerprint,
+                                active_sites=blocked)
+
+    def _blocklist(self, blocklists: List[Optional[DomainSet]]) -> Optional[DomainSet]:
+        """Union of the blocklists, rebuilt only when one of them changes."""
+        distinct = {blocklist.fingerprint: blocklist for blocklist in blocklists
+                    if blocklist is not None and len(blocklist)}
+        if len(distinct) <= 1:
+            return next(iter(distinct.values()), None)
+        key = tuple(sorted(distinct))
+        if self._merged_blocklist[0] != key:
+            merged = DomainSet.from_entries(
+                entry for blocklist in distinct.values() for entry in blocklist.iter_entries())
+            self._merged_blocklist = (key, merged)
+        return self._merged_blocklist[1]
+
+
+class ProfileRuntime:
+    """Per-profile services of a multi-profile poller.
+
+    Only what is specific to a profile lives here: its Firebase path and
+    goal cache. The HTTP pool, write queue, logger, process manager and
+    circuit breaker are shared; profiles that name the same config file
+    share one ConfigManager, and those that name the same hosts file one
+    HostsTarget (see :meth:`build`).
+    """
+
+    def __init__(self, profile: Profile, logger: Logger, client: FirebaseClient,
+                 process_manager: ProcessManager, breaker: CircuitBreaker,
+                 config_manager: ConfigManager, writes: FirebaseWriteQueue,
+                 hosts: HostsTarget, tz: Optional[tzinfo] = None):
+        self.profile = profile
+        self.config_manager = config_manager
+        self.service = FirebaseService(logger, client, profile.firebase_path, writes)
+        self.goal_status = ResilientGoalStatus(logger, self.service,
+                                               LastKnownStatus(profile.cache_path, tz=tz), breaker)
+        self.hosts = hosts
+        hosts.profiles.append(self)
+        self.latest: Optional[Dict[str, Any]] = None
+        self.desired: Optional[EnforcementState] = None
+        # Unix time at which the profile's rule windows next open or close.
+        self.policy_change: Optional[float] = None
+
+    @classmethod
+    def build(cls, profiles: List[Profile], logger: Logger, client: FirebaseClient,
+              process_manager: ProcessManager, breaker: Optional[CircuitBreaker] = None,
+              writes: Optional[FirebaseWriteQueue] = None,
+              tz: Optional[tzinfo] = None) -> List["ProfileRuntime"]:
+        """Create runtimes for all profiles, sharing config managers and hosts files by path."""
+        breaker = breaker or CircuitBreaker()
+        writes = writes or FirebaseWriteQueue(logger, client)
+        managers: Dict[Path, ConfigManager] = {}
+        targets: Dict[str, HostsTarget] = {}
+        runtimes = []
+        for profile in profiles:
+            profile.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            key = profile.config_path.resolve()
+            if key not in managers:
+                managers[key] = ConfigManager(profile.config_path, logger)
+            hosts_key = os.path.realpath(profile.hosts_path)
+            if hosts_key not in targets:
+                targets[hosts_key] = HostsTarget(logger, process_manager, profile.hosts_path)
+            runtimes.append(cls(profile, logger, client, process_manager, breaker,
+                                managers[key], writes, targets[hosts_key], tz))
+        return runtimes
+
+    def fetch(self) -> Dict[str, Any]:
+        """Network phase: read this profile's goal status (cached while Firebase is down)."""
+        return self.goal_status.get_goal_status()
+
+    def update(self, data: Dict[str, Any]) -> Optional[EnforcementState]:
+        """Record fetched status; return the new desired state if it changed, else None."""
+        self.latest = data
+        now = time.time()
+        config = self.config_manager.snapshot()
+        self.policy_change = config.policy.next_change(now)
+        desired = EnforcementState.from_config(data.get("goalReachedToday", False), config, now,
+                                               data.get("workoutMinutesToday", 0))
+        if desired == self.desired:
+            return None
+        self.desired = desired
+        return desired
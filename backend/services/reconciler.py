@@ -0,0 +1,181 @@
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Optional, Iterable, FrozenSet, Any, TYPE_CHECKING
+from ..utils.exceptions import PollerError
+from ..utils.logger import Logger
+from .process_manager import ProcessManager
+from .hosts_manager import HostsManager
+from .process_scanner import AppMatcher
+from .domain_set import DomainSet
+
+if TYPE_CHECKING:
+    from .config_manager import ConfigSnapshot
+
+
+@dataclass(frozen=True)
+class EnforcementState:
+    """What should be enforced: whether blocking is on and for which targets.
+
+    ``apps`` and ``sites`` are every target the config names. Under a
+    policy with windows or minute thresholds only some of them are blocked
+    at a time; ``active_apps`` and ``active_sites`` hold those (None means
+    all of them) and ``app_matcher`` matches the blocked apps.
+    """
+    blocking: bool
+    apps: FrozenSet[str]
+    sites: FrozenSet[str]
+    app_matcher: Optional[AppMatcher] = field(default=None, compare=False)
+    blocklist: Optional[DomainSet] = field(default=None, compare=False)
+    blocklist_id: Optional[str] = None
+    active_apps: Optional[FrozenSet[str]] = None
+    active_sites: Optional[FrozenSet[str]] = None
+
+    @classmethod
+    def from_goal(cls, goal_reached: Any, apps: Iterable[str],
+                  sites: Iterable[str]) -> Optional["EnforcementState"]:
+        """Compute the desired state, or None when the goal status is unknown."""
+        if not isinstance(goal_reached, bool):
+            return None
+        return cls(not goal_reached, frozenset(apps), frozenset(sites))
+
+    @classmethod
+    def from_config(cls, goal_reached: Any, config: "ConfigSnapshot", now: Optional[float] = None,
+                    minutes: Any = 0) -> Optional["EnforcementState"]:
+        """Compute the desired state from a config snapshot's precomputed data.
+
+        Rules with windows or minute thresholds are decided by the snapshot's
+        policy at ``now`` (default: the current time); the blocklist follows
+        the goal.
+        """
+        if not isinstance(goal_reached, bool):
+            return None
+        blocklist = config.blocklist if len(config.blocklist) and not goal_reached else None
+        blocklist_id = blocklist and blocklist.fingerprint
+        policy = config.policy
+        if policy.simple:
+            return cls(not goal_reached, policy.apps, policy.sites,
+                       policy.app_matcher, blocklist, blocklist_id)
+        if not isinstance(minutes, (int, float)):
+            minutes = 0
+        decision = policy.decide(time.time() if now is None else now, goal_reached, minutes)
+        return cls(bool(decision.apps or decision.sites or blocklist), policy.apps, policy.sites,
+                   decision.app_matcher, blocklist, blocklist_id, decision.apps, decision.sites)
+
+    @property
+    def blocked_apps(self) -> FrozenSet[str]:
+        """Apps that should currently be kept closed."""
+        if not self.blocking:
+            return frozenset()
+        return self.apps if self.active_apps is None else self.active_apps
+
+    @property
+    def blocked_sites(self) -> FrozenSet[str]:
+        """Sites that should currently be present in the hosts file."""
+        if not self.blocking:
+            return frozenset()
+        return self.sites if self.active_sites is None else self.active_sites
+
+    @property
+    def blocked_list(self) -> Optional[DomainSet]:
+        """Blocklist that should currently be in the hosts file, if any."""
+        return self.blocklist if self.blocking else None
+
+
+class Reconciler:
+    """Drive enforcement toward a desired state, acting only on differences.
+
+    Hosts edits are limited to the sites added or removed since the last
+    successful apply, so a cycle without changes never touches /etc/hosts.
+    Running blocked apps are swept while blocking is on, since a relaunch
+    is not visible in the state diff.
+    """
+
+    def __init__(self, logger: Logger, process_manager: ProcessManager,
+                 hosts_manager: HostsManager):
+        self.logger = logger
+        self.process_manager = process_manager
+        self.hosts_manager = hosts_manager
+        self.applied: Optional[EnforcementState] = None
+        self._applied_sites: Optional[FrozenSet[str]] = None
+        self._applied_blocklist: Optional[str] = None
+        self._applied_apps: Optional[EnforcementState] = None
+        self._sites_lock = threading.Lock()
+        self._apps_lock = threading.Lock()
+
+    def reconcile(self, desired: EnforcementState) -> None:
+        """Apply the minimal set of actions that moves enforcement to desired."""
+        if self.applied != desired:
+            self.logger.info("Enforcement state changed: blocking=%s, %d apps, %d sites",
+                             desired.blocking, len(desired.apps), len(desired.sites))
+        self.reconcile_sites(desired)
+        self.reconcile_apps(desired)
+        self.applied = desired
+
+    def reconcile_sites(self, desired: EnforcementState) -> bool:
+        """Bring the hosts file in line with desired; failures are retried next time.
+
+        Returns False if the reconciliation failed.
+        """
+        with self._sites_lock:
+            try:
+                self._reconcile_sites(desired)
+            except PollerError as e:
+                self.logger.error(f"Hosts reconciliation failed, will retry: {e}")
+                return False
+            return True
+
+    def reconcile_apps(self, desired: EnforcementState) -> None:
+        """Sweep blocked apps while blocking, and release them on the transition out."""
+        with self._apps_lock:
+            applied = self._applied_apps
+            blocked = desired.blocked_apps
+            if blocked:
+                self.process_manager.block_apps(sorted(blocked), desired.app_matcher)
+            elif applied is None or applied.blocked_apps:
+                self.process_manager.unblock_apps(sorted(desired.apps))
+            self._applied_apps = desired
+
+    def invalidate(self) -> None:
+        """Forget the applied state so the next reconcile re-applies everything."""
+        with self._sites_lock, self._apps_lock:
+            self.applied = None
+            self._applied_sites = None
+            self._applied_apps = None
+
+    def invalidate_sites(self) -> None:
+        """Forget what the hosts file holds, e.g. after it was edited by someone else."""
+        with self._sites_lock:
+            self._applied_sites = None
+            self._applied_blocklist = None
+
+    def _reconcile_sites(self, desired: EnforcementState) -> None:
+        """Add and remove only the hosts entries that differ from the last apply.
+
+        The blocklist is applied as a whole and only when its fingerprint
+        differs from the one last applied.
+        """
+        target = desired.blocked_sites
+        current = self._applied_sites
+        blocklist = desired.blocked_list
+        blocklist_id = blocklist.fingerprint if blocklist is not None else None
+
+        if current is None:
+            # Nothing is known about the file yet: make it match exactly, in one edit.
+            self.hosts_manager.apply_websites(sorted(target), sorted(desired.sites - target),
+                                              blocklist)
+            self._applied_sites = target
+            self._applied_blocklist = blocklist_id
+            return
+
+        if blocklist_id != self._applied_blocklist:
+            self.hosts_manager.set_blocklist(blocklist)
+            self._applied_blocklist = blocklist_id
+
+        removed, added = current - target, target - current
+        if removed:
+            self.hosts_manager.unblock_websites(sorted(removed))
+            self._applied_sites = current = current - removed
+        if added:
+            self.hosts_manager.block_websites(sorted(added))
+            self._applied_sites = current | added
@@ -0,0 +1,228 @@
+import json
+import time
+import random
+import threading
+from datetime import tzinfo
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from ..utils.files import atomic_write_json
+from ..utils.logger import Logger
+from ..utils.metrics import FIREBASE_RETRIES
+from ..config.constants import (
+    GOAL_CACHE_PATH,
+    GOAL_CACHE_TTL,
+    GOAL_CACHE_PERSIST_INTERVAL,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_BASE_DELAY,
+    BREAKER_MAX_DELAY,
+)
+from .firebase_service import FirebaseService
+from .scheduler import next_midnight
+
+
+def backoff_delay(attempt: int, base: float, cap: float,
+                  rng: Callable[[], float] = random.random) -> float:
+    """Exponential backoff with "equal jitter": half fixed, half random.
+
+    ``attempt`` counts from 0. The fixed half keeps retries from bunching up
+    near zero; the random half spreads clients that failed together.
+    """
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + rng() * delay / 2
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency and probe it again with backoff.
+
+    Closed: calls go through. After ``failure_threshold`` consecutive
+    failures the breaker opens and :meth:`allow` refuses calls until the
+    backoff delay passes; then one probe is let through (half-open). A
+    success closes the breaker, a failure reopens it with a longer delay.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 base_delay: float = BREAKER_BASE_DELAY, max_delay: float = BREAKER_MAX_DELAY,
+                 clock: Callable[[], float] = time.monotonic,
+                 rng: Callable[[], float] = random.random):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.rng = rng
+        self.failures = 0
+        self.retry_at = 0.0
+        self._state = self.CLOSED
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self.clock() >= self.retry_at:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Return whether a call may be attempted now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self.clock() >= self.retry_at:
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        """Count a failure; open (or reopen) the breaker once over the threshold."""
+        with self._lock:
+            self.failures += 1
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                attempt = self.failures - self.failure_threshold
+                self.retry_at = self.clock() + backoff_delay(
+                    max(attempt, 0), self.base_delay, self.max_delay, self.rng)
+                self._state = self.OPEN
+
+
+class LastKnownStatus:
+    """Last goal status read from Firebase, persisted across restarts.
+
+    The age is measured from the last successful read. A status read on an
+    earlier day is never fresh, because ``goalReachedToday`` only describes
+    the day it was read on; days end at midnight in ``tz`` (the reset time
+    zone; None for local time), as the goal reset does.
+    """
+
+    def __init__(self, path: Path = GOAL_CACHE_PATH, ttl: float = GOAL_CACHE_TTL,
+                 persist_interval: float = GOAL_CACHE_PERSIST_INTERVAL,
+                 clock: Callable[[], float] = time.time, tz: Optional[tzinfo] = None):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.persist_interval = persist_interval
+        self.clock = clock
+        self.tz = tz
+        self.data: Optional[Dict[str, Any]] = None
+        self.fetched_at = 0.0
+        self._persisted_at = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """Read the persisted status; a missing or corrupt file means no status."""
+        try:
+            saved = json.loads(self.path.read_text())
+            data, fetched_at = saved["data"], float(saved["fetched_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        if isinstance(data, dict):
+            self.data, self.fetched_at, self._persisted_at = data, fetched_at, fetched_at
+
+    def age(self) -> Optional[float]:
+        """Seconds since the status was last confirmed, or None if there is none."""
+        return None if self.data is None else max(0.0, self.clock() - self.fetched_at)
+
+    def expires_in(self) -> Optional[float]:
+        """Seconds until the status goes stale, or None if there is none."""
+        if self.data is None:
+            return None
+        midnight = next_midnight(self.fetched_at, self.tz)
+        return min(self.fetched_at + self.ttl, midnight) - self.clock()
+
+    def fresh(self) -> Optional[Dict[str, Any]]:
+        """Return the status if it is young enough to enforce from, else None."""
+        with self._lock:
+            if self.data is None:
+                return None
+            now = self.clock()
+            if now - self.fetched_at > self.ttl:
+                return None
+            if now >= next_midnight(self.fetched_at, self.tz):
+                return None
+            return dict(self.data)
+
+    def remember(self, data: Dict[str, Any]) -> None:
+        """Record a successful read; rewrite the file on change or periodically."""
+        with self._lock:
+            now = self.clock()
+            changed = data != self.data
+            self.data, self.fetched_at = dict(data), now
+            if not changed and now - self._persisted_at < self.persist_interval:
+                return
+            try:
+                atomic_write_json(self.path, {"data": self.data, "fetched_at": now})
+                self._persisted_at = now
+            except OSError:
+                pass
+
+
+class ResilientGoalStatus:
+    """Goal-status reads that survive Firebase outages.
+
+    Reads go through a circuit breaker so a dead endpoint is not retried
+    every cycle, and every good read refreshes a persisted last-known
+    status. While Firebase is unreachable the cached status is served until
+    it goes stale; after that an empty status is returned, which enforces
+    restrictions (the same fail-closed default as before).
+    """
+
+    LIVE, CACHED, NONE = "live", "cached", "none"
+
+    def __init__(self, logger: Logger, service: FirebaseService,
+                 cache: Optional[LastKnownStatus] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.logger = logger
+        self.service = service
+        self.cache = cache or LastKnownStatus()
+        self.breaker = breaker or CircuitBreaker()
+        self.source = self.NONE
+
+    def get_goal_status(self) -> Dict[str, Any]:
+        """Return live status if reachable, else the cached status while fresh, else {}."""
+        if self.breaker.allow():
+            if self.breaker.failures:
+                FIREBASE_RETRIES.inc(operation="fetch")
+            data = self.service.get_goal_status()
+            if data is not None:
+                if self.breaker.failures:
+                    self.logger.info("Firebase reachable again.")
+                self.breaker.record_success()
+                self.remember(data)
+                return data
+            self.breaker.record_failure()
+            if self.breaker.state != CircuitBreaker.CLOSED:
+                self.logger.warning(
+                    f"Firebase unavailable after {self.breaker.failures} attempts; "
+                    f"next attempt in {max(0.0, self.breaker.retry_at - self.breaker.clock()):.0f}s."
+                )
+        return self._fallback()
+
+    def next_change(self) -> Optional[float]:
+        """Seconds until reads could behave differently: cache expiry or the next probe."""
+        if self.source == self.CACHED:
+            candidates = [self.cache.expires_in()]
+            if self.breaker.state == CircuitBreaker.OPEN:
+                candidates.append(self.breaker.retry_at - self.breaker.clock())
+            return max(0.0, min(c for c in candidates if c is not None))
+        return None
+
+    def remember(self, data: Dict[str, Any]) -> None:
+        """Record status obtained elsewhere (e.g. the stream) as last known good."""
+        self.source = self.LIVE
+        self.cache.remember(data)
+
+    def _fallback(self) -> Dict[str, Any]:
+        cached = self.cache.fresh()
+        if cached is not None:
+            if self.source != self.CACHED:
+                self.logger.warning(f"Using cached goal status ({self.cache.age():.0f}s old).")
+            self.source = self.CACHED
+            return cached
+        if self.source != self.NONE:
+            self.logger.warning("No fresh goal status; enforcing restrictions until Firebase is back.")
+        self.source = self.NONE
+        return {}
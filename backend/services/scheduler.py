@@ -0,0 +1,166 @@
+import time
+import heapq
+from datetime import datetime, timedelta, tzinfo
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+
+class SystemClock:
+    """Real clocks: ``monotonic`` for intervals, ``time`` for calendar deadlines."""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        return time.time()
+
+
+class FakeClock:
+    """Manually advanced clock for tests, benchmarks and replays."""
+
+    def __init__(self, start: float = 0.0, wall: float = 1_700_000_000.0):
+        self._monotonic = start
+        self._wall = wall
+
+    def monotonic(self) -> float:
+        return self._monotonic
+
+    def time(self) -> float:
+        return self._wall
+
+    def advance(self, seconds: float) -> None:
+        """Move both clocks forward, as if ``seconds`` passed awake."""
+        self._monotonic += seconds
+        self._wall += seconds
+
+    def jump_wall(self, seconds: float) -> None:
+        """Move only the wall clock, as after a suspend/resume or NTP step."""
+        self._wall += seconds
+
+
+def resolve_timezone(name: Optional[str]) -> Optional[tzinfo]:
+    """Return the named time zone, or None for the system's local time."""
+    if not name or ZoneInfo is None:
+        return None
+    return ZoneInfo(name)
+
+
+def next_midnight(now: float, tz: Optional[tzinfo] = None) -> float:
+    """Return the Unix time of the next midnight after ``now`` in ``tz``.
+
+    Computed on the calendar, so days that are 23 or 25 hours long around
+    DST changes are handled.
+    """
+    current = datetime.fromtimestamp(now, tz) if tz else datetime.fromtimestamp(now).astimezone()
+    tomorrow = (current + timedelta(days=1)).date()
+    midnight = datetime(tomorrow.year, tomorrow.month, tomorrow.day)
+    if tz is not None:
+        return midnight.replace(tzinfo=tz).timestamp()
+    return midnight.timestamp()
+
+
+class Scheduler:
+    """Named one-shot deadlines kept in a heap, so the poller can sleep until the next one.
+
+    Interval deadlines use the monotonic clock. Calendar deadlines (``wall=True``)
+    are compared against the wall clock, so a deadline such as midnight is
+    still noticed on the first wakeup after a laptop resumes from sleep.
+    Rescheduling a name replaces its previous deadline.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or SystemClock()
+        self._heaps: Dict[bool, List[Tuple[float, int, str]]] = {False: [], True: []}
+        self._active: Dict[str, Tuple[bool, float, int]] = {}
+        self._seq = 0
+
+    def _now(self, wall: bool) -> float:
+        return self.clock.time() if wall else self.clock.monotonic()
+
+    def schedule(self, name: str, delay: float) -> None:
+        """Schedule ``name`` to be due ``delay`` seconds from now."""
+        self._push(name, False, self.clock.monotonic() + max(0.0, delay))
+
+    def schedule_at(self, name: str, when: float) -> None:
+        """Schedule ``name`` at the Unix time ``when``."""
+        self._push(name, True, when)
+
+    def _push(self, name: str, wall: bool, deadline: float) -> None:
+        self._seq += 1
+        self._active[name] = (wall, deadline, self._seq)
+        heapq.heappush(self._heaps[wall], (deadline, self._seq, name))
+
+    def cancel(self, name: str) -> None:
+        self._active.pop(name, None)
+
+    def deadline(self, name: str) -> Optional[float]:
+        """Seconds until ``name`` is due, or None if it is not scheduled."""
+        entry = self._active.get(name)
+        if entry is None:
+            return None
+        wall, deadline, _ = entry
+        return deadline - self._now(wall)
+
+    def _head(self, wall: bool) -> Optional[Tuple[float, int, str]]:
+        """Return the earliest live entry of one heap, dropping replaced ones."""
+        heap = self._heaps[wall]
+        while heap:
+            deadline, seq, name = heap[0]
+            entry = self._active.get(name)
+            if entry is not None and entry[2] == seq:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def time_until_next(self) -> Optional[float]:
+        """Seconds until the earliest deadline (0 if overdue), or None if nothing is scheduled."""
+        delays = []
+        for wall in (False, True):
+            head = self._head(wall)
+            if head is not None:
+                delays.append(max(0.0, head[0] - self._now(wall)))
+        return min(delays) if delays else None
+
+    def pop_due(self) -> List[str]:
+        """Remove and return the names whose deadlines have passed, earliest first."""
+        due: List[Tuple[float, int, str]] = []
+        for wall in (False, True):
+            now = self._now(wall)
+            while True:
+                head = self._head(wall)
+                if head is None or head[0] > now:
+                    break
+                heapq.heappop(self._heaps[wall])
+                del self._active[head[2]]
+                due.append((head[0] - now, head[1], head[2]))
+        return [name for _, _, name in sorted(due)]
+
+
+class AdaptiveInterval:
+    """Poll interval that backs off while nothing changes and snaps back on change."""
+
+    def __init__(self, minimum: float, maximum: float, factor: float = 2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.current = minimum
+
+    def reset(self) -> float:
+        """Something changed: poll at the fastest rate again."""
+        self.current = self.minimum
+        return self.current
+
+    def backoff(self) -> float:
+        """Nothing changed: stretch the interval, up to the maximum."""
+        self.current = min(self.maximum, self.current * self.factor)
+        return self.current
+
+    def until(self, transition: Optional[float]) -> float:
+        """Current interval, tightened so a poll lands right after a known transition."""
+        if transition is None:
+            return self.current
+        return max(self.minimum, min(self.current, transition))
@@ -0,0 +1,212 @@
+import json
+import time
+import queue
+import threading
+from datetime import date
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+from typing import Any, Dict, List, Optional
+from ..utils.logger import Logger
+from ..utils.metrics import REGISTRY
+from ..config.constants import (
+    STATUS_HOST, STATUS_PORT, STATUS_HEARTBEAT_INTERVAL, HISTORY_MAX_BUCKETS,
+)
+from .timeseries import TimeSeriesStore, bucket_start
+
+# Buckets returned by /history when no start date is given.
+HISTORY_DEFAULT_BUCKETS = {"day": 14, "week": 12, "month": 12}
+# Shortest length of each bucket, to bound the bucket count before building them.
+HISTORY_UNIT_DAYS = {"day": 1, "week": 7, "month": 28}
+
+
+class StatusBroadcaster:
+    """Latest poller status plus fan-out of changes to subscribers."""
+
+    def __init__(self):
+        self._state: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._subscribers: List["queue.SimpleQueue[Dict[str, Any]]"] = []
+
+    def publish(self, **fields: Any) -> bool:
+        """Merge fields into the status; notify subscribers only if something changed."""
+        with self._lock:
+            changed = {k: v for k, v in fields.items() if self._state.get(k, object()) != v}
+            if not changed:
+                return False
+            self._state.update(changed)
+            state = dict(self._state)
+            for subscriber in self._subscribers:
+                subscriber.put(state)
+        return True
+
+    def state(self) -> Dict[str, Any]:
+        """Return a copy of the current status."""
+        with self._lock:
+            return dict(self._state)
+
+    def subscribe(self) -> "queue.SimpleQueue[Dict[str, Any]]":
+        """Register a subscriber queue that receives each changed status."""
+        subscriber: "queue.SimpleQueue[Dict[str, Any]]" = queue.SimpleQueue()
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: "queue.SimpleQueue[Dict[str, Any]]") -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    """Serve ``/status`` as JSON, ``/events`` as Server-Sent Events, ``/metrics``
+    and the workout history under ``/history``."""
+
+    server: "StatusHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        path, _, query = self.path.partition("?")
+        if path == "/status":
+            self._send_json(self.server.broadcaster.state())
+        elif path == "/events":
+            self._stream_events()
+        elif path == "/metrics":
+            self._send_metrics()
+        elif path in ("/history", "/history/day") and self.server.history is not None:
+            params = {key: values[-1] for key, values in parse_qs(query).items()}
+            try:
+                if path == "/history":
+                    self._send_json(self._history(params))
+                else:
+                    self._send_json(self._history_day(params))
+            except ValueError as e:
+                self.send_error(400, str(e))
+        else:
+            self.send_error(404)
+
+    def _history(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """``?unit=day|week|month&from=YYYY-MM-DD&to=YYYY-MM-DD`` rollup buckets."""
+        history: TimeSeriesStore = self.server.history
+        unit = params.get("unit", "day")
+        if unit not in HISTORY_DEFAULT_BUCKETS:
+            raise ValueError("unit must be day, week or month")
+        end = date.fromisoformat(params["to"]) if "to" in params else history.day_of(time.time())
+        start = date.fromisoformat(params["from"]) if "from" in params \
+            else bucket_start(unit, end, HISTORY_DEFAULT_BUCKETS[unit] - 1)
+        if start > end:
+            raise ValueError("from is after to")
+        if ((end - start).days + 1) // HISTORY_UNIT_DAYS[unit] > HISTORY_MAX_BUCKETS:
+            raise ValueError(f"at most {HISTORY_MAX_BUCKETS} buckets per request")
+        return {"unit": unit, "from": start.isoformat(), "to": end.isoformat(),
+                "buckets": history.rollup(unit, start, end)}
+
+    def _history_day(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """``?date=YYYY-MM-DD&points=N`` samples of one day, downsampled to N points."""
+        history: TimeSeriesStore = self.server.history
+        day = date.fromisoformat(params["date"]) if "date" in params else history.day_of(time.time())
+        points = int(params.get("points", 288))
+        if points < 1:
+            raise ValueError("points must be positive")
+        return {"date": day.isoformat(), "samples": [
+            {"ts": timestamp, "minutes": minutes} for timestamp, minutes in history.samples(day, points)
+        ]}
+
+    def _send_json(self, data: Any) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_metrics(self) -> None:
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self) -> None:
+        """Send the current status, then each change and periodic heartbeats."""
+        broadcaster = self.server.broadcaster
+        subscriber = broadcaster.subscribe()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            self._send_event("status", broadcaster.state())
+            while not self.server.stopping.is_set():
+                try:
+                    state = subscriber.get(timeout=self.server.heartbeat_interval)
+                except queue.Empty:
+                    self._send_event("heartbeat", {"ts": time.time()})
+                    continue
+                self._send_event("status", state)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    def _send_event(self, event: str, data: Any) -> None:
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+class StatusHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, broadcaster: StatusBroadcaster, heartbeat_interval: float,
+                 history: Optional[TimeSeriesStore] = None):
+        super().__init__(address, StatusRequestHandler)
+        self.broadcaster = broadcaster
+        self.history = history
+        self.heartbeat_interval = heartbeat_interval
+        self.stopping = threading.Event()
+
+
+class StatusServer:
+    """Local HTTP endpoint that pushes poller status to the UI over SSE."""
+
+    def __init__(self, logger: Logger, broadcaster: StatusBroadcaster,
+                 history: Optional[TimeSeriesStore] = None,
+                 host: str = STATUS_HOST, port: int = STATUS_PORT,
+                 heartbeat_interval: float = STATUS_HEARTBEAT_INTERVAL):
+        self.logger = logger
+        self.broadcaster = broadcaster
+        self.history = history
+        self.address = (host, port)
+        self.heartbeat_interval = heartbeat_interval
+        self._server: Optional[StatusHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> Optional[int]:
+        return self._server.server_address[1] if self._server else None
+
+    def start(self) -> None:
+        """Bind the endpoint and serve it on a background thread."""
+        try:
+            self._server = StatusHTTPServer(self.address, self.broadcaster, self.heartbeat_interval,
+                                            self.history)
+        except OSError as e:
+            self.logger.error(f"Failed to start status server on {self.address}: {e}")
+            return
+        self._thread = threading.Thread(target=self._server.serve_forever, name="status-server", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Status server listening on http://{self.address[0]}:{self.port}")
+
+    def stop(self) -> None:
+        """Stop serving and close open event streams."""
+        if self._server is None:
+            return
+        self._server.stopping.set()
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
@@ -0,0 +1,256 @@
+import mmap
+import struct
+import threading
+from datetime import date, datetime, timedelta, tzinfo
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from ..utils.logger import Logger
+from ..config.constants import HISTORY_DIR, HISTORY_RETENTION_DAYS
+
+# File header: magic, record count, and a per-file base (the first day of the index).
+_HEADER = struct.Struct("<8sIi")
+_SEGMENT_MAGIC = b"NPNGSEG1"
+_INDEX_MAGIC = b"NPNGIDX1"
+# One observed sample: unix seconds and workoutMinutesToday.
+_SAMPLE = struct.Struct("<If")
+# One day: its total, cumulative total through it, time of its latest sample,
+# sample count and cumulative count of active days through it.
+_DAY = struct.Struct("<dddII")
+GROW_RECORDS = 4096
+UNITS = ("day", "week", "month")
+
+
+class RecordFile:
+    """Fixed-width records after a small header, in a memory-mapped file.
+
+    The file grows in GROW_RECORDS steps and the record count lives in the
+    header, so appending never rewrites earlier records. Not thread-safe;
+    :class:`TimeSeriesStore` serialises access.
+    """
+
+    def __init__(self, path: Path, magic: bytes, record: struct.Struct, base: int = 0):
+        self.path = path
+        self.record = record
+        existed = path.exists() and path.stat().st_size >= _HEADER.size
+        self._file = open(path, "r+b" if existed else "w+b")
+        if not existed:
+            self._file.truncate(_HEADER.size + GROW_RECORDS * record.size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if existed:
+            found, self.count, self.base = _HEADER.unpack_from(self._map)
+            if found != magic:
+                self.close()
+                raise ValueError(f"{path} is not a {magic.decode()} file")
+        else:
+            self.count, self.base = 0, base
+            _HEADER.pack_into(self._map, 0, magic, 0, base)
+        self._magic = magic
+
+    def __len__(self) -> int:
+        return self.count
+
+    def read(self, index: int) -> Tuple[Any, ...]:
+        return self.record.unpack_from(self._map, _HEADER.size + index * self.record.size)
+
+    def write(self, index: int, *values: Any) -> None:
+        self.record.pack_into(self._map, _HEADER.size + index * self.record.size, *values)
+
+    def append(self, *values: Any) -> None:
+        end = _HEADER.size + (self.count + 1) * self.record.size
+        if end > len(self._map):
+            self._map.close()
+            self._file.truncate(end + GROW_RECORDS * self.record.size)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        self.write(self.count, *values)
+        self.count += 1
+        _HEADER.pack_into(self._map, 0, self._magic, self.count, self.base)
+
+    def records(self) -> List[Tuple[Any, ...]]:
+        """Every record, decoded in one pass."""
+        start = _HEADER.size
+        return list(self.record.iter_unpack(self._map[start:start + self.count * self.record.size]))
+
+    def close(self) -> None:
+        """Unmap and trim the unused preallocated space."""
+        if not self._map.closed:
+            self._map.flush()
+            self._map.close()
+            self._file.truncate(_HEADER.size + self.count * self.record.size)
+        self._file.close()
+
+
+class TimeSeriesStore:
+    """Local history of ``workoutMinutesToday`` with constant-time rollups.
+
+    Raw samples are appended to one segment file per day
+    (``YYYY-MM-DD.seg``, 8 bytes per sample), kept for HISTORY_RETENTION_DAYS.
+    A day index (``days.idx``) holds one fixed-width record per calendar
+    day, addressed by day number: the day's total (its latest sample, since
+    the counter is cumulative within a day) and running sums of totals and
+    active days. The total of any range of days is therefore a difference
+    of two records, which makes day, week and month rollups O(1) per bucket
+    however many samples they cover.
+    """
+
+    def __init__(self, logger: Logger, directory: Path = HISTORY_DIR,
+                 tz: Optional[tzinfo] = None, retention_days: int = HISTORY_RETENTION_DAYS):
+        self.logger = logger
+        self.directory = Path(directory)
+        self.tz = tz
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._index: Optional[RecordFile] = None
+        self._segment: Optional[Tuple[int, RecordFile]] = None
+        self._day_span = (0.0, 0.0, date.min)  # [start, end) timestamps of the last day seen
+
+    def day_of(self, timestamp: float) -> date:
+        start, end, day = self._day_span
+        if start <= timestamp < end:
+            return day
+        day = datetime.fromtimestamp(timestamp, self.tz).date()
+        start = datetime.combine(day, datetime.min.time(), self.tz).timestamp()
+        following = day + timedelta(days=1)
+        self._day_span = (start, datetime.combine(following, datetime.min.time(), self.tz).timestamp(), day)
+        return day
+
+    def _open_index(self, first_day: Optional[int] = None) -> Optional[RecordFile]:
+        """Open the day index; a missing one is only created when a first day is given."""
+        if self._index is None:
+            path = self.directory / "days.idx"
+            if first_day is None and not path.exists():
+                return None
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._index = RecordFile(path, _INDEX_MAGIC, _DAY, first_day or 0)
+        return self._index
+
+    def _segment_path(self, day: date) -> Path:
+        return self.directory / f"{day.isoformat()}.seg"
+
+    def append(self, timestamp: float, minutes: float) -> bool:
+        """Record one sample; returns False if it predates the index and was dropped."""
+        day = self.day_of(timestamp)
+        ordinal = day.toordinal()
+        with self._lock:
+            index = self._open_index(ordinal)
+            position = ordinal - index.base
+            if position < 0:
+                return False
+            if self._segment is None or self._segment[0] != ordinal:
+                if self._segment is not None:
+                    self._segment[1].close()
+                self._segment = (ordinal, RecordFile(self._segment_path(day), _SEGMENT_MAGIC, _SAMPLE))
+                self._expire(day)
+            self._segment[1].append(int(timestamp), minutes)
+            self._record_day(index, position, timestamp, minutes)
+        return True
+
+    def _record_day(self, index: RecordFile, position: int, timestamp: float, minutes: float) -> None:
+        """Update one day's record, carrying the running sums forward."""
+        while len(index) <= position:
+            # Days without samples repeat the running sums of the day before.
+            previous = index.read(len(index) - 1) if len(index) else (0.0, 0.0, 0.0, 0, 0)
+            index.append(0.0, previous[1], 0.0, 0, previous[4])
+        total, cumulative, last, samples, active = index.read(position)
+        if timestamp < last:
+            index.write(position, total, cumulative, last, samples + 1, active)
+            return
+        delta = minutes - total
+        became_active = int(minutes > 0) - int(total > 0)
+        # Rebuilt from the previous day rather than adjusted, so rounding cannot build up.
+        before = index.read(position - 1) if position else (0.0, 0.0, 0.0, 0, 0)
+        index.write(position, minutes, before[1] + minutes, timestamp, samples + 1, active + became_active)
+        # Only a late sample for an earlier day has later days to adjust.
+        for later in range(position + 1, len(index)):
+            t, c, l, s, a = index.read(later)
+            index.write(later, t, c + delta, l, s, a + became_active)
+
+    def _expire(self, today: date) -> None:
+        """Delete raw segments past the retention period; day totals are kept."""
+        cutoff = (today - timedelta(days=self.retention_days)).isoformat()
+        for path in self.directory.glob("*.seg"):
+            if path.stem < cutoff:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    self.logger.warning(f"Failed to remove old history segment {path}: {e}")
+
+    def _sums(self, ordinal: int) -> Tuple[float, int]:
+        """Running (minutes, active days) through the given day; lock held."""
+        index = self._index
+        if index is None or ordinal < index.base or not len(index):
+            return 0.0, 0
+        _, cumulative, _, _, active = index.read(min(ordinal - index.base, len(index) - 1))
+        return cumulative, active
+
+    def total(self, start: date, end: date) -> Tuple[float, int]:
+        """Minutes and active days from ``start`` through ``end``, in constant time."""
+        with self._lock:
+            self._open_index()
+            minutes, active = self._sums(end.toordinal())
+            before_minutes, before_active = self._sums(start.toordinal() - 1)
+        return minutes - before_minutes, active - before_active
+
+    def rollup(self, unit: str, start: date, end: date) -> List[Dict[str, Any]]:
+        """Per-``unit`` buckets (day, week from Monday, or month) covering start..end."""
+        if unit not in UNITS:
+            raise ValueError(f"unit must be one of {', '.join(UNITS)}")
+        buckets = []
+        bucket = bucket_start(unit, start)
+        while bucket <= end:
+            following = _next_bucket(unit, bucket)
+            first, last = max(bucket, start), min(following - timedelta(days=1), end)
+            minutes, active = self.total(first, last)
+            buckets.append({"start": bucket.isoformat(), "days": (last - first).days + 1,
+                            "minutes": round(minutes, 2), "activeDays": active})
+            bucket = following
+        return buckets
+
+    def samples(self, day: date, points: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Raw samples of one day, or the latest sample in each of ``points`` equal slices."""
+        path = self._segment_path(day)
+        with self._lock:
+            if self._segment is not None and self._segment[0] == day.toordinal():
+                records = self._segment[1].records()
+            elif path.exists():
+                segment = RecordFile(path, _SEGMENT_MAGIC, _SAMPLE)
+                try:
+                    records = segment.records()
+                finally:
+                    segment.close()
+            else:
+                return []
+        if not points or len(records) <= points:
+            return records
+        start = datetime.combine(day, datetime.min.time(), self.tz).timestamp()
+        width = 86_400 / points
+        slices: Dict[int, Tuple[int, float]] = {}
+        for timestamp, minutes in records:
+            slices[min(points - 1, max(0, int((timestamp - start) // width)))] = (timestamp, minutes)
+        return [slices[key] for key in sorted(slices)]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._segment is not None:
+                self._segment[1].close()
+                self._segment = None
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+
+def bucket_start(unit: str, day: date, back: int = 0) -> date:
+    """First day of the ``unit`` bucket containing ``day``, or of the one ``back`` buckets earlier."""
+    if unit == "week":
+        return day - timedelta(days=day.weekday(), weeks=back)
+    if unit == "month":
+        months = day.year * 12 + day.month - 1 - back
+        return date(months // 12, months % 12 + 1, 1)
+    return day - timedelta(days=back)
+
+
+def _next_bucket(unit: str, start: date) -> date:
+    if unit == "week":
+        return start + timedelta(days=7)
+    if unit == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
@@ -0,0 +1,242 @@
+import copy
+import json
+import time
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from ..utils.files import atomic_write_json
+from ..utils.logger import Logger
+from ..utils.metrics import FIREBASE_ERRORS, FIREBASE_RETRIES
+from ..config.constants import (
+    WRITE_QUEUE_PATH,
+    WRITE_QUEUE_DELAY,
+    WRITE_RETRY_BASE_DELAY,
+    WRITE_RETRY_MAX_DELAY,
+)
+from .http_client import FirebaseClient
+from .resilience import backoff_delay
+
+
+def _ancestors(path: str) -> List[str]:
+    """Proper ancestors of a slash-separated path, nearest first."""
+    parts = path.split("/")
+    return ["/".join(parts[:i]) for i in range(len(parts) - 1, 0, -1)]
+
+
+@dataclass(frozen=True)
+class PendingWrite:
+    """A value waiting to be written at an absolute database path."""
+    value: Any
+    expires_at: Optional[float] = None
+
+
+class FirebaseWriteQueue:
+    """Outbound Firebase writes, coalesced and sent from a background thread.
+
+    Writes are keyed by absolute database path. A newer write to a path
+    replaces the pending one, and a write to a parent absorbs pending writes
+    below it. Everything pending goes out as one multi-path PATCH of the
+    root; it sets absolute values, so resending after a lost response is
+    harmless. Unsent writes are kept in WRITE_QUEUE_PATH across restarts,
+    and a write may carry an expiry after which it is dropped unsent.
+    """
+
+    def __init__(self, logger: Logger, client: Optional[FirebaseClient] = None,
+                 path: Path = WRITE_QUEUE_PATH, delay: float = WRITE_QUEUE_DELAY,
+                 retry_base: float = WRITE_RETRY_BASE_DELAY,
+                 retry_max: float = WRITE_RETRY_MAX_DELAY,
+                 clock: Callable[[], float] = time.time):
+        self.logger = logger
+        self.client = client or FirebaseClient()
+        self.path = Path(path)
+        self.delay = delay
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.clock = clock
+        self._pending: Dict[str, PendingWrite] = {}
+        self._below: Dict[str, int] = {}  # pending paths under each ancestor path
+        self._persisted: Optional[Dict[str, PendingWrite]] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.failures = 0
+        self._load()
+
+    def _load(self) -> None:
+        """Restore writes left unsent by a previous run."""
+        try:
+            saved = json.loads(self.path.read_text())
+            entries = {entry["path"]: PendingWrite(entry["value"], entry.get("expires_at"))
+                       for entry in saved["writes"]}
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Ignoring unreadable write queue {self.path}: {e}")
+            return
+        for path, write in entries.items():
+            self._put(path, write)
+        self._persisted = dict(entries)
+        if entries:
+            self.logger.info(f"Restored {len(entries)} unsent Firebase write(s).")
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def set(self, path: str, value: Any, expires_at: Optional[float] = None) -> None:
+        """Queue ``value`` for the database path; returns without any I/O."""
+        path = path.strip("/")
+        if not path:
+            raise ValueError("the database root cannot be written through the queue")
+        with self._lock:
+            if self._below.get(path):
+                for other in [p for p in self._pending if p.startswith(path + "/")]:
+                    self._remove(other)
+            ancestor = next((p for p in _ancestors(path) if p in self._pending), None)
+            if ancestor is None:
+                self._put(path, PendingWrite(value, expires_at))
+            else:
+                # Firebase rejects overlapping paths in one update; fold into the parent.
+                previous = self._pending[ancestor]
+                merged = copy.deepcopy(previous.value) if isinstance(previous.value, dict) else {}
+                node = merged
+                *parents, leaf = path[len(ancestor) + 1:].split("/")
+                for part in parents:
+                    child = node.get(part)
+                    if not isinstance(child, dict):
+                        child = node[part] = {}
+                    node = child
+                node[leaf] = value
+                expiry = None if previous.expires_at is None or expires_at is None \
+                    else max(previous.expires_at, expires_at)
+                self._pending[ancestor] = PendingWrite(merged, expiry)
+        self._wake.set()
+
+    def _put(self, path: str, write: PendingWrite) -> None:
+        if path not in self._pending:
+            for ancestor in _ancestors(path):
+                self._below[ancestor] = self._below.get(ancestor, 0) + 1
+        self._pending[path] = write
+
+    def _remove(self, path: str) -> None:
+        del self._pending[path]
+        for ancestor in _ancestors(path):
+            self._below[ancestor] -= 1
+            if not self._below[ancestor]:
+                del self._below[ancestor]
+
+    def pending(self, prefix: str = "") -> Dict[str, Any]:
+        """Return unsent values of the direct children of ``prefix``."""
+        prefix = prefix.strip("/")
+        start = f"{prefix}/" if prefix else ""
+        with self._lock:
+            values: Dict[str, Any] = {}
+            whole = self._pending.get(prefix)
+            if whole is not None and isinstance(whole.value, dict):
+                values.update(whole.value)
+            if prefix and not self._below.get(prefix):
+                return values
+            for path, write in self._pending.items():
+                child = path[len(start):]
+                if path.startswith(start) and child and "/" not in child:
+                    values[child] = write.value
+            return values
+
+    def flush(self) -> bool:
+        """Send everything pending as one PATCH; return False if it should be retried."""
+        import requests
+
+        with self._lock:
+            now = self.clock()
+            for path in [p for p, w in self._pending.items()
+                         if w.expires_at is not None and w.expires_at <= now]:
+                self._remove(path)
+                self.logger.warning(f"Dropped expired Firebase write to /{path}.")
+            batch = dict(self._pending)
+        self._persist(batch)
+        if not batch:
+            return True
+
+        try:
+            response = self.client.patch("", {path: write.value for path, write in batch.items()})
+        except requests.RequestException as e:
+            FIREBASE_ERRORS.inc(operation="write")
+            self.logger.warning(f"Firebase write failed, will retry: {e}")
+            return False
+        if response.status_code == 429 or response.status_code >= 500:
+            FIREBASE_ERRORS.inc(operation="write")
+            self.logger.warning(f"Firebase write failed with {response.status_code}, will retry.")
+            return False
+        if not response.ok:
+            # A rejected write fails the same way every time; drop it rather than loop.
+            FIREBASE_ERRORS.inc(operation="write")
+            self.logger.error(f"Firebase rejected {len(batch)} write(s): {response.text}")
+
+        with self._lock:
+            for path, write in batch.items():
+                if self._pending.get(path) is write:
+                    self._remove(path)
+            remaining = dict(self._pending)
+        self._persist(remaining)
+        if response.ok:
+            self.logger.info(f"Wrote {len(batch)} Firebase update(s) in one request.")
+        return True
+
+    def _persist(self, writes: Dict[str, PendingWrite]) -> None:
+        """Mirror the pending writes to disk, skipping the write if nothing changed."""
+        if writes == (self._persisted or {}):
+            return
+        try:
+            if writes:
+                atomic_write_json(self.path, {"writes": [
+                    {"path": path, "value": write.value, "expires_at": write.expires_at}
+                    for path, write in writes.items()
+                ]})
+            else:
+                self.path.unlink(missing_ok=True)
+        except OSError as e:
+            self.logger.error(f"Failed to persist the Firebase write queue: {e}")
+            return
+        self._persisted = dict(writes)
+
+    def start(self) -> None:
+        """Start the background sender; restored writes are sent right away."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        if self._pending:
+            self._wake.set()
+        self._thread = threading.Thread(target=self._run, name="firebase-writes", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sender; anything unsent stays persisted for the next run.
+
+        Pending writes get one last attempt unless Firebase is already known
+        to be failing, so shutdown is not held up by an outage.
+        """
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        if self._pending and not self.failures:
+            self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait()
+            # Let writes issued together (e.g. one reset per profile) join the batch.
+            if self._stopping.wait(self.delay):
+                return
+            self._wake.clear()
+            if self.flush():
+                self.failures = 0
+                continue
+            FIREBASE_RETRIES.inc(operation="write")
+            if self._stopping.wait(backoff_delay(self.failures, self.retry_base, self.retry_max)):
+                return
+            self.failures += 1
+            self._wake.set()
@@ -0,0 +1,28 @@
+import time
+from typing import Callable
+
+import pytest
+
+from backend.benchmarks.fixtures import FirebaseStub
+from backend.utils.logger import Logger
+
+
+@pytest.fixture
+def logger(tmp_path):
+    return Logger(tmp_path / "test.log", echo=False)
+
+
+@pytest.fixture
+def stub():
+    with FirebaseStub() as server:
+        yield server
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    """Poll ``condition`` until it holds or ``timeout`` seconds pass; return its last value."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return condition()
+        time.sleep(0.01)
+    return True
@@ -0,0 +1,112 @@
+import socket
+import struct
+
+import pytest
+
+from backend.benchmarks.fixtures import FakeResolver, make_dns_query
+from backend.services.dns_stub import DnsStub
+from backend.services.domain_set import DomainSet
+
+UPSTREAM_IP = "93.184.216.34"
+A, AAAA = 1, 28
+NOERROR, SERVFAIL, NXDOMAIN = 0, 2, 3
+
+
+@pytest.fixture
+def upstream():
+    with FakeResolver() as resolver:
+        yield resolver
+
+
+def start_stub(logger, upstream_address, timeout: float = 0.3) -> DnsStub:
+    stub = DnsStub(logger, port=0, upstream=upstream_address, upstream_timeout=timeout)
+    stub.start()
+    return stub
+
+
+@pytest.fixture
+def dns(logger, upstream):
+    stub = start_stub(logger, upstream.address)
+    yield stub
+    stub.stop()
+
+
+def ask(stub: DnsStub, name: str, qtype: int = A, qid: int = 7):
+    """Send one UDP query; return the response's rcode and the rdata of its last answer."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as client:
+        client.settimeout(2)
+        client.sendto(make_dns_query(name, qtype, qid), ("127.0.0.1", stub.port))
+        response = client.recv(512)
+    rid, flags, _, answers = struct.unpack_from("!HHHH", response)
+    assert rid == qid
+    if not answers:
+        return flags & 0xF, None
+    rdata = response[-16:] if qtype == AAAA else response[-4:]
+    family = socket.AF_INET6 if qtype == AAAA else socket.AF_INET
+    return flags & 0xF, socket.inet_ntop(family, rdata)
+
+
+def test_unblocked_names_are_forwarded_and_cached(dns, upstream):
+    assert ask(dns, "example.com") == (NOERROR, UPSTREAM_IP)
+    assert upstream.queries == 1
+    assert ask(dns, "example.com", qid=8) == (NOERROR, UPSTREAM_IP)
+    assert upstream.queries == 1
+    assert dns.forwarded_queries == 1
+
+
+def test_upstream_nxdomain_is_passed_through(dns):
+    assert ask(dns, "nothing.invalid") == (NXDOMAIN, None)
+
+
+def test_blocked_names_and_subdomains_are_answered_locally(dns, upstream):
+    dns.block_websites(["YouTube.com."])
+    assert ask(dns, "youtube.com") == (NOERROR, "127.0.0.1")
+    assert ask(dns, "m.youtube.com") == (NOERROR, "127.0.0.1")
+    assert ask(dns, "youtube.com", AAAA) == (NOERROR, "::1")
+    assert ask(dns, "notyoutube.com") == (NOERROR, UPSTREAM_IP)
+    assert upstream.queries == 1
+    assert dns.blocked_queries == 3
+
+
+def test_unblocking_falls_back_to_upstream(dns, upstream):
+    ask(dns, "reddit.com")
+    dns.block_websites(["reddit.com"])
+    assert ask(dns, "reddit.com") == (NOERROR, "127.0.0.1")
+    dns.unblock_websites(["reddit.com"])
+    # The answer cached before the block is still good and served again.
+    assert ask(dns, "reddit.com") == (NOERROR, UPSTREAM_IP)
+    assert upstream.queries == 1
+
+
+def test_blocklist_blocks_until_removed(dns):
+    dns.set_blocklist(DomainSet.from_domains(["*.ads.example", "tracker.example"]))
+    assert ask(dns, "tracker.ads.example") == (NOERROR, "127.0.0.1")
+    assert ask(dns, "tracker.example") == (NOERROR, "127.0.0.1")
+    assert ask(dns, "cdn.tracker.example") == (NOERROR, UPSTREAM_IP)
+    dns.set_blocklist(None)
+    assert ask(dns, "tracker.ads.example") == (NOERROR, UPSTREAM_IP)
+
+
+def test_slow_upstream_answers_servfail(logger):
+    with FakeResolver(latency=1.0) as slow:
+        stub = start_stub(logger, slow.address, timeout=0.2)
+        try:
+            assert ask(stub, "slow.example") == (SERVFAIL, None)
+            # A failure is not cached; the next try goes upstream again.
+            assert ask(stub, "slow.example", qid=9) == (SERVFAIL, None)
+            assert slow.queries == 2
+        finally:
+            stub.stop()
+
+
+def test_unreachable_upstream_answers_servfail(logger):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as closed:
+        closed.bind(("127.0.0.1", 0))
+        address = closed.getsockname()
+    stub = start_stub(logger, address, timeout=0.2)
+    try:
+        assert ask(stub, "example.com") == (SERVFAIL, None)
+        stub.block_websites(["example.com"])
+        assert ask(stub, "example.com") == (NOERROR, "127.0.0.1")
+    finally:
+        stub.stop()
@@ -0,0 +1,57 @@
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from backend.services import exec_watcher
+from backend.services.exec_watcher import ExecWatcher, ProcDiffSource
+from backend.services.notifications import NullBackend
+from backend.services.process_manager import ProcessManager
+from backend.services.process_scanner import AppMatcher
+
+KILL_BOUND = 2.0  # seconds from launch to kill, twenty /proc diff ticks
+
+pytestmark = pytest.mark.skipif(not ExecWatcher.supported() or not shutil.which("sleep"),
+                                reason="needs /proc and a sleep binary")
+
+
+@pytest.fixture
+def manager(logger, monkeypatch):
+    def unavailable():
+        raise OSError("netlink disabled for the test")
+
+    # Force the unprivileged fallback even when running as root.
+    monkeypatch.setattr(exec_watcher, "NetlinkExecSource", unavailable)
+    manager = ProcessManager(logger)
+    manager.notifier.backend = NullBackend()
+    yield manager
+    manager.exec_watcher.stop()
+    manager.notifier.stop()
+
+
+def test_proc_diff_watcher_kills_a_blocked_launch(manager, tmp_path):
+    name = "npngtestblocked"
+    binary = tmp_path / name
+    shutil.copy(shutil.which("sleep"), binary)
+    manager._watch(AppMatcher([name]))
+    assert isinstance(manager.exec_watcher._source, ProcDiffSource)
+
+    started = time.monotonic()
+    proc = subprocess.Popen([str(binary), "30"])
+    try:
+        proc.wait(timeout=KILL_BOUND)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        pytest.fail(f"{name} still running {KILL_BOUND} s after launch")
+    assert proc.returncode != 0
+    assert time.monotonic() - started <= KILL_BOUND
+
+
+def test_proc_diff_watcher_spares_other_launches(manager, tmp_path):
+    binary = tmp_path / "npngtestallowed"
+    shutil.copy(shutil.which("sleep"), binary)
+    manager._watch(AppMatcher(["npngtestblocked"]))
+    proc = subprocess.Popen([str(binary), "0.5"])
+    assert proc.wait(timeout=5) == 0
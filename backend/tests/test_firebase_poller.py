@@ -0,0 +1,80 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from backend.config.constants import POLL_INTERVAL, SWEEP_INTERVAL_MAX
+from backend.firebase_poller import FirebasePoller
+from backend.services.firebase_service import FirebaseService
+from backend.services.firebase_stream import FirebaseStream
+from backend.services.http_client import FirebaseClient
+from backend.services.resilience import LastKnownStatus, ResilientGoalStatus
+from backend.services.scheduler import AdaptiveInterval
+from backend.services.write_queue import FirebaseWriteQueue
+from .conftest import wait_until
+
+
+@pytest.fixture
+def poller(logger, stub, tmp_path):
+    """A poller with only the services goal-status reads go through."""
+    stub.replace({"goalReachedToday": True, "workoutMinutesToday": 30})
+    client = FirebaseClient(stub.url)
+    poller = FirebasePoller.__new__(FirebasePoller)
+    poller.firebase_service = FirebaseService(
+        logger, client, writes=FirebaseWriteQueue(logger, client, tmp_path / "pending.json"))
+    poller.goal_status = ResilientGoalStatus(logger, poller.firebase_service,
+                                             cache=LastKnownStatus(tmp_path / "last.json"))
+    poller.firebase_stream = None
+    yield poller
+    client.close()
+
+
+@pytest.mark.parametrize("streaming", [False, True], ids=["polled", "streamed"])
+def test_queued_reset_shows_before_it_is_sent(poller, logger, streaming):
+    if streaming:
+        poller.firebase_stream = FirebaseStream(logger, poller.firebase_service.client)
+        poller.firebase_stream.start()
+        assert wait_until(lambda: poller.firebase_stream.snapshot() is not None)
+    try:
+        assert poller.fetch_goal_status()["goalReachedToday"] is True
+        poller.firebase_service.reset_goal()
+        expected = {"goalReachedToday": False, "workoutMinutesToday": 30}
+        assert poller.fetch_goal_status() == expected
+        assert poller.goal_status.cache.fresh() == expected
+    finally:
+        if streaming:
+            poller.firebase_stream.stop()
+
+
+@pytest.mark.parametrize("watching, ceiling", [(None, POLL_INTERVAL), (False, POLL_INTERVAL),
+                                               (True, SWEEP_INTERVAL_MAX)],
+                         ids=["no-watcher", "stopped", "running"])
+def test_sweeps_back_off_only_while_the_exec_watcher_runs(watching, ceiling):
+    poller = FirebasePoller.__new__(FirebasePoller)
+    watcher = None if watching is None else SimpleNamespace(running=watching)
+    poller.process_manager = SimpleNamespace(exec_watcher=watcher)
+    poller.sweep_interval = AdaptiveInterval(POLL_INTERVAL, SWEEP_INTERVAL_MAX)
+    for _ in range(10):
+        poller._backoff_sweep()
+    assert poller.sweep_interval.current == ceiling
+
+
+def test_background_failures_are_logged(logger):
+    poller = FirebasePoller.__new__(FirebasePoller)
+    poller.logger = logger
+
+    def guard():
+        raise OSError("hosts unreadable")
+
+    async def run():
+        poller._loop = asyncio.get_running_loop()
+        poller._executors = {"hosts": ThreadPoolExecutor(1)}
+        future = poller._run_background("Hosts guard", "hosts", guard)
+        await asyncio.wait([future])
+        await asyncio.sleep(0)
+        poller._executors["hosts"].shutdown()
+
+    asyncio.run(run())
+    logger.flush()
+    assert "Hosts guard failed: hosts unreadable" in logger.log_file.read_text()
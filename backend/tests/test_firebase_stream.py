@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from backend.services import firebase_stream
+from backend.services.firebase_stream import FirebaseStream
+from backend.services.http_client import FirebaseClient
+from .conftest import wait_until
+
+
+@pytest.fixture
+def fast_reconnect(monkeypatch):
+    monkeypatch.setattr(firebase_stream, "STREAM_RECONNECT_DELAY", 0.05)
+    monkeypatch.setattr(firebase_stream, "STREAM_MAX_RECONNECT_DELAY", 0.1)
+
+
+@pytest.fixture
+def stream(logger, stub):
+    changes = []
+    stream = FirebaseStream(logger, FirebaseClient(stub.url), on_change=lambda: changes.append(1))
+    stream.changes = changes
+    yield stream
+    stream.stop()
+
+
+@pytest.mark.parametrize("root, expected", [
+    ({"goalReachedToday": True, "other": 1}, {"goalReachedToday": True}),
+    ({}, {}),
+    (False, {}),
+    (None, {}),
+])
+def test_root_put_keeps_only_present_keys(logger, root, expected):
+    stream = FirebaseStream(logger, FirebaseClient("http://127.0.0.1:9"))
+    stream._apply("put", "/", root)
+    assert stream.snapshot() == expected
+
+
+def test_null_values_remove_keys(logger):
+    stream = FirebaseStream(logger, FirebaseClient("http://127.0.0.1:9"))
+    stream._apply("put", "/", {"goalReachedToday": True, "workoutMinutesToday": 20})
+    stream._apply("patch", "/", {"goalReachedToday": None})
+    stream._apply("put", "/workoutMinutesToday", None)
+    assert stream.snapshot() == {}
+
+
+def test_mirrors_changes_from_the_server(stub, stream):
+    stub.replace({"goalReachedToday": False})
+    stream.start()
+    assert wait_until(lambda: stream.snapshot() == {"goalReachedToday": False})
+    stub.update({"goalReachedToday": True})
+    assert wait_until(lambda: stream.snapshot() == {"goalReachedToday": True})
+
+
+def test_reconnects_after_the_server_drops_the_stream(stub, stream, fast_reconnect):
+    stub.replace({"goalReachedToday": False})
+    stream.start()
+    assert wait_until(lambda: stream.connected)
+    stub.drop_streams()
+    assert wait_until(lambda: stub.requests.get("STREAM", 0) == 2)
+    assert wait_until(lambda: stream.connected)
+    # Changes made while reconnecting arrive with the new stream's initial put.
+    stub.update({"goalReachedToday": True})
+    assert wait_until(lambda: stream.snapshot() == {"goalReachedToday": True})
+
+
+def test_reports_unsynced_while_the_server_is_down(stub, stream, fast_reconnect):
+    stub.replace({"goalReachedToday": True})
+    stream.start()
+    assert wait_until(lambda: stream.connected)
+    stub.fail_status = 503
+    stub.drop_streams()
+    assert wait_until(lambda: not stream.connected)
+    assert stream.snapshot() is None
+    stub.fail_status = 0
+    assert wait_until(lambda: stream.snapshot() == {"goalReachedToday": True})
+
+
+def test_keep_alive_events_hold_the_stream_open(stub, stream, monkeypatch):
+    monkeypatch.setattr(firebase_stream, "STREAM_READ_TIMEOUT", 0.5)
+    stub.keepalive = 0.1
+    stub.replace({"goalReachedToday": False})
+    stream.start()
+    assert wait_until(lambda: stream.connected)
+    notified = len(stream.changes)
+    time.sleep(1.5)
+    assert stream.connected
+    assert stub.requests.get("STREAM", 0) == 1
+    assert len(stream.changes) == notified
+
+
+def test_silent_stream_is_reopened_after_the_read_timeout(stub, stream, monkeypatch, fast_reconnect):
+    monkeypatch.setattr(firebase_stream, "STREAM_READ_TIMEOUT", 0.3)
+    stub.replace({"goalReachedToday": False})
+    stream.start()
+    assert wait_until(lambda: stream.connected)
+    assert wait_until(lambda: stub.requests.get("STREAM", 0) >= 2)
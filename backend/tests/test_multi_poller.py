@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from backend import multi_poller
+from backend.services.http_client import FirebaseClient
+from .conftest import wait_until
+
+
+class RecordingProcesses:
+    """Stands in for ProcessManager in the apps reconciler: records each sweep."""
+
+    def __init__(self):
+        self.blocked = None
+        self.matcher = None
+
+    def block_apps(self, apps, matcher=None):
+        self.blocked, self.matcher = apps, matcher
+
+    def unblock_apps(self, apps):
+        self.blocked, self.matcher = [], None
+
+
+@pytest.fixture
+def make_poller(tmp_path, monkeypatch):
+    monkeypatch.setattr(multi_poller, "LOG_FILE", tmp_path / "poller.log")
+    monkeypatch.setattr(multi_poller, "HEARTBEAT_FILE", tmp_path / "heartbeat.json")
+    pollers = []
+
+    def make(configs, shared_hosts=False):
+        entries = []
+        for name, config in configs.items():
+            hosts = tmp_path / ("hosts" if shared_hosts else f"hosts-{name}")
+            (tmp_path / f"{name}.json").write_text(json.dumps(config))
+            hosts.write_text("127.0.0.1 localhost\n")
+            entries.append({"name": name, "firebase_path": f"users/{name}",
+                            "config": f"{name}.json", "hosts": str(hosts)})
+        (tmp_path / "profiles.json").write_text(json.dumps({"profiles": entries}))
+        poller = multi_poller.MultiProfilePoller(tmp_path / "profiles.json",
+                                                 FirebaseClient("http://127.0.0.1:9"))
+        poller.apps_reconciler.process_manager = RecordingProcesses()
+        pollers.append(poller)
+        return poller
+
+    yield make
+    for poller in pollers:
+        poller.process_manager.notifier.stop()
+        poller._executor.shutdown(wait=False)
+
+
+def sweep(poller, *statuses):
+    for runtime, goal_reached in zip(poller.profiles, statuses):
+        runtime.update({"goalReachedToday": goal_reached, "workoutMinutesToday": 0})
+    poller.enforce_apps()
+    return poller.apps_reconciler.process_manager
+
+
+GATED = {"apps": ["steam"], "rules": [{"apps": ["tiktok"], "until": "never"}]}
+
+
+def test_reached_goal_releases_goal_gated_apps(make_poller):
+    poller = make_poller({"solo": GATED})
+    assert sweep(poller, False).blocked == ["steam", "tiktok"]
+    processes = sweep(poller, True)
+    assert processes.blocked == ["tiktok"]
+    assert processes.matcher.matches("tiktok") and not processes.matcher.matches("steam")
+
+
+def test_apps_are_swept_for_the_union_of_profiles(make_poller):
+    poller = make_poller({"a": {"apps": ["steam"]}, "b": {"apps": ["discord"]}})
+    processes = sweep(poller, False, False)
+    assert processes.blocked == ["discord", "steam"]
+    assert processes.matcher.matches("Discord") and processes.matcher.matches("steam")
+    assert sweep(poller, True, False).blocked == ["discord"]
+    assert sweep(poller, True, True).blocked == []
+
+
+def test_rule_windows_bound_the_poll_delay(make_poller):
+    window = {"days": "daily", "start": "09:00", "end": "17:00"}
+    poller = make_poller({"solo": {"rules": [{"apps": ["steam"], "windows": [window]}]}})
+    sweep(poller, False)
+    delay = poller.next_policy_change()
+    assert delay is not None and 0 <= delay <= 24 * 3600
+    assert poller.profiles[0].policy_change == pytest.approx(time.time() + delay, abs=1)
+
+
+def poll(poller, *statuses):
+    """Run one round with the given goal statuses in place of Firebase."""
+    for runtime, goal_reached in zip(poller.profiles, statuses):
+        runtime.fetch = lambda goal_reached=goal_reached: {"goalReachedToday": goal_reached}
+    asyncio.run(poller.poll_once())
+    return poller.hosts_targets[0].hosts_manager._read()
+
+
+def test_profiles_on_one_hosts_file_share_one_edit(make_poller, tmp_path):
+    (tmp_path / "ads.txt").write_text("ads.example\n")
+    (tmp_path / "trackers.txt").write_text("tracker.example\n")
+    poller = make_poller({"a": {"sites": ["reddit.com"], "blocklists": ["ads.txt"]},
+                          "b": {"sites": ["youtube.com"]},
+                          "c": {"sites": ["news.example"], "blocklists": ["trackers.txt"]}},
+                         shared_hosts=True)
+    assert len(poller.hosts_targets) == 1
+
+    hosts = poll(poller, False, False, False)
+    assert {"reddit.com", "youtube.com", "news.example"} <= hosts.managed
+    assert "ads.example" in hosts.render() and "tracker.example" in hosts.render()
+
+    # b has no blocklist and a's goal is reached: only a's entries go.
+    hosts = poll(poller, True, False, False)
+    assert "reddit.com" not in hosts.managed and "ads.example" not in hosts.render()
+    assert {"youtube.com", "news.example"} <= hosts.managed
+    assert "tracker.example" in hosts.render()
+
+    hosts = poll(poller, True, True, True)
+    assert not hosts.managed and "tracker.example" not in hosts.render()
+
+
+def test_profiling_toggle_is_forwarded_to_the_loop(make_poller, tmp_path):
+    poller = make_poller({"solo": GATED})
+    poller.profiler.directory = tmp_path / "diagnostics"
+    writers = []
+    write = poller.profiler._write
+    poller.profiler._write = lambda: writers.append(threading.current_thread().name) or write()
+
+    async def toggle_twice():
+        poller._loop = asyncio.get_running_loop()
+        # A signal landing while the loop thread holds the lock must not block on it.
+        with poller.profiler._lock:
+            poller.toggle_profiling()
+        await asyncio.sleep(0)
+        assert poller.profiler.active
+        poller.toggle_profiling()
+        await asyncio.sleep(0)
+        assert not poller.profiler.active
+
+    asyncio.run(toggle_twice())
+    assert wait_until(lambda: writers)
+    assert writers[0].startswith("profiles")
+
+
+def test_stop_before_the_loop_starts_is_kept(make_poller):
+    poller = make_poller({"solo": GATED})
+    poller.stop()
+    asyncio.run(asyncio.wait_for(poller.run_async(), 5))
+    assert poller.cycle == 0
@@ -0,0 +1,34 @@
+import pytest
+
+from backend.services.policy import Policy, Rule, UNTIL_NEVER
+from backend.utils.exceptions import ConfigError
+
+
+@pytest.mark.parametrize("raw", [
+    {"apps": "steam", "until": UNTIL_NEVER},
+    {"sites": "reddit.com"},
+    {"apps": ["steam", ""]},
+    {"apps": ["steam", 3]},
+    {"sites": {"a": "reddit.com"}},
+])
+def test_rule_rejects_targets_that_are_not_lists_of_strings(raw):
+    with pytest.raises(ConfigError):
+        Rule.parse(raw)
+
+
+@pytest.mark.parametrize("config", [
+    {"apps": "steam"},
+    {"sites": "reddit.com"},
+    {"apps": [None]},
+])
+def test_flat_lists_are_validated(config):
+    with pytest.raises(ConfigError):
+        Policy.from_config(config)
+
+
+def test_valid_config_blocks_whole_names_only():
+    policy = Policy.from_config({"apps": ["steam"], "sites": ["reddit.com"]})
+    assert policy.apps == {"steam"}
+    assert policy.app_matcher.matches("steam_osx")
+    assert not policy.app_matcher.matches("systemd")
+    assert not policy.app_matcher.matches("bash")
@@ -0,0 +1,30 @@
+import pytest
+
+from backend.services.process_scanner import AppMatcher, ProcessInfo, ProcessScanner, exe_name
+
+
+@pytest.mark.parametrize("exe, name", [
+    ("/usr/bin/steam", "steam"),
+    ("/Applications/Steam.app/Contents/MacOS/steam_osx", "Steam.app"),
+    ("/Applications/Discord.app/Contents/Frameworks/Discord Helper.app/Contents/MacOS/Discord Helper",
+     "Discord.app"),
+    ("C:\\Program Files\\Steam\\steam.exe", "steam.exe"),
+    ("steam", "steam"),
+])
+def test_exe_name_is_the_file_or_bundle(exe, name):
+    assert exe_name(exe) == name
+
+
+def test_directories_on_the_exe_path_do_not_match():
+    matcher = AppMatcher(["steam", "discord"])
+    assert matcher.matches("python3", "/usr/bin/steam")
+    assert matcher.matches("Helper", "/Applications/Discord.app/Contents/MacOS/Helper")
+    assert not matcher.matches("bash", "/home/steam/.local/bin/bash")
+    assert not matcher.matches("python3", "/opt/discord-tools/venv/bin/python3")
+
+
+def test_scan_ignores_processes_under_a_blocked_directory():
+    procs = [ProcessInfo(1, 0.0, "bash"), ProcessInfo(2, 0.0, "steam")]
+    exes = {1: "/home/steam/bin/bash", 2: "/usr/games/steam"}
+    scanner = ProcessScanner(source=lambda: procs, exe_resolver=exes.get)
+    assert [proc.pid for proc in scanner.scan(AppMatcher(["steam"]))] == [2]
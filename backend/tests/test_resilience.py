@@ -0,0 +1,144 @@
+from datetime import datetime
+
+import pytest
+
+from backend.services.firebase_service import FirebaseService
+from backend.services.http_client import FirebaseClient
+from backend.services.resilience import CircuitBreaker, LastKnownStatus, ResilientGoalStatus
+from backend.services.scheduler import FakeClock, resolve_timezone
+from backend.services.write_queue import FirebaseWriteQueue
+
+GOAL = {"goalReachedToday": True, "workoutMinutesToday": 45,
+        "restrictionsEnabled": True, "lastSyncedAt": 1}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_breaker(clock: FakeClock, threshold: int = 2) -> CircuitBreaker:
+    # rng pinned to 0 makes each open delay exactly half the backoff: 5, 10, 20 ... capped at 20.
+    return CircuitBreaker(failure_threshold=threshold, base_delay=10, max_delay=40,
+                          clock=clock.monotonic, rng=lambda: 0.0)
+
+
+@pytest.fixture
+def goal_status(logger, stub, clock, tmp_path):
+    stub.replace(dict(GOAL))
+    client = FirebaseClient(stub.url, timeout=(0.5, 0.2))
+    service = FirebaseService(logger, client,
+                              writes=FirebaseWriteQueue(logger, client, tmp_path / "pending.json"))
+    status = ResilientGoalStatus(logger, service,
+                                 cache=LastKnownStatus(tmp_path / "last.json", clock=clock.time),
+                                 breaker=make_breaker(clock))
+    yield status
+    client.close()
+
+
+def test_breaker_opens_at_threshold_and_probes_after_the_delay(clock):
+    breaker = make_breaker(clock, threshold=3)
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.advance(4.9)
+    assert not breaker.allow()
+    clock.advance(0.1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # Only the one probe is let through until it reports back.
+    assert not breaker.allow()
+
+
+def test_failed_probe_reopens_with_a_longer_delay(clock):
+    breaker = make_breaker(clock, threshold=1)
+    delays = []
+    for _ in range(4):
+        breaker.record_failure()
+        delays.append(breaker.retry_at - clock.monotonic())
+        clock.advance(delays[-1])
+        assert breaker.allow()
+    assert delays == [5, 10, 20, 20]
+
+
+def test_successful_probe_closes_the_breaker(clock):
+    breaker = make_breaker(clock, threshold=1)
+    breaker.record_failure()
+    clock.advance(5)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    breaker.record_failure()
+    assert breaker.retry_at - clock.monotonic() == 5
+
+
+def test_server_errors_open_the_breaker_and_serve_the_cache(goal_status, stub, clock):
+    assert goal_status.get_goal_status() == GOAL
+    assert goal_status.source == ResilientGoalStatus.LIVE
+
+    stub.fail_status = 503
+    assert goal_status.get_goal_status() == GOAL
+    assert goal_status.breaker.state == CircuitBreaker.CLOSED
+    assert goal_status.get_goal_status() == GOAL
+    assert goal_status.breaker.state == CircuitBreaker.OPEN
+    assert goal_status.source == ResilientGoalStatus.CACHED
+
+    # While open, reads never reach the server.
+    gets = stub.requests["GET"]
+    clock.advance(4)
+    assert goal_status.get_goal_status() == GOAL
+    assert stub.requests["GET"] == gets
+
+
+def test_timeouts_count_as_failures(goal_status, stub):
+    goal_status.get_goal_status()
+    stub.latency = 0.5  # past the client's 0.2 s read timeout
+    goal_status.get_goal_status()
+    goal_status.get_goal_status()
+    assert goal_status.breaker.state == CircuitBreaker.OPEN
+
+
+def test_flapping_endpoint_recovers_on_the_probe(goal_status, stub, clock):
+    goal_status.get_goal_status()
+    for _ in range(3):
+        stub.fail_status = 503
+        goal_status.get_goal_status()
+        goal_status.get_goal_status()
+        assert goal_status.breaker.state == CircuitBreaker.OPEN
+
+        stub.fail_status = 0
+        clock.advance(goal_status.breaker.retry_at - clock.monotonic())
+        assert goal_status.breaker.state == CircuitBreaker.HALF_OPEN
+        assert goal_status.get_goal_status() == GOAL
+        assert goal_status.breaker.state == CircuitBreaker.CLOSED
+        assert goal_status.source == ResilientGoalStatus.LIVE
+
+
+def test_stale_cache_fails_closed(goal_status, stub, clock):
+    goal_status.get_goal_status()
+    stub.fail_status = 503
+    goal_status.get_goal_status()
+    goal_status.get_goal_status()
+    clock.advance(goal_status.cache.ttl + 1)
+    assert goal_status.get_goal_status() == {}
+    assert goal_status.source == ResilientGoalStatus.NONE
+
+
+def test_cached_status_expires_at_midnight_in_the_reset_zone(tmp_path):
+    tz = resolve_timezone("Pacific/Auckland")
+    late = datetime(2024, 6, 10, 23, 0, tzinfo=tz).timestamp()
+    clock = FakeClock(wall=late)
+    cache = LastKnownStatus(tmp_path / "last.json", ttl=3 * 3600, clock=clock.time, tz=tz)
+    cache.remember(GOAL)
+    assert cache.expires_in() == 3600
+    clock.advance(3599)
+    assert cache.fresh() == GOAL
+    # Auckland's midnight has passed even if the machine's local day has not.
+    clock.advance(1)
+    assert cache.fresh() is None
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+
+from backend.services.scheduler import (
+    AdaptiveInterval, FakeClock, Scheduler, next_midnight, resolve_timezone,
+)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(clock):
+    return Scheduler(clock)
+
+
+def test_due_names_come_out_earliest_first(scheduler, clock):
+    scheduler.schedule("sweep", 30)
+    scheduler.schedule("fetch", 10)
+    scheduler.schedule("heartbeat", 20)
+    assert scheduler.time_until_next() == 10
+    assert scheduler.pop_due() == []
+
+    clock.advance(25)
+    assert scheduler.pop_due() == ["fetch", "heartbeat"]
+    assert scheduler.time_until_next() == 5
+    clock.advance(5)
+    assert scheduler.pop_due() == ["sweep"]
+    assert scheduler.time_until_next() is None
+
+
+def test_equal_deadlines_keep_scheduling_order(scheduler, clock):
+    for name in ("c", "a", "b"):
+        scheduler.schedule(name, 5)
+    clock.advance(5)
+    assert scheduler.pop_due() == ["c", "a", "b"]
+
+
+def test_rescheduling_replaces_the_old_deadline(scheduler, clock):
+    scheduler.schedule("fetch", 10)
+    scheduler.schedule("sweep", 20)
+    scheduler.schedule("fetch", 30)
+    assert scheduler.deadline("fetch") == 30
+    clock.advance(20)
+    assert scheduler.pop_due() == ["sweep"]
+    clock.advance(10)
+    assert scheduler.pop_due() == ["fetch"]
+
+
+def test_cancelled_names_never_come_due(scheduler, clock):
+    scheduler.schedule("fetch", 10)
+    scheduler.schedule("sweep", 20)
+    scheduler.cancel("fetch")
+    assert scheduler.deadline("fetch") is None
+    assert scheduler.time_until_next() == 20
+    clock.advance(20)
+    assert scheduler.pop_due() == ["sweep"]
+
+
+def test_wall_and_monotonic_deadlines_interleave(scheduler, clock):
+    scheduler.schedule("fetch", 10)
+    scheduler.schedule_at("midnight", clock.time() + 5)
+    scheduler.schedule("sweep", 15)
+    clock.advance(20)
+    assert scheduler.pop_due() == ["midnight", "fetch", "sweep"]
+
+
+def test_wall_clock_jump_makes_calendar_deadlines_due(scheduler, clock):
+    scheduler.schedule("fetch", 60)
+    scheduler.schedule_at("midnight", clock.time() + 3600)
+    # A laptop asleep for two hours: only the wall clock moved.
+    clock.jump_wall(2 * 3600)
+    assert scheduler.time_until_next() == 0
+    assert scheduler.pop_due() == ["midnight"]
+    assert scheduler.deadline("fetch") == 60
+
+
+def test_overdue_deadline_reports_zero_wait(scheduler, clock):
+    scheduler.schedule("fetch", 10)
+    clock.advance(50)
+    assert scheduler.time_until_next() == 0
+
+
+def test_next_midnight_follows_the_calendar_across_dst():
+    tz = resolve_timezone("Europe/Berlin")
+    # 2024-03-31 has 23 hours in Berlin, 2024-10-27 has 25.
+    for day, hours in ((datetime(2024, 3, 31, 0, 30, tzinfo=tz), 23),
+                       (datetime(2024, 10, 27, 0, 30, tzinfo=tz), 25)):
+        midnight = next_midnight(day.timestamp(), tz)
+        assert datetime.fromtimestamp(midnight, tz).hour == 0
+        assert midnight - day.timestamp() == hours * 3600 - 30 * 60
+
+
+def test_adaptive_interval_backs_off_and_snaps_back():
+    interval = AdaptiveInterval(10, 60)
+    assert [interval.backoff() for _ in range(4)] == [20, 40, 60, 60]
+    assert interval.until(15) == 15
+    assert interval.until(1) == 10
+    assert interval.reset() == 10
@@ -21,3 +21,11 @@ class HostsFileError(PollerError):
 class ProcessError(PollerError):
     """Exception raised for process-related errors."""
     pass
+
+class DnsError(PollerError):
+    """Exception raised for local DNS stub errors."""
+    pass
+
+class ConfigSyncError(PollerError):
+    """Exception raised when the block config cannot be synced through Firebase."""
+    pass
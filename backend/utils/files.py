@@ -0,0 +1,56 @@
+import os
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, Iterable, Union
+
+
+def atomic_write_text(path: Union[str, Path], content: str, fsync: bool = False) -> None:
+    """Replace a file's content atomically via a temp file and rename.
+
+    Symlinks are followed so the link itself is preserved, and the existing
+    file mode is kept. With ``fsync`` the data and the directory entry are
+    flushed to disk before returning.
+    """
+    atomic_write_chunks(path, (content,), fsync)
+
+
+def atomic_write_chunks(path: Union[str, Path], chunks: Iterable[str], fsync: bool = False) -> int:
+    """Like :func:`atomic_write_text`, but stream the content from an iterable of chunks.
+
+    Returns the number of bytes written.
+    """
+    written = 0
+    target = os.path.realpath(path)
+    directory = os.path.dirname(target)
+    try:
+        mode = os.stat(target).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o644
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(target)}.", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as tmp:
+            for chunk in chunks:
+                written += len(chunk.encode())
+                tmp.write(chunk)
+            if fsync:
+                tmp.flush()
+                os.fsync(tmp.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, target)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    if fsync:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return written
+
+
+def atomic_write_json(path: Union[str, Path], data: Any) -> None:
+    """Serialize data as JSON and replace the file atomically."""
+    atomic_write_text(path, json.dumps(data))
@@ -1,12 +1,171 @@
-from datetime import datetime
+import os
+import sys
+import json
+import gzip
+import time
+import queue
+import atexit
+import shutil
+import threading
+from datetime import datetime, date
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from .exceptions import LoggingError
+from ..config.constants import (
+    LOG_LEVEL,
+    LOG_FORMAT,
+    LOG_MAX_BYTES,
+    LOG_BACKUP_COUNT,
+    LOG_ROTATE_DAILY,
+)
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+
+class _LogWriter(threading.Thread):
+    """Background thread that writes queued log lines to one file in batches.
+
+    Rotates by size and/or calendar day, gzip-compressing the rotated files.
+    One writer is shared by every Logger that targets the same path.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, log_file: Path, echo: bool, max_bytes: int, backup_count: int,
+                 rotate_daily: bool):
+        super().__init__(name=f"log-writer-{log_file.name}", daemon=True)
+        self.log_file = log_file
+        self.echo = echo
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_daily = rotate_daily
+        self.queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._file = None
+        self._size = 0
+        self._day: Optional[date] = None
+
+    def run(self) -> None:
+        while True:
+            item = self.queue.get()
+            batch: List[str] = []
+            waiters: List[threading.Event] = []
+            stop = False
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if len(batch) >= self.BATCH_SIZE:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                self._close()
+                return
+
+    def _write(self, batch: List[str]) -> None:
+        """Write one batch with a single write call, rotating first if due."""
+        text = "\n".join(batch) + "\n"
+        try:
+            if self.echo:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            self._maybe_rotate()
+            if self._file is None:
+                self._open()
+            data = text.encode("utf-8")
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+        except Exception as e:
+            sys.stderr.write(f"Failed to write to log file {self.log_file}: {e}\n")
+
+    def _open(self) -> None:
+        self._file = self.log_file.open("ab")
+        stat = os.fstat(self._file.fileno())
+        self._size = stat.st_size
+        self._day = date.fromtimestamp(stat.st_mtime) if stat.st_size else date.today()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _maybe_rotate(self) -> None:
+        """Rotate when the size limit is reached or the day has changed."""
+        if self._file is None:
+            if not self.log_file.exists():
+                return
+            self._open()
+        too_big = self.max_bytes > 0 and self._size >= self.max_bytes
+        new_day = self.rotate_daily and self._size > 0 and self._day != date.today()
+        if too_big or new_day:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        """Shift ``log.N.gz`` backups up by one and compress the current file."""
+        self._close()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                src = self.log_file.with_name(f"{self.log_file.name}.{index}.gz")
+                if src.exists():
+                    src.replace(self.log_file.with_name(f"{self.log_file.name}.{index + 1}.gz"))
+            with self.log_file.open("rb") as src, \
+                    gzip.open(self.log_file.with_name(f"{self.log_file.name}.1.gz"), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        self.log_file.write_bytes(b"")
+        self._open()
+        self._day = date.today()
+
+
+_writers: Dict[Path, _LogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def _writer_for(log_file: Path, **options: Any) -> _LogWriter:
+    """Return the shared writer thread for a log file, starting it on first use."""
+    key = log_file.resolve()
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or not writer.is_alive():
+            writer = _LogWriter(log_file, **options)
+            writer.start()
+            _writers[key] = writer
+        return writer
+
+
+@atexit.register
+def flush_all() -> None:
+    """Flush every log writer; registered to run at interpreter exit."""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        done = threading.Event()
+        writer.queue.put(done)
+        done.wait(timeout=5)
+
 
 class Logger:
-    def __init__(self, log_file: Path):
+    def __init__(self, log_file: Path, level: str = LOG_LEVEL, fmt: str = LOG_FORMAT,
+                 echo: bool = True, max_bytes: int = LOG_MAX_BYTES,
+                 backup_count: int = LOG_BACKUP_COUNT, rotate_daily: bool = LOG_ROTATE_DAILY):
         self.log_file = log_file
+        self.level = LEVELS.get(level.upper(), LEVELS["INFO"])
+        self.json_format = fmt == "json"
         self._ensure_log_file_exists()
+        self._writer = _writer_for(
+            log_file, echo=echo, max_bytes=max_bytes,
+            backup_count=backup_count, rotate_daily=rotate_daily,
+        )
+        self._stamp = (-1, "")
 
     def _ensure_log_file_exists(self) -> None:
         """Ensure the log file exists and is writable."""
@@ -17,33 +176,61 @@ class Logger:
         except Exception as e:
             raise LoggingError(f"Failed to initialize log file: {e}")
 
+    def is_enabled_for(self, level: str) -> bool:
+        """Return whether messages at this level would be written."""
+        return LEVELS.get(level, 0) >= self.level
+
+    def _timestamp(self) -> str:
+        """Return the current timestamp, formatted at most once per second."""
+        second = int(time.time())
+        cached_second, stamp = self._stamp
+        if second != cached_second:
+            stamp = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+            self._stamp = (second, stamp)
+        return stamp
+
     def _format_message(self, message: str, level: str) -> str:
         """Format the log message with timestamp and log level."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        return f"[{timestamp}] [{level}] {message}"
+        if self.json_format:
+            return json.dumps(
+                {"ts": self._timestamp(), "level": level, "pid": os.getpid(), "message": message},
+                ensure_ascii=False,
+            )
+        return f"[{self._timestamp()}] [{level}] {message}"
+
+    def log(self, message: str, level: str = "INFO", *args: Any) -> None:
+        """Log a message with the specified level.
 
-    def log(self, message: str, level: str = "INFO") -> None:
-        """Log a message with the specified level."""
+        Messages below the configured level return before any formatting;
+        ``args`` are %-interpolated into the message only when it is written.
+        """
+        if LEVELS.get(level, 0) < self.level:
+            return
         try:
-            formatted_message = self._format_message(message, level)
-            print(formatted_message)
-            with self.log_file.open('a') as f:
-                f.write(formatted_message + "\n")
+            if args:
+                message = message % args
+            self._writer.queue.put(self._format_message(message, level))
         except Exception as e:
             raise LoggingError(f"Failed to write to log file: {e}")
 
-    def error(self, message: str) -> None:
+    def flush(self, timeout: float = 5) -> None:
+        """Block until every queued message has been written."""
+        done = threading.Event()
+        self._writer.queue.put(done)
+        done.wait(timeout)
+
+    def error(self, message: str, *args: Any) -> None:
         """Log an error message."""
-        self.log(message, "ERROR")
+        self.log(message, "ERROR", *args)
 
-    def warning(self, message: str) -> None:
+    def warning(self, message: str, *args: Any) -> None:
         """Log a warning message."""
-        self.log(message, "WARNING")
+        self.log(message, "WARNING", *args)
 
-    def info(self, message: str) -> None:
+    def info(self, message: str, *args: Any) -> None:
         """Log an info message."""
-        self.log(message, "INFO")
+        self.log(message, "INFO", *args)
 
-    def debug(self, message: str) -> None:
+    def debug(self, message: str, *args: Any) -> None:
         """Log a debug message."""
-        self.log(message, "DEBUG")
+        self.log(message, "DEBUG", *args)
@@ -0,0 +1,191 @@
+import os
+import time
+import functools
+import threading
+from collections import deque
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+from .files import atomic_write_json
+from .logger import Logger
+from ..config.constants import DIAGNOSTICS_DIR, PROFILE_CYCLES, TRACE_MAX_EVENTS
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Tracer:
+    """Records timed spans and exports them in the Chrome trace event format.
+
+    Recording is off by default; a disabled tracer costs one attribute check
+    per traced call. The newest TRACE_MAX_EVENTS spans are kept, and the
+    export opens in ``chrome://tracing`` or Perfetto.
+    """
+
+    def __init__(self, max_events: int = TRACE_MAX_EVENTS):
+        self.enabled = False
+        self._events: "deque[Dict[str, Any]]" = deque(maxlen=max_events)
+        self._threads: Dict[int, str] = {}
+
+    def start(self) -> None:
+        """Discard earlier spans and start recording."""
+        self._events.clear()
+        self._threads.clear()
+        self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    def record(self, name: str, start_ns: int, end_ns: int, args: Optional[Dict[str, Any]] = None) -> None:
+        """Add a complete span; timestamps come from ``time.perf_counter_ns``."""
+        thread = threading.current_thread()
+        if thread.ident not in self._threads:
+            self._threads[thread.ident] = thread.name
+        event = {"name": name, "ph": "X", "ts": start_ns / 1000, "dur": (end_ns - start_ns) / 1000,
+                 "pid": os.getpid(), "tid": thread.ident}
+        if args:
+            event["args"] = args
+        self._events.append(event)
+
+    def export(self, path: Path) -> int:
+        """Write the recorded spans as Chrome-trace JSON; return how many were written."""
+        events: List[Dict[str, Any]] = list(self._events)
+        pid = os.getpid()
+        metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in list(self._threads.items())]
+        atomic_write_json(path, {"traceEvents": metadata + events, "displayTimeUnit": "ms"})
+        return len(events)
+
+
+TRACER = Tracer()
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator recording each call of the function as a span on TRACER."""
+    def decorate(fn: F) -> F:
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                TRACER.record(label, start, time.perf_counter_ns())
+        return wrapper  # type: ignore[return-value]
+    return decorate
+
+
+class CycleProfiler:
+    """cProfile and span-trace session over the next N poller cycles.
+
+    cProfile only sees the thread that enabled it, so the poller runs each
+    phase through :meth:`call`, which profiles it on a per-thread profile.
+    When the session ends the profiles are merged into one ``.prof`` file
+    (plus a text summary) and the spans are exported next to it. A session
+    that is still waiting on a running phase is written when that phase
+    returns. With an ``executor`` set, a session ended from the event loop
+    is written there instead, so merging the profiles never stalls the loop.
+
+    The methods take a non-reentrant lock; call them from the loop, not from
+    a signal handler.
+    """
+
+    def __init__(self, logger: Logger, directory: Path = DIAGNOSTICS_DIR,
+                 tracer: Tracer = TRACER, executor: Optional[Executor] = None):
+        self.logger = logger
+        self.directory = Path(directory)
+        self.tracer = tracer
+        self.executor = executor
+        self.remaining = 0
+        self._profiles: Dict[int, Any] = {}
+        self._busy = 0
+        self._closing = False
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.remaining > 0
+
+    def toggle(self, cycles: int = PROFILE_CYCLES) -> None:
+        """Start a session, or end the running one early."""
+        if self.active:
+            self.finish()
+        else:
+            self.start(cycles)
+
+    def start(self, cycles: int = PROFILE_CYCLES) -> None:
+        with self._lock:
+            if self.remaining or self._closing:
+                return
+            self._profiles = {}
+            self.remaining = cycles
+        self.tracer.start()
+        self.logger.info(f"Profiling the next {cycles} cycles.")
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)``, under this thread's profile while a session is running."""
+        if not self.remaining:
+            return fn(*args)
+        import cProfile
+
+        with self._lock:
+            profile = self._profiles.get(threading.get_ident())
+            if profile is None:
+                profile = self._profiles[threading.get_ident()] = cProfile.Profile()
+            self._busy += 1
+        try:
+            return profile.runcall(fn, *args)
+        finally:
+            with self._lock:
+                self._busy -= 1
+                ready = self._closing and not self._busy
+            if ready:
+                self._write()
+
+    def cycle_done(self) -> None:
+        """Count a completed cycle; the session ends after the requested number."""
+        if self.remaining:
+            self.remaining -= 1
+            if not self.remaining:
+                self.finish()
+
+    def finish(self) -> None:
+        """End the session; results are written once no profiled phase is running."""
+        with self._lock:
+            self.remaining = 0
+            self._closing = True
+            ready = not self._busy
+        self.tracer.stop()
+        if ready:
+            if self.executor is not None:
+                self.executor.submit(self._write)
+            else:
+                self._write()
+
+    def _write(self) -> None:
+        import io
+        import pstats
+
+        with self._lock:
+            if not self._closing:
+                return
+            profiles = list(self._profiles.values())
+            self._profiles = {}
+            self._closing = False
+        stem = self.directory / time.strftime("poller-%Y%m%d-%H%M%S")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            spans = self.tracer.export(stem.with_suffix(".trace.json"))
+            if profiles:
+                stats = pstats.Stats(*profiles)
+                stats.dump_stats(str(stem.with_suffix(".prof")))
+                summary = io.StringIO()
+                pstats.Stats(str(stem.with_suffix(".prof")), stream=summary) \
+                    .sort_stats("cumulative").print_stats(40)
+                stem.with_suffix(".txt").write_text(summary.getvalue())
+        except OSError as e:
+            self.logger.error(f"Failed to write profile: {e}")
+            return
+        self.logger.info(f"Profile written to {stem}.* ({spans} spans).")
@@ -3,6 +3,7 @@ import React, { createContext, useContext, useState, useEffect } from 'react';
 interface PollerContextType {
   pollerRunning: boolean;
   goalReached: boolean;
+  workoutMinutes: number | null;
   restrictionsEnabled: boolean;
   canModifyRestrictions: boolean;
   lastSyncedAt: Date | null;
@@ -11,6 +12,7 @@ interface PollerContextType {
 const PollerContext = createContext<PollerContextType>({
   pollerRunning: false,
   goalReached: false,
+  workoutMinutes: null,
   restrictionsEnabled: true,
   canModifyRestrictions: false,
   lastSyncedAt: null,
@@ -21,66 +23,28 @@ export const PollerProvider: React.FC<{ children: React.ReactNode }> = ({
 }) => {
   const [pollerRunning, setPollerRunning] = useState(false);
   const [goalReached, setGoalReached] = useState(false);
+  const [workoutMinutes, setWorkoutMinutes] = useState<number | null>(null);
   const [restrictionsEnabled, setRestrictionsEnabled] = useState(true);
   const [lastSyncedAt, setLastSyncedAt] = useState<Date | null>(null);
 
   useEffect(() => {
-    const checkStatus = async () => {
-      const isRunning = window?.electron?.isPollerRunning?.();
-      setPollerRunning(isRunning);
-
-      if (isRunning) {
-        const data = await window?.electron?.getGoalStatus?.();
-        setGoalReached(data?.goalReachedToday ?? false);
-
-        // Fetch restrictions enabled status
-        const res = await fetch(
-          'https://nopainnogameapp-default-rtdb.firebaseio.com/restrictionsEnabled.json'
-        );
-        const value = await res.json();
-        setRestrictionsEnabled(Boolean(value));
-      }
-    };
-
-    checkStatus();
-  }, []);
-
-  useEffect(() => {
-    const fetchLastSynced = async () => {
-      const res = await fetch(
-        'https://nopainnogameapp-default-rtdb.firebaseio.com/lastSyncedAt.json'
+    // The poller pushes status changes; subscribe once instead of polling.
+    const applyStatus = (status: PollerStatus | undefined) => {
+      if (!status) return;
+      setPollerRunning(status.connected);
+      if (!status.connected) return;
+
+      setGoalReached(status.goalReachedToday ?? false);
+      setWorkoutMinutes(status.workoutMinutesToday ?? null);
+      setRestrictionsEnabled(Boolean(status.restrictionsEnabled));
+      setLastSyncedAt(
+        status.lastSyncedAt ? new Date(status.lastSyncedAt) : null
       );
-      const timestamp = await res.json();
-
-      if (timestamp) {
-        setLastSyncedAt(new Date(timestamp));
-      }
     };
 
-    fetchLastSynced();
-
-    const interval = setInterval(fetchLastSynced, 30_000);
-    return () => clearInterval(interval);
-  }, []);
-
-  useEffect(() => {
-    const interval = setInterval(async () => {
-      const isRunning = window?.electron?.isPollerRunning?.();
-      setPollerRunning(isRunning);
-
-      if (isRunning) {
-        const data = await window?.electron?.getGoalStatus?.();
-        setGoalReached(data?.goalReachedToday ?? false);
-
-        // Fetch restrictions enabled status
-        const res = await fetch(
-          'https://nopainnogameapp-default-rtdb.firebaseio.com/restrictionsEnabled.json'
-        );
-        const value = await res.json();
-        setRestrictionsEnabled(Boolean(value));
-      }
-    }, 1000);
-    return () => clearInterval(interval);
+    window?.electron?.getPollerStatus?.().then(applyStatus);
+    const unsubscribe = window?.electron?.onPollerStatus?.(applyStatus);
+    return () => unsubscribe?.();
   }, []);
 
   const canModifyRestrictions = pollerRunning && !restrictionsEnabled;
@@ -90,6 +54,7 @@ export const PollerProvider: React.FC<{ children: React.ReactNode }> = ({
       value={{
         pollerRunning,
         goalReached,
+        workoutMinutes,
         restrictionsEnabled,
         canModifyRestrictions,
         lastSyncedAt,
@@ -1,6 +1,7 @@
 import { app, BrowserWindow } from 'electron';
 import path from 'path';
 import fs from 'fs';
+import http from 'http';
 import { fileURLToPath } from 'url';
 import { ipcMain } from 'electron';
 import Store from 'electron-store';
@@ -16,7 +17,76 @@ if (store.get('targetWorkoutMinutes') == null) {
 const workoutFilePath = path.join(__dirname, 'current_workout.json');
 const goalStatusFilePath = path.join(__dirname, 'goal_status.json');
 
+// Poller status pushed over Server-Sent Events (see backend/services/status_server.py)
+const STATUS_EVENTS_URL = 'http://127.0.0.1:47621/events';
+const HISTORY_URL = 'http://127.0.0.1:47621/history';
+const STATUS_RECONNECT_MS = 2000;
+let pollerStatus = { connected: false };
+
+function broadcastPollerStatus() {
+  for (const win of BrowserWindow.getAllWindows()) {
+    win.webContents.send('poller-status', pollerStatus);
+  }
+}
+
+function setPollerStatus(status) {
+  pollerStatus = status;
+  broadcastPollerStatus();
+}
+
+function subscribeToPoller() {
+  // 'end' and 'error' can both fire for one dropped connection; reconnect once.
+  let reconnecting = false;
+  const reconnect = () => {
+    if (reconnecting) return;
+    reconnecting = true;
+    if (pollerStatus.connected) {
+      setPollerStatus({ ...pollerStatus, connected: false });
+    }
+    setTimeout(subscribeToPoller, STATUS_RECONNECT_MS);
+  };
+
+  const req = http.get(STATUS_EVENTS_URL, (res) => {
+    let buffer = '';
+    res.setEncoding('utf-8');
+    res.on('data', (chunk) => {
+      buffer += chunk;
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        let event = 'message';
+        const data = [];
+        for (const line of block.split('\n')) {
+          if (line.startsWith('event:')) event = line.slice(6).trim();
+          else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+        }
+        if (event === 'status') {
+          let status;
+          try {
+            status = JSON.parse(data.join('\n'));
+          } catch (err) {
+            console.error('❌ Ignoring malformed poller status event:', err);
+            continue;
+          }
+          setPollerStatus({ ...status, connected: true });
+        } else if (event === 'heartbeat' && !pollerStatus.connected) {
+          setPollerStatus({ ...pollerStatus, connected: true });
+        }
+      }
+    });
+    res.on('end', reconnect);
+    res.on('error', reconnect);
+  });
+  req.on('error', reconnect);
+}
+
+ipcMain.handle('get-poller-status', () => pollerStatus);
+
 ipcMain.handle('get-current-workout-minutes', async () => {
+  if (pollerStatus.connected && pollerStatus.workoutMinutesToday != null) {
+    return pollerStatus.workoutMinutesToday;
+  }
   try {
     const raw = await fs.promises.readFile(workoutFilePath, 'utf-8');
     const { minutes } = JSON.parse(raw);
@@ -28,6 +98,9 @@ ipcMain.handle('get-current-workout-minutes', async () => {
 });
 
 ipcMain.handle('get-goal-status', async () => {
+  if (pollerStatus.connected && pollerStatus.goalReachedToday != null) {
+    return pollerStatus.goalReachedToday;
+  }
   try {
     const raw = await fs.promises.readFile(goalStatusFilePath, 'utf-8');
     const { goalReachedToday } = JSON.parse(raw);
@@ -38,6 +111,24 @@ ipcMain.handle('get-goal-status', async () => {
   }
 });
 
+ipcMain.handle('get-workout-history', (_event, unit = 'day') => {
+  return new Promise((resolve) => {
+    const req = http.get(`${HISTORY_URL}?unit=${encodeURIComponent(unit)}`, (res) => {
+      let body = '';
+      res.setEncoding('utf-8');
+      res.on('data', (chunk) => (body += chunk));
+      res.on('end', () => {
+        try {
+          resolve(res.statusCode === 200 ? JSON.parse(body) : null);
+        } catch {
+          resolve(null);
+        }
+      });
+    });
+    req.on('error', () => resolve(null));
+  });
+});
+
 ipcMain.handle('get-target-workout-minutes', () => {
   return store.get('targetWorkoutMinutes') ?? 30; // default to 30
 });
@@ -61,4 +152,7 @@ function createWindow() {
   win.loadURL('http://localhost:5173');
 }
 
-app.whenReady().then(createWindow);
+app.whenReady().then(() => {
+  subscribeToPoller();
+  createWindow();
+});
@@ -4,10 +4,17 @@ import * as path from 'path';
 
 const BLOCKED_CONFIG_PATH = path.join(process.cwd(), 'blocked_config.json');
 const HEARTBEAT_PATH = path.join(__dirname, '..', '..', 'poller_heartbeat.txt');
+// The poller rewrites its heartbeat after every enforcement cycle, at least once a minute;
+// older than this means its cycles have stalled or it is gone.
+const HEARTBEAT_STALE_MS = 180_000;
 
 contextBridge.exposeInMainWorld('electron', {
   isPollerRunning: () => {
-    return fs.existsSync(HEARTBEAT_PATH);
+    try {
+      return Date.now() - fs.statSync(HEARTBEAT_PATH).mtimeMs < HEARTBEAT_STALE_MS;
+    } catch {
+      return false;
+    }
   },
   readBlockConfig: () => {
     try {
@@ -31,6 +38,16 @@ contextBridge.exposeInMainWorld('electron', {
   getCurrentWorkoutMinutes: () =>
     ipcRenderer.invoke('get-current-workout-minutes'),
   getGoalStatus: () => ipcRenderer.invoke('get-goal-status'),
+  getWorkoutHistory: (unit: 'day' | 'week' | 'month') =>
+    ipcRenderer.invoke('get-workout-history', unit),
+  getPollerStatus: () => ipcRenderer.invoke('get-poller-status'),
+  onPollerStatus: (callback: (status: unknown) => void) => {
+    const listener = (_event: unknown, status: unknown) => callback(status);
+    ipcRenderer.on('poller-status', listener);
+    return () => {
+      ipcRenderer.removeListener('poller-status', listener);
+    };
+  },
   getTargetWorkoutMinutes: () =>
     ipcRenderer.invoke('get-target-workout-minutes'),
   setTargetWorkoutMinutes: (minutes: number) =>
@@ -1,9 +1,31 @@
 import React from 'react';
 import { useEffect, useState } from 'react';
 import { Panel, TitleText } from '../components';
-import { useBlockConfig } from '../../context';
+import { useBlockConfig, usePoller } from '../../context';
 
 declare global {
+  interface PollerStatus {
+    connected: boolean;
+    goalReachedToday?: boolean | null;
+    workoutMinutesToday?: number | null;
+    restrictionsEnabled?: boolean | null;
+    lastSyncedAt?: string | number | null;
+  }
+
+  type HistoryUnit = 'day' | 'week' | 'month';
+
+  interface WorkoutHistory {
+    unit: HistoryUnit;
+    from: string;
+    to: string;
+    buckets: {
+      start: string;
+      days: number;
+      minutes: number;
+      activeDays: number;
+    }[];
+  }
+
   interface Window {
     electron: {
       isPollerRunning: () => boolean;
@@ -21,6 +43,9 @@ declare global {
       setTargetWorkoutMinutes: (minutes: number) => void;
       getCurrentWorkoutMinutes: () => Promise<number>;
       getGoalStatus: () => Promise<{ goalReachedToday: boolean }>;
+      getWorkoutHistory: (unit: HistoryUnit) => Promise<WorkoutHistory | null>;
+      getPollerStatus: () => Promise<PollerStatus>;
+      onPollerStatus: (callback: (status: PollerStatus) => void) => () => void;
     };
   }
 }
@@ -31,12 +56,15 @@ export const Dashboard = ({
   setCurrentPage: (page: string) => void;
 }) => {
   const { blockConfig } = useBlockConfig();
+  const poller = usePoller();
   const { apps: selectedApps, sites: selectedSites } = blockConfig;
   const [currentWorkoutMinutes, setCurrentWorkoutMinutes] = useState<number>(0);
   const [targetWorkoutMinutes, setTargetWorkoutMinutes] = useState<number>(30);
   const [restrictionsEnabled, setRestrictionsEnabled] = useState(false);
   const [isLoading, setIsLoading] = useState(true);
   const [showList, setShowList] = useState(false);
+  const [historyUnit, setHistoryUnit] = useState<HistoryUnit>('day');
+  const [history, setHistory] = useState<WorkoutHistory | null>(null);
 
   const appsSummary = selectedApps.length
     ? `${selectedApps.length} app${selectedApps.length > 1 ? 's' : ''}`
@@ -49,15 +77,10 @@ export const Dashboard = ({
   const summaryText = `Blocking ${appsSummary} and ${sitesSummary}`;
 
   useEffect(() => {
-    const fetchToggle = async () => {
-      const res = await fetch(
-        'https://nopainnogameapp-default-rtdb.firebaseio.com/restrictionsEnabled.json'
-      );
-      const value = await res.json();
-      setRestrictionsEnabled(Boolean(value));
-    };
-    fetchToggle();
-  }, []);
+    if (poller.pollerRunning) {
+      setRestrictionsEnabled(poller.restrictionsEnabled);
+    }
+  }, [poller.pollerRunning, poller.restrictionsEnabled]);
 
   useEffect(() => {
     const fetchTarget = async () => {
@@ -77,11 +100,34 @@ export const Dashboard = ({
     };
 
     fetchInitialWorkout();
-
-    const interval = setInterval(fetchInitialWorkout, 1000);
-    return () => clearInterval(interval);
   }, []);
 
+  useEffect(() => {
+    if (poller.workoutMinutes != null) {
+      setCurrentWorkoutMinutes(poller.workoutMinutes);
+      setIsLoading(false);
+    }
+  }, [poller.workoutMinutes]);
+
+  useEffect(() => {
+    const fetchHistory = async () => {
+      setHistory((await window.electron.getWorkoutHistory?.(historyUnit)) ?? null);
+    };
+    fetchHistory();
+  }, [historyUnit, poller.workoutMinutes]);
+
+  const historyMax = Math.max(
+    targetWorkoutMinutes,
+    ...(history?.buckets.map((bucket) => bucket.minutes / bucket.days) ?? [])
+  );
+
+  const historyLabel = (start: string) => {
+    const date = new Date(`${start}T00:00:00`);
+    return historyUnit === 'month'
+      ? date.toLocaleDateString(undefined, { month: 'short' })
+      : date.toLocaleDateString(undefined, { month: 'numeric', day: 'numeric' });
+  };
+
   const progressPercent =
     (currentWorkoutMinutes / targetWorkoutMinutes) * 100 || 0;
 
@@ -175,6 +221,69 @@ export const Dashboard = ({
             )}
           </div>
         </Panel>
+        <Panel>
+          <div className="flex justify-between items-end mb-4">
+            <h2 className="text-xl font-semibold mb-1">History</h2>
+            <div className="flex gap-1">
+              {(['day', 'week', 'month'] as HistoryUnit[]).map((unit) => (
+                <button
+                  key={unit}
+                  className={`px-2 py-1 rounded text-xs font-medium transition ${
+                    historyUnit === unit
+                      ? 'bg-blue-600 text-white'
+                      : 'bg-gray-600 text-gray-300'
+                  }`}
+                  onClick={() => setHistoryUnit(unit)}
+                >
+                  {unit === 'day' ? 'Daily' : unit === 'week' ? 'Weekly' : 'Monthly'}
+                </button>
+              ))}
+            </div>
+          </div>
+          {history == null ? (
+            <p className="text-sm text-gray-400 italic">
+              History is available while the poller is running.
+            </p>
+          ) : (
+            <>
+              <div className="flex items-end gap-1 h-32">
+                {history.buckets.map((bucket) => {
+                  // Average per day, so partial weeks and months compare with full ones.
+                  const perDay = bucket.minutes / bucket.days;
+                  return (
+                    <div
+                      key={bucket.start}
+                      className="flex-1 h-full flex items-end"
+                      title={`${bucket.start}: ${Math.round(bucket.minutes)} min, ${
+                        bucket.activeDays
+                      }/${bucket.days} active days`}
+                    >
+                      <div
+                        className={`w-full rounded-t ${
+                          perDay >= targetWorkoutMinutes ? 'bg-green-500' : 'bg-yellow-400'
+                        }`}
+                        style={{ height: `${(perDay / historyMax) * 100}%` }}
+                      />
+                    </div>
+                  );
+                })}
+              </div>
+              <div className="flex gap-1 mt-1">
+                {history.buckets.map((bucket) => (
+                  <span
+                    key={bucket.start}
+                    className="flex-1 text-center text-[10px] text-gray-400"
+                  >
+                    {historyLabel(bucket.start)}
+                  </span>
+                ))}
+              </div>
+              <p className="text-xs text-gray-400 mt-2">
+                Average minutes per day; green meets the daily target.
+              </p>
+            </>
+          )}
+        </Panel>
         <Panel className="mt-6">
           <div className="flex justify-between items-end mb-4">
             <h2 className="text-xl font-semibold mb-1">Current Restrictions</h2>